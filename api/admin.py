@@ -26,6 +26,14 @@ class EventAdmin(CustomAdmin):
     fields = ("id", "team", "event_type", "description", "user")
 
 
+@admin.register(EventArchive, site=sluggo_admin)
+class EventArchiveAdmin(CustomAdmin):
+    readonly_fields = ("id", "team", "day", "event_count", "events")
+
+    fields = ("id", "team", "day", "event_count", "events")
+    list_display = ("team", "day", "event_count")
+
+
 @admin.register(Member, site=sluggo_admin)
 class MemberAdmin(CustomAdmin):
     readonly_fields = ("created", "id")
@@ -63,7 +71,14 @@ class TagAdmin(CustomAdmin):
 class TeamAdmin(CustomAdmin):
     readonly_fields = ("created", "ticket_head", "id")
 
-    fields = (("id", "ticket_head"), "name", "created", "activated", "deactivated")
+    fields = (
+        ("id", "ticket_head"),
+        "name",
+        "created",
+        "activated",
+        "deactivated",
+        "event_retention_days",
+    )
 
     def save_model(self, request, obj, form, change) -> None:
         super().save_model(request, obj, form, change)
@@ -149,5 +164,13 @@ class TeamInviteAdmin(CustomAdmin):
     fields = ("id", "team", "user")
 
 
+@admin.register(TeamCounter, site=sluggo_admin)
+class TeamCounterAdmin(CustomAdmin):
+    # maintained by ticket writes, and fixed by reconcile_team_counters
+    readonly_fields = ("id", "team", "kind", "key", "count", "open")
+
+    fields = ("id", "team", "kind", "key", "count", "open")
+
+
 # Add the user model to the admin dashboard.
 sluggo_admin.register(get_user_model(), UserAdmin)
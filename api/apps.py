@@ -4,3 +4,15 @@ import uuid
 
 class SluggoApiConfig(AppConfig):
     name = "api"
+
+    def ready(self):
+        # registers the receivers keeping the search indexes, the response
+        # cache, the team versions and counters and the ticket rollups current
+        from . import (
+            autocomplete,
+            response_cache,
+            team_counters,
+            team_version,
+            ticket_rollups,
+            ticket_search,
+        )
@@ -0,0 +1,309 @@
+import heapq
+import logging
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Member, Tag, Ticket, tickets_bulk_saved
+
+"""
+process wide trigram indexes of the ticket titles, tag titles and member
+usernames of recently queried teams, for typo tolerant as-you-type lookups.
+A team's index is built from the database on its first lookup and then kept
+current by model signals once the changing transaction commits. Other
+processes only see a change once their copy expires after TIMEOUT seconds
+and is rebuilt, and the least recently used teams are dropped beyond
+MAX_TEAMS
+"""
+
+logger = logging.getLogger(__name__)
+
+TICKETS = "tickets"
+TAGS = "tags"
+MEMBERS = "members"
+KINDS = (TICKETS, TAGS, MEMBERS)
+
+DEFAULT_TIMEOUT = 300
+DEFAULT_MAX_TEAMS = 100
+
+# postings longer than this are only counted while there are too few
+# candidates, and then only for their lowest keys, so very common trigrams
+# do not dominate the lookup time
+COMMON_POSTINGS = 2000
+
+# matches scoring below this share of the query's trigrams are dropped
+MIN_SCORE = 0.5
+
+
+def trigrams(text: str) -> set:
+    """
+    The trigrams of each lowercased word, padded like pg_trgm with two
+    spaces in front and one behind
+    """
+    grams = set()
+    for word in re.findall(r"\w+", text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Texts by key, with the keys of the texts containing each trigram and
+    the number of trigrams of each text
+    """
+
+    def __init__(self):
+        self.texts = {}
+        self.sizes = {}
+        self.postings = defaultdict(set)
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add(self, key, text: str):
+        self.remove(key)
+        self.texts[key] = text
+        grams = trigrams(text)
+        self.sizes[key] = len(grams)
+        for gram in grams:
+            self.postings[gram].add(key)
+
+    def remove(self, key):
+        text = self.texts.pop(key, None)
+        if text is None:
+            return
+
+        del self.sizes[key]
+        for gram in trigrams(text):
+            posting = self.postings.get(gram)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self.postings[gram]
+
+    def search(self, query: str, limit: int) -> list:
+        """
+        Returns up to limit (key, text, score) triples, best first. The
+        score is the share of the query's trigrams found in the text, ties
+        going to the text with fewer trigrams of its own
+        """
+        grams = trigrams(query)
+        postings = sorted(
+            (self.postings[gram] for gram in grams if gram in self.postings), key=len
+        )
+
+        counts = Counter()
+        for posting in postings:
+            if len(posting) > COMMON_POSTINGS:
+                if len(counts) >= limit:
+                    break
+                posting = heapq.nsmallest(COMMON_POSTINGS, posting)
+            counts.update(posting)
+
+        # many texts may share every trigram of the query, so they are cut
+        # on their similarity to it as well, which favours the closest ones
+        def similarity(count):
+            key, shared = count
+            return shared, shared / (len(grams) + self.sizes[key] - shared)
+
+        scored = []
+        for key, _ in heapq.nlargest(limit * 4, counts.items(), key=similarity):
+            text_grams = trigrams(self.texts[key])
+            shared = len(grams & text_grams)
+            score = shared / len(grams)
+            if score >= MIN_SCORE:
+                similarity = shared / (len(grams) + len(text_grams) - shared)
+                scored.append((score, similarity, key))
+
+        best = heapq.nlargest(limit, scored, key=lambda s: (s[0], s[1]))
+        return [(key, self.texts[key], round(score, 3)) for score, _, key in best]
+
+
+class TeamAutocomplete:
+    def __init__(self, expires: float):
+        self.expires = expires
+        self.indexes = {kind: TrigramIndex() for kind in KINDS}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, team_id, expires: float):
+        team_index = cls(expires)
+        sources = {
+            TICKETS: Ticket.objects.filter(team_id=team_id, deactivated=None)
+            .order_by()
+            .values_list("id", "title"),
+            TAGS: Tag.objects.filter(team_id=team_id)
+            .order_by()
+            .values_list("id", "title"),
+            MEMBERS: Member.objects.filter(team_id=team_id)
+            .order_by()
+            .values_list("id", "owner__username"),
+        }
+        for kind, rows in sources.items():
+            for key, text in rows.iterator():
+                team_index.indexes[kind].add(key, text)
+        return team_index
+
+
+class AutocompleteIndex:
+    def __init__(self, timeout=None, max_teams=None, background=True):
+        self._timeout = timeout
+        self._max_teams = max_teams
+        self._background = background
+        self._teams = OrderedDict()
+        # updates received while a team is being built, replayed afterwards
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def option(self, name, value, default):
+        if value is not None:
+            return value
+        return getattr(settings, "AUTOCOMPLETE", {}).get(name, default)
+
+    @property
+    def timeout(self) -> float:
+        return self.option("TIMEOUT", self._timeout, DEFAULT_TIMEOUT)
+
+    @property
+    def max_teams(self) -> int:
+        return self.option("MAX_TEAMS", self._max_teams, DEFAULT_MAX_TEAMS)
+
+    def get_team(self, team_id) -> TeamAutocomplete:
+        """
+        Returns the team's index, building it on first use. An expired index
+        keeps being served while a background thread rebuilds it
+        """
+        with self._lock:
+            team_index = self._teams.get(team_id)
+            if team_index is not None:
+                self._teams.move_to_end(team_id)
+                expired = team_index.expires < time.monotonic()
+                if not expired or (self._background and team_id in self._building):
+                    return team_index
+
+            if team_index is not None and self._background:
+                self._building[team_id] = []
+                threading.Thread(
+                    target=self._rebuild, args=(team_id,), daemon=True
+                ).start()
+                return team_index
+
+            self._building.setdefault(team_id, [])
+
+        return self.build(team_id)
+
+    def build(self, team_id) -> TeamAutocomplete:
+        try:
+            team_index = TeamAutocomplete.build(
+                team_id, time.monotonic() + self.timeout
+            )
+        except Exception:
+            with self._lock:
+                self._building.pop(team_id, None)
+            raise
+
+        with self._lock:
+            for kind, key, text in self._building.pop(team_id, []):
+                team_index.indexes[kind].remove(key)
+                if text is not None:
+                    team_index.indexes[kind].add(key, text)
+
+            self._teams[team_id] = team_index
+            self._teams.move_to_end(team_id)
+            while len(self._teams) > self.max_teams:
+                self._teams.popitem(last=False)
+        return team_index
+
+    def _rebuild(self, team_id):
+        try:
+            self.build(team_id)
+        except Exception:
+            logger.exception("failed to rebuild the autocomplete index of %s", team_id)
+        finally:
+            connection.close()
+
+    def search(self, team_id, query: str, kinds=KINDS, limit: int = 10) -> dict:
+        team_index = self.get_team(team_id)
+        with team_index.lock:
+            return {
+                kind: team_index.indexes[kind].search(query, limit) for kind in kinds
+            }
+
+    def update(self, team_id, kind, key, text=None):
+        """
+        Adds or replaces an entry of a team's index, or removes it when text
+        is None. Teams which are not loaded are left to be built on demand
+        """
+        with self._lock:
+            if team_id in self._building:
+                self._building[team_id].append((kind, key, text))
+            team_index = self._teams.get(team_id)
+        if team_index is None:
+            return
+
+        with team_index.lock:
+            if text is None:
+                team_index.indexes[kind].remove(key)
+            else:
+                team_index.indexes[kind].add(key, text)
+
+    def invalidate(self, team_id):
+        with self._lock:
+            self._teams.pop(team_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._teams.clear()
+
+    def loaded(self, team_id) -> bool:
+        with self._lock:
+            return team_id in self._teams
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+def update_on_commit(team_id, kind, key, text=None):
+    transaction.on_commit(lambda: autocomplete_index.update(team_id, kind, key, text))
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        title = instance.title if instance.deactivated is None else None
+        update_on_commit(instance.team_id, TICKETS, instance.pk, title)
+
+
+@receiver(tickets_bulk_saved)
+def tickets_saved(sender, tickets, **kwargs):
+    for ticket in tickets:
+        ticket_saved(Ticket, ticket)
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_on_commit(instance.team_id, TAGS, instance.pk, instance.title)
+
+
+@receiver(post_save, sender=Member)
+def member_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_on_commit(
+            instance.team_id, MEMBERS, instance.pk, instance.owner.username
+        )
+
+
+@receiver(post_delete, sender=Ticket)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Member)
+def entry_deleted(sender, instance, **kwargs):
+    kind = {Ticket: TICKETS, Tag: TAGS, Member: MEMBERS}[sender]
+    update_on_commit(instance.team_id, kind, instance.pk)
@@ -19,6 +19,34 @@ TEAM_DETAIL_SCHEMA = dict(
     ]
 )
 
+SPARSE_FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        "fields",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        description="Comma separated fields to render, dots reaching into nested "
+        "objects, e.g. id,title,status.title",
+    ),
+    OpenApiParameter(
+        "omit",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        description="Comma separated fields to leave out, e.g. team,assigned_user.owner",
+    ),
+    OpenApiParameter(
+        "expand",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        description="Comma separated relations to render as nested objects, the "
+        "others rendering as primary keys, e.g. status,ticket.tag_list. Empty "
+        "renders every relation as primary keys",
+    ),
+]
+
+TEAM_RETRIEVE_SCHEMA = dict(
+    parameters=[*TEAM_DETAIL_SCHEMA["parameters"], *SPARSE_FIELDSET_PARAMETERS]
+)
+
 TEAM_LIST_SCHEME = dict(
     parameters=[
         OpenApiParameter(
@@ -33,5 +61,136 @@ TEAM_LIST_SCHEME = dict(
             OpenApiParameter.QUERY,
             description="A search term used to filter the set",
         ),
+        *SPARSE_FIELDSET_PARAMETERS,
+    ]
+)
+
+TICKET_LIST_SCHEMA = dict(
+    parameters=[
+        *TEAM_LIST_SCHEME["parameters"],
+        OpenApiParameter(
+            "q",
+            OpenApiTypes.STR,
+            OpenApiParameter.QUERY,
+            description="Full-text search over ticket titles, tags, statuses and "
+            "descriptions, ordering the results by relevance. Results are paged "
+            "by page number only",
+        ),
     ]
 )
+
+TICKET_STATS_SCHEMA = dict(
+    parameters=[
+        TEAM_LIST_SCHEME["parameters"][0],
+        TEAM_LIST_SCHEME["parameters"][1],
+        TICKET_LIST_SCHEMA["parameters"][-1],
+        *(
+            OpenApiParameter(name, type, OpenApiParameter.QUERY)
+            for name, type in [
+                ("assigned_user__owner__username", OpenApiTypes.STR),
+                ("status__id", OpenApiTypes.INT),
+                ("tag_list__id", OpenApiTypes.INT),
+            ]
+        ),
+    ],
+    responses={200: OpenApiTypes.OBJECT},
+    description="Ticket totals, and ticket, open and overdue counts by status, "
+    "assignee and tag, over the tickets matching the filters of the ticket list. "
+    "Without filters the counts are read from the team's counters",
+)
+
+TICKET_BOARD_SCHEMA = dict(
+    parameters=[
+        *TICKET_STATS_SCHEMA["parameters"],
+        *SPARSE_FIELDSET_PARAMETERS,
+        OpenApiParameter(
+            "limit",
+            OpenApiTypes.INT,
+            OpenApiParameter.QUERY,
+            description="Maximum number of tickets of each column, at most 100",
+        ),
+        OpenApiParameter(
+            "status",
+            OpenApiTypes.STR,
+            OpenApiParameter.QUERY,
+            description="Only render the column of this status id, none for the "
+            "tickets without a status",
+        ),
+        OpenApiParameter(
+            "after",
+            OpenApiTypes.INT,
+            OpenApiParameter.QUERY,
+            description="With status, render the tickets of the column after this "
+            "ticket id, as linked by the next of each column",
+        ),
+    ],
+    responses={200: OpenApiTypes.OBJECT},
+    description="A column per status of the team, and one for the tickets "
+    "without a status, with the first tickets of each in id order and how many "
+    "it holds, over the tickets matching the filters of the ticket list",
+)
+
+AUTOCOMPLETE_SCHEMA = dict(
+    parameters=[
+        TEAM_LIST_SCHEME["parameters"][0],
+        OpenApiParameter(
+            "q",
+            OpenApiTypes.STR,
+            OpenApiParameter.QUERY,
+            description="The text typed so far, misspellings included",
+        ),
+        OpenApiParameter(
+            "kinds",
+            OpenApiTypes.STR,
+            OpenApiParameter.QUERY,
+            description="Comma separated subset of tickets, tags and members",
+        ),
+        OpenApiParameter(
+            "limit",
+            OpenApiTypes.INT,
+            OpenApiParameter.QUERY,
+            description="Maximum number of matches of each kind, at most 50",
+        ),
+    ],
+    responses={200: OpenApiTypes.OBJECT},
+)
+
+CACHE_STATS_SCHEMA = dict(responses={200: OpenApiTypes.OBJECT})
+
+TICKET_EXPORT_SCHEMA = dict(
+    parameters=[
+        TEAM_LIST_SCHEME["parameters"][0],
+        OpenApiParameter(
+            "output",
+            OpenApiTypes.STR,
+            OpenApiParameter.QUERY,
+            enum=["ndjson", "csv"],
+            description="ndjson (the default) or csv",
+        ),
+    ],
+    responses={
+        (200, "application/x-ndjson"): OpenApiTypes.STR,
+        (200, "text/csv"): OpenApiTypes.STR,
+    },
+)
+
+TICKET_SUBTREE_SCHEMA = dict(
+    parameters=[
+        *TEAM_RETRIEVE_SCHEMA["parameters"],
+        OpenApiParameter(
+            "depth",
+            OpenApiTypes.INT,
+            OpenApiParameter.QUERY,
+            description="Number of levels below the ticket to include, all by default",
+        ),
+    ],
+    description="The ticket with its descendants nested in children",
+)
+
+TICKET_MOVE_SCHEMA = dict(
+    **TEAM_DETAIL_SCHEMA,
+    description="Moves tickets with their subtrees below new parents, null "
+    "for the top, in one transaction. Moves apply in order, each checked "
+    "against the hierarchy the previous ones left; when one is invalid, "
+    "none is applied and the invalid ones are reported by index",
+)
@@ -0,0 +1,176 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connections, transaction
+
+from .models import Event
+
+"""
+records team events for mutations without adding an insert to every request.
+In buffered mode, events are queued once their transaction commits and a
+background thread writes them with bulk_create, whenever BATCH_SIZE events
+are waiting or FLUSH_INTERVAL seconds have passed. In sync mode, events are
+inserted right away, inside the caller's transaction. A batch the database
+refuses is written one event at a time, so that only the events it rejects,
+such as those of a team deleted in the meantime, are lost. Batches failing
+otherwise go back to the buffer for the next flush
+"""
+
+logger = logging.getLogger(__name__)
+
+BUFFERED = "buffered"
+SYNC = "sync"
+
+DEFAULTS = {"MODE": BUFFERED, "BATCH_SIZE": 100, "FLUSH_INTERVAL": 1.0}
+
+
+class EventWriter:
+    def __init__(self, **options):
+        self._options = options
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def option(self, name):
+        if name.lower() in self._options:
+            return self._options[name.lower()]
+        return getattr(settings, "EVENT_WRITER", {}).get(name, DEFAULTS[name])
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def record(self, event_type, instances, user=None, team=None, verb=None):
+        """
+        Records one event per instance, which must be HasUuid models of the
+        given team (or, without a team, have one of their own)
+        """
+        if not isinstance(instances, (list, tuple)):
+            instances = [instances]
+
+        verb = verb or dict(Event.events)[event_type] + "d"
+        events = [
+            Event(
+                event_type=event_type,
+                description=self.describe(verb, instance),
+                user=user if user and user.is_authenticated else None,
+                team_id=team.id if team else instance.team_id,
+                object=instance.object_uuid,
+            )
+            for instance in instances
+        ]
+
+        if not events:
+            return
+        if self.option("MODE") == SYNC:
+            Event.objects.bulk_create(events)
+        else:
+            transaction.on_commit(lambda: self.enqueue(events))
+
+    @staticmethod
+    def describe(verb, instance) -> str:
+        name = instance._meta.verbose_name
+        # deleted instances have lost their primary key by now
+        label = getattr(instance, "title", None) or instance.pk or instance.object_uuid
+        return f"{verb} {name} {label}"
+
+    def enqueue(self, events):
+        with self._lock:
+            self._buffer.extend(events)
+            full = len(self._buffer) >= self.option("BATCH_SIZE")
+
+        self.start()
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """
+        Writes the buffered events, returning how many were written
+        """
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        if not events:
+            return 0
+
+        try:
+            Event.objects.bulk_create(events, batch_size=self.option("BATCH_SIZE"))
+        except IntegrityError:
+            return self.write_each(events)
+        except Exception:
+            self.requeue(events)
+            raise
+        return len(events)
+
+    def write_each(self, events) -> int:
+        written = 0
+        for event in events:
+            # the failed batch may have assigned it a primary key
+            event.pk = None
+            try:
+                with transaction.atomic():
+                    Event.objects.bulk_create([event])
+            except IntegrityError as error:
+                logger.warning("dropped event %s: %s", event.description, error)
+            else:
+                written += 1
+        return written
+
+    def requeue(self, events):
+        for event in events:
+            event.pk = None
+        with self._lock:
+            self._buffer[:0] = events
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(
+                    target=self._run, name="sluggo-event-writer", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread once it has written what is buffered
+        """
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            self.flush()
+            return
+
+        self._stopping = True
+        self._wakeup.set()
+        thread.join()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.option("FLUSH_INTERVAL"))
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("failed to write buffered events")
+            finally:
+                close_old_connections()
+
+        connections.close_all()
+
+
+event_writer = EventWriter()
+
+
+@atexit.register
+def flush_on_exit():
+    try:
+        event_writer.stop()
+    except Exception:
+        logger.exception("failed to write buffered events on exit")
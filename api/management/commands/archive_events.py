@@ -0,0 +1,115 @@
+import gzip
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.models import Event, EventArchive
+
+"""
+moves events past their retention out of the event table, a chunk at a time,
+either into the EventArchive table or onto the end of a JSON lines file
+"""
+
+
+class Command(BaseCommand):
+    help = "Archives events older than the team or global retention period"
+
+    def add_arguments(self, parser):
+        retention = getattr(settings, "EVENT_RETENTION", {})
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=retention.get("DAYS"),
+            help="retention for teams without their own (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=retention.get("CHUNK_SIZE", 1000),
+            help="events moved per transaction (default: %(default)s)",
+        )
+        parser.add_argument("--team", type=int, help="only archive this team's events")
+        parser.add_argument(
+            "--file",
+            help="append events to this JSON lines file, gzipped if it ends in .gz, "
+            "instead of the archive table",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="only count the events that would be archived",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] is not None and options["days"] < 1:
+            raise CommandError("--days must be at least 1")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+
+        started = time.monotonic()
+        queryset = Event.expired(options["days"])
+        if options["team"] is not None:
+            queryset = queryset.filter(team_id=options["team"])
+
+        if options["dry_run"]:
+            self.stdout.write(f"{queryset.count()} events would be archived")
+            return
+
+        output = self.open_file(options["file"]) if options["file"] else None
+        moved = chunks = 0
+        try:
+            while True:
+                count = self.move_chunk(queryset, options["chunk_size"], output)
+                if not count:
+                    break
+                moved += count
+                chunks += 1
+        finally:
+            if output is not None:
+                output.close()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"archived {moved} events in {chunks} chunks in {elapsed:.2f}s"
+            )
+        )
+
+    @staticmethod
+    def open_file(path):
+        if path.endswith(".gz"):
+            return gzip.open(path, "at", encoding="utf-8")
+        return open(path, "a", encoding="utf-8")
+
+    def move_chunk(self, queryset, chunk_size, output) -> int:
+        with transaction.atomic():
+            # concurrent runs skip the events another one is moving, so no
+            # event is archived twice
+            events = list(
+                queryset.select_for_update(skip_locked=True, of=("self",))
+                .order_by("created", "id")
+                .values(*Event.ARCHIVE_FIELDS)[:chunk_size]
+            )
+            if not events:
+                return 0
+
+            if output is None:
+                EventArchive.append(events)
+            else:
+                for event in events:
+                    output.write(
+                        json.dumps([event["team_id"], *EventArchive.compact(event)])
+                        + "\n"
+                    )
+                # on disk before the events are gone: a crash in between
+                # writes them again on the next run rather than losing them
+                output.flush()
+                os.fsync(output.fileno())
+
+            Event.objects.filter(id__in=[event["id"] for event in events]).delete()
+
+        return len(events)
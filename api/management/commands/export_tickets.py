@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Team
+from api.ticket_export import DEFAULT_CHUNK_SIZE, FORMATS, NDJSON, export_lines
+
+"""
+writes the tickets of a team as NDJSON or CSV, the same as the export
+endpoint, to a file or to stdout
+"""
+
+
+class Command(BaseCommand):
+    help = "Exports the tickets of a team as NDJSON or CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument("team", type=int, help="the team whose tickets to export")
+        parser.add_argument(
+            "--format",
+            choices=list(FORMATS),
+            default=NDJSON,
+            help="(default: %(default)s)",
+        )
+        parser.add_argument("--file", help="write to this file instead of stdout")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="tickets read per chunk (default: %(default)s)",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        if not Team.objects.filter(pk=options["team"]).exists():
+            raise CommandError(f"team {options['team']} does not exist")
+
+        started = time.monotonic()
+        lines = export_lines(options["team"], options["format"], options["chunk_size"])
+
+        if options["file"]:
+            # the csv module terminates its lines itself
+            output = open(options["file"], "w", encoding="utf-8", newline="")
+            write = output.write
+        else:
+            output = None
+            write = lambda line: self.stdout.write(line, ending="")
+
+        # every line is a ticket, apart from the csv header
+        count = -1 if options["format"] != NDJSON else 0
+        try:
+            for line in lines:
+                write(line)
+                count += 1
+        finally:
+            if output is not None:
+                output.close()
+
+        # stdout may be the export itself
+        elapsed = time.monotonic() - started
+        self.stderr.write(
+            self.style.SUCCESS(f"exported {count} tickets in {elapsed:.2f}s")
+        )
@@ -0,0 +1,92 @@
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Team
+from api.ticket_export import FORMATS
+from api.ticket_import import DEFAULT_CHUNK_SIZE, TicketImporter, read_rows
+
+"""
+loads tickets from an NDJSON or CSV file, as written by export_tickets, into
+a team. The file is read twice: once to create the statuses and tags it
+refers to, then a chunk at a time, each chunk committed with one insert of
+tickets and one of their tags. An interrupted import is resumed by running
+it again with the same --source, the default being the file's name
+"""
+
+
+class Command(BaseCommand):
+    help = "Imports tickets into a team from an NDJSON or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("team", type=int, help="the team to import into")
+        parser.add_argument("file", help="the NDJSON or CSV file to import")
+        parser.add_argument(
+            "--format",
+            choices=list(FORMATS),
+            help="the format of the file (default: from its extension)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="tickets inserted per transaction (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--source",
+            help="names the import, rows already imported under the same name "
+            "are skipped (default: the name of the file)",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        if not os.path.isfile(options["file"]):
+            raise CommandError(f"{options['file']} is not a file")
+        try:
+            team = Team.objects.get(pk=options["team"])
+        except Team.DoesNotExist:
+            raise CommandError(f"team {options['team']} does not exist")
+
+        source = options["source"] or os.path.basename(options["file"])
+        importer = TicketImporter(team, source)
+
+        started = time.monotonic()
+        importer.resolve(read_rows(options["file"], options["format"]))
+
+        rows = read_rows(options["file"], options["format"])
+        read = 0
+        while True:
+            chunk = list(islice(rows, options["chunk_size"]))
+            if not chunk:
+                break
+
+            importer.import_chunk(chunk)
+            read += len(chunk)
+            self.report_errors(importer)
+
+            self.stdout.write(
+                f"{read} rows read, {importer.imported} imported, "
+                f"{self.rate(read, started):.0f} rows/s"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"imported {importer.imported} tickets in "
+                f"{time.monotonic() - started:.2f}s "
+                f"({self.rate(read, started):.0f} rows/s), "
+                f"{importer.skipped} already imported, {importer.invalid} invalid"
+            )
+        )
+
+    @staticmethod
+    def rate(rows, started) -> float:
+        elapsed = time.monotonic() - started
+        return rows / elapsed if elapsed > 0 else 0.0
+
+    def report_errors(self, importer):
+        for number, message in importer.errors:
+            self.stderr.write(f"row {number}: {message}")
+        importer.errors.clear()
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Ticket
+from api.ticket_search import reindex_tickets
+
+"""
+rebuilds the ticket search documents from scratch, or only those of a team
+"""
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index of tickets"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--team", type=int, help="only reindex this team's tickets")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        with transaction.atomic():
+            if options["team"] is None:
+                ticket_ids = None
+                count = Ticket.objects.count()
+            else:
+                ticket_ids = list(
+                    Ticket.objects.filter(team_id=options["team"]).values_list(
+                        "id", flat=True
+                    )
+                )
+                count = len(ticket_ids)
+            reindex_tickets(ticket_ids)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"reindexed {count} tickets in {elapsed:.2f}s")
+        )
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.ticket_rollups import rebuild_rollups
+
+"""
+recomputes the subtree rollups of the ticket hierarchy from scratch, or only
+those of a team's tickets, repairing rollups left stale by writes which
+bypassed the ORM
+"""
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the subtree rollups of the ticket hierarchy"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--team", type=int, help="only rebuild this team's rollups")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rebuild_rollups(options["team"])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"rebuilt the rollups of {count} nodes in {elapsed:.2f}s"
+            )
+        )
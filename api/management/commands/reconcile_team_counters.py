@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.team_counters import reconcile_counters
+
+"""
+recounts the team counters from the tickets, of every team or of one, and
+fixes the counters which drifted, as writes which bypass the ORM leave them
+"""
+
+
+class Command(BaseCommand):
+    help = "Recounts the team counters and fixes those which drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--team", type=int, help="only reconcile this team's counters"
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        fixed = reconcile_counters(options["team"])
+
+        for team_id, count in fixed.items():
+            if count:
+                self.stdout.write(f"team {team_id}: fixed {count} counters")
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"reconciled the counters of {len(fixed)} teams, "
+                f"fixing {sum(fixed.values())}, in {elapsed:.2f}s"
+            )
+        )
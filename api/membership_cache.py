@@ -0,0 +1,39 @@
+import copy
+
+from .versioned_cache import VersionedCache
+
+"""
+process wide cache of team membership lookups, keyed by (team id, user id).
+Each entry is stored with the version of the team it was read at, and only
+served while the team is still at that version. Every write to a team's
+members bumps the version in the writing transaction, so a member removed
+or demoted through any worker is stale on every other worker as soon as the
+change commits. Entries also expire after a timeout, and the least recently
+used entries are evicted once the cache is full. Member save/delete signals
+drop the entries of the process making the change right away
+"""
+
+# stored for users which are not members of the team, so that repeated
+# requests from non members do not hit the database either
+NOT_A_MEMBER = object()
+
+
+class MembershipCache(VersionedCache):
+    SETTING = "MEMBERSHIP_CACHE"
+    DEFAULT_MAX_ENTRIES = 10000
+
+    def stored(self, member):
+        if member is NOT_A_MEMBER:
+            return member
+
+        # only the member row is cached, not the team or owner it points to
+        member = copy.copy(member)
+        member._state.fields_cache = {}
+        return member
+
+    def served(self, member):
+        # callers are free to modify the instance they are handed
+        return member if member is NOT_A_MEMBER else copy.copy(member)
+
+
+membership_cache = MembershipCache()
@@ -0,0 +1,48 @@
+# Generated by Django 4.0.6 on 2026-10-18 09:54
+
+from django.db import migrations, models
+
+
+def renumber_duplicate_tickets(apps, schema_editor):
+    """
+    tickets created concurrently may share a ticket number; give every
+    duplicate after the first a fresh number from the team's ticket head
+    """
+    Team = apps.get_model("api", "Team")
+    Ticket = apps.get_model("api", "Ticket")
+
+    duplicates = (
+        Ticket.objects.values("team_id", "ticket_number")
+        .annotate(count=models.Count("id"))
+        .filter(count__gt=1)
+    )
+
+    for duplicate in duplicates:
+        team = Team.objects.get(pk=duplicate["team_id"])
+        tickets = Ticket.objects.filter(
+            team_id=duplicate["team_id"], ticket_number=duplicate["ticket_number"]
+        ).order_by("id")
+
+        for ticket in tickets[1:]:
+            team.ticket_head += 1
+            ticket.ticket_number = team.ticket_head
+            ticket.save(update_fields=["ticket_number"])
+
+        team.save(update_fields=["ticket_head"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_alter_ticket_description"),
+    ]
+
+    operations = [
+        migrations.RunPython(renumber_duplicate_tickets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="ticket",
+            constraint=models.UniqueConstraint(
+                fields=("team", "ticket_number"), name="unique_team_ticket_number"
+            ),
+        ),
+    ]
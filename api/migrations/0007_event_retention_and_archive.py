@@ -0,0 +1,69 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:05
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_event_created_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                ("event_count", models.IntegerField(default=0)),
+                ("events", models.JSONField(default=list)),
+            ],
+            options={
+                "ordering": ["day", "id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="team",
+            name="event_retention_days",
+            field=models.PositiveIntegerField(
+                blank=True,
+                null=True,
+                validators=[django.core.validators.MinValueValidator(1)],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(
+                fields=["team", "-created", "-id"], name="event_team_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["created", "id"], name="event_created_idx"),
+        ),
+        migrations.AddField(
+            model_name="eventarchive",
+            name="team",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="event_archive",
+                to="api.team",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="eventarchive",
+            index=models.Index(
+                fields=["team", "day"], name="event_archive_team_day_idx"
+            ),
+        ),
+    ]
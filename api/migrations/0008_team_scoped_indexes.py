@@ -0,0 +1,53 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_event_retention_and_archive"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="member",
+            index=models.Index(
+                fields=["team", "created"], name="member_team_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pinnedticket",
+            index=models.Index(
+                fields=["team", "member", "pinned"], name="pinned_team_member_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["team", "status", "id"], name="ticket_team_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["team", "created", "id"], name="ticket_team_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("deactivated", None)),
+                fields=["team", "assigned_user"],
+                name="ticket_active_assigned_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("deactivated", None)),
+                fields=["team", "id"],
+                name="ticket_active_idx",
+            ),
+        ),
+    ]
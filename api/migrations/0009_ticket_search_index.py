@@ -0,0 +1,71 @@
+from django.db import migrations
+
+"""
+creates the full-text search table of tickets and indexes the existing
+tickets. The statements are those of api.ticket_search at the time of this
+migration, written out so that later changes to the search backends leave
+it alone. Databases other than PostgreSQL and SQLite have no search table
+"""
+
+# (ticket id, team id, title, tags, status, description) of every ticket,
+# with the aggregate of its tag titles in {aggregate}
+DOCUMENT_SQL = (
+    "SELECT t.id, t.team_id, t.title, {aggregate}, s.title, t.description "
+    "FROM api_ticket t "
+    "LEFT JOIN api_ticketstatus s ON s.id = t.status_id "
+    "LEFT JOIN api_tickettag tt ON tt.ticket_id = t.id "
+    "LEFT JOIN api_tag g ON g.id = tt.tag_id "
+    "GROUP BY t.id, t.team_id, t.title, s.title, t.description"
+)
+
+INSTALL_SQL = {
+    "postgresql": [
+        "CREATE TABLE api_ticket_search ("
+        "ticket_id bigint PRIMARY KEY REFERENCES api_ticket (id) "
+        "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+        "team_id bigint NOT NULL, "
+        "document tsvector NOT NULL)",
+        "CREATE INDEX api_ticket_search_document ON api_ticket_search "
+        "USING gin (document)",
+        "CREATE INDEX api_ticket_search_team ON api_ticket_search (team_id)",
+        "INSERT INTO api_ticket_search (ticket_id, team_id, document) "
+        "SELECT id, team_id, "
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(tags, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(status, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'C') "
+        "FROM ("
+        + DOCUMENT_SQL.format(aggregate="string_agg(g.title, ' ')")
+        + ") AS ticket (id, team_id, title, tags, status, description)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE api_ticket_search USING fts5("
+        "team_id UNINDEXED, title, tags, status, description)",
+        "INSERT INTO api_ticket_search "
+        "(rowid, team_id, title, tags, status, description) "
+        + DOCUMENT_SQL.format(aggregate="group_concat(g.title, ' ')"),
+    ],
+}
+
+UNINSTALL_SQL = "DROP TABLE IF EXISTS api_ticket_search"
+
+
+def install_search_index(apps, schema_editor):
+    for statement in INSTALL_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+def uninstall_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in INSTALL_SQL:
+        schema_editor.execute(UNINSTALL_SQL, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_team_scoped_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
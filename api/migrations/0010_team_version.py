@@ -0,0 +1,18 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_ticket_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="team",
+            name="version",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
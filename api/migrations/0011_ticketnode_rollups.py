@@ -0,0 +1,33 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_team_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticketnode",
+            name="descendant_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="ticketnode",
+            name="nearest_due_date",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="ticketnode",
+            name="open_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="ticketnode",
+            name="status_counts",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
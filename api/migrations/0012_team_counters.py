@@ -0,0 +1,105 @@
+# Generated by Django 4.0.6 on 2026-10-18 10:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_tickets(apps, schema_editor):
+    """
+    counts the existing tickets of every team, with a grouped query per kind
+    of counter
+    """
+    Ticket = apps.get_model("api", "Ticket")
+    TicketTag = apps.get_model("api", "TicketTag")
+    TeamCounter = apps.get_model("api", "TeamCounter")
+
+    tickets = Ticket.objects.order_by()
+    ticket_tags = TicketTag.objects.order_by()
+    counters = []
+    for kind, field, rows, deactivated in [
+        ("status", "status", tickets, "deactivated"),
+        ("assignee", "assigned_user", tickets, "deactivated"),
+        ("tag", "tag", ticket_tags, "ticket__deactivated"),
+    ]:
+        for team_id, key, count, open in rows.values_list("team_id", field).annotate(
+            count=models.Count("pk"),
+            open=models.Count("pk", filter=models.Q(**{deactivated: None})),
+        ):
+            key = key if key is None else str(key)
+            counters.append(
+                TeamCounter(team_id=team_id, kind=kind, key=key, count=count, open=open)
+            )
+    TeamCounter.objects.bulk_create(counters, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0011_ticketnode_rollups"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TeamCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("status", "status"),
+                            ("assignee", "assignee"),
+                            ("tag", "tag"),
+                        ],
+                        max_length=8,
+                    ),
+                ),
+                ("key", models.CharField(blank=True, max_length=256, null=True)),
+                ("count", models.IntegerField(default=0)),
+                ("open", models.IntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["kind", "key"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                condition=models.Q(("deactivated", None)),
+                fields=["team", "due_date"],
+                name="ticket_open_due_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="teamcounter",
+            name="team",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="counters",
+                to="api.team",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="teamcounter",
+            constraint=models.UniqueConstraint(
+                fields=("team", "kind", "key"), name="unique_team_counter"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="teamcounter",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("key", None)),
+                fields=("team", "kind"),
+                name="unique_team_counter_without_key",
+            ),
+        ),
+        migrations.RunPython(count_tickets, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,13 @@
 from .member import Member
 from .team import Team
-from .ticket import Ticket
+from .ticket import Ticket, tickets_bulk_saved
 from .ticket_comment import TicketComment
 from .ticket_status import TicketStatus
-from .ticket_tag import Tag, TicketTag
-from .ticket_node import TicketNode
+from .ticket_tag import Tag, TicketTag, ticket_tags_changed
+from .ticket_node import InvalidMove, TicketNode
 from .interfaces.has_uuid import HasUuid
 from .event import Event
+from .event_archive import EventArchive
 from .pinned_ticket import PinnedTicket
 from .team_invite import TeamInvite
+from .team_counter import TeamCounter
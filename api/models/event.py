@@ -1,4 +1,7 @@
+from datetime import timedelta
+
 from django.db import models
+from django.utils import timezone
 from .team import Team
 from django.conf import settings
 import uuid
@@ -11,7 +14,19 @@ class Event(models.Model):
 
     events = [(CREATE, "Create"), (UPDATE, "Update"), (DELETE, "Delete")]
 
-    created = models.DateTimeField(auto_now_add=True)
+    # the values kept for an event once it is moved to the EventArchive
+    ARCHIVE_FIELDS = [
+        "id",
+        "team_id",
+        "created",
+        "event_type",
+        "user_id",
+        "object",
+        "description",
+    ]
+
+    # set when the event is recorded, not when a buffered insert is flushed
+    created = models.DateTimeField(default=timezone.now, editable=False)
     event_type = models.SmallIntegerField(choices=events)
     description = models.TextField(null=True, blank=True)
     user = models.ForeignKey(
@@ -25,6 +40,45 @@ class Event(models.Model):
     class Meta:
         ordering = ["-created"]
         app_label = "api"
+        indexes = [
+            # team event lists, newest first, with id as the cursor tiebreak
+            models.Index(
+                fields=["team", "-created", "-id"], name="event_team_created_idx"
+            ),
+            # finding the events past retention across all teams
+            models.Index(fields=["created", "id"], name="event_created_idx"),
+        ]
+
+    @classmethod
+    def expired(cls, default_days, now=None):
+        """
+        Events older than their team's event_retention_days, or default_days
+        for teams without one. A default of None keeps those teams' events
+        """
+        now = now or timezone.now()
+        lookup = models.Q()
+
+        if default_days is not None:
+            lookup |= models.Q(
+                team__event_retention_days=None,
+                created__lt=now - timedelta(days=default_days),
+            )
+
+        custom_days = (
+            Team.objects.exclude(event_retention_days=None)
+            .values_list("event_retention_days", flat=True)
+            .order_by()
+            .distinct()
+        )
+        for days in custom_days:
+            lookup |= models.Q(
+                team__event_retention_days=days,
+                created__lt=now - timedelta(days=days),
+            )
+
+        if not lookup:
+            return cls.objects.none()
+        return cls.objects.filter(lookup)
 
     def is_create(self):
         return self.CREATE == self.event_type
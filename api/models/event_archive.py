@@ -0,0 +1,69 @@
+from django.db import models
+from .team import Team
+
+
+class EventArchive(models.Model):
+    """
+    Events past their team's retention, compacted into rows of the events of
+    a team and day moved by one archiving chunk, so archiving more events of
+    a day adds a row instead of rewriting the day. Each archived event is a
+    list of [created, event_type, user_id, object, description]
+    """
+
+    team = models.ForeignKey(
+        Team, on_delete=models.CASCADE, related_name="event_archive"
+    )
+    day = models.DateField()
+    event_count = models.IntegerField(default=0)
+    events = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ["day", "id"]
+        app_label = "api"
+        indexes = [
+            models.Index(fields=["team", "day"], name="event_archive_team_day_idx")
+        ]
+
+    def __str__(self):
+        return f"EventArchive: {self.day}, {self.event_count} events for Team: {self.team_id}"
+
+    @staticmethod
+    def compact(event) -> list:
+        return [
+            event["created"].isoformat(),
+            event["event_type"],
+            event["user_id"],
+            str(event["object"]),
+            event["description"],
+        ]
+
+    @classmethod
+    def append(cls, events) -> int:
+        """
+        Archives event values (as returned by Event.ARCHIVE_FIELDS) as a new
+        row per team and day, returning the number of rows written. Rows
+        already archived are left untouched
+        """
+        buckets = {}
+        for event in events:
+            key = (event["team_id"], event["created"].date())
+            buckets.setdefault(key, []).append(cls.compact(event))
+
+        cls.objects.bulk_create(
+            cls(team_id=team_id, day=day, event_count=len(compacted), events=compacted)
+            for (team_id, day), compacted in buckets.items()
+        )
+        return len(buckets)
+
+    @classmethod
+    def events_of(cls, team_id, day) -> list:
+        """
+        The archived events of a team and day, in the order they were
+        archived
+        """
+        events = []
+        for chunk in cls.objects.filter(team_id=team_id, day=day).values_list(
+            "events", flat=True
+        ):
+            events.extend(chunk)
+        return events
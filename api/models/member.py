@@ -1,9 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
 from hashlib import md5
 from ..methods import hash_team_id
+from ..membership_cache import membership_cache
 
 from api.models.interfaces import HasUuid
 from .team import Team
@@ -58,6 +61,10 @@ class Member(HasUuid):
         ordering = ["created"]
         app_label = "api"
         unique_together = [["owner", "team"]]
+        indexes = [
+            # the member list of a team, ordered by created
+            models.Index(fields=["team", "created"], name="member_team_created_idx")
+        ]
 
     def __str__(self):
         return f"Member: {self.owner.username} for Team: {self.team.name}"
@@ -73,3 +80,13 @@ class Member(HasUuid):
             self._pre_create()
 
         super(Member, self).save(*args, **kwargs)
+
+
+@receiver(post_save, sender=Member)
+@receiver(post_delete, sender=Member)
+def invalidate_membership(sender, instance: Member, **kwargs):
+    team_id, owner_id = instance.team_id, instance.owner_id
+    membership_cache.invalidate(team_id, owner_id)
+
+    # a concurrent request may cache the old record before this commits
+    transaction.on_commit(lambda: membership_cache.invalidate(team_id, owner_id))
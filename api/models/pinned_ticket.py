@@ -23,6 +23,12 @@ class PinnedTicket(HasUuid):
         ordering = ["pinned"]
         app_label = "api"
         unique_together = [["ticket", "member"]]
+        indexes = [
+            # a member's pins, as listed by PinnedTicketViewSet
+            models.Index(
+                fields=["team", "member", "pinned"], name="pinned_team_member_idx"
+            )
+        ]
 
     def _pre_create(self):
         member = self.member
@@ -1,6 +1,19 @@
-from django.db import models
+import threading
+from contextlib import contextmanager
+
+from django.core.validators import MinValueValidator
+from django.db import models, transaction
 from api.models.interfaces import HasUuid
 
+# the ids of the teams this thread is deleting, see Team.deleting
+_deleting = threading.local()
+
+
+class TeamQuerySet(models.QuerySet):
+    def delete(self):
+        with Team.deleting(*self.values_list("pk", flat=True)):
+            return super().delete()
+
 
 class Team(HasUuid):
     # id is implicitly defined by django
@@ -9,6 +22,15 @@ class Team(HasUuid):
     created = models.DateTimeField(auto_now_add=True)
     activated = models.DateTimeField(null=True, blank=True)
     deactivated = models.DateTimeField(null=True, blank=True)
+    # days to keep events for before they are archived, None for the default
+    event_retention_days = models.PositiveIntegerField(
+        null=True, blank=True, validators=[MinValueValidator(1)]
+    )
+    # bumped by every write to the team's tickets, tags, statuses, members
+    # and pins, see api/team_version.py. Only ever changed in the database
+    version = models.PositiveBigIntegerField(default=0, editable=False)
+
+    objects = TeamQuerySet.as_manager()
 
     class Meta:
         ordering = ["created"]
@@ -16,3 +38,76 @@ class Team(HasUuid):
 
     def __str__(self):
         return f"Team: {self.id}, {self.name}"
+
+    # only ever changed in the database, by atomic increments
+    DATABASE_FIELDS = ("ticket_head", "version")
+
+    def save(self, *args, **kwargs):
+        # a stale in memory ticket head or version must not overwrite a
+        # concurrent reservation or bump
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DATABASE_FIELDS
+            ]
+        return super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with self.deleting(self.pk):
+            return super().delete(*args, **kwargs)
+
+    @staticmethod
+    @contextmanager
+    def deleting(*team_ids):
+        """
+        Marks the given teams as being deleted while their rows and those
+        cascading from them are. The receivers keeping a team's counters and
+        version current skip the cascaded rows of a team being deleted, as
+        they go with it
+        """
+        deleting = getattr(_deleting, "team_ids", None)
+        if deleting is None:
+            deleting = _deleting.team_ids = set()
+        marked = set(team_ids) - deleting
+        deleting.update(marked)
+        try:
+            yield
+        finally:
+            deleting.difference_update(marked)
+
+    @staticmethod
+    def is_deleting(team_id) -> bool:
+        return team_id in getattr(_deleting, "team_ids", ())
+
+    @classmethod
+    def bump_version(cls, *team_ids):
+        """
+        Increments the version of the given teams. Called within the
+        transaction making the change, so the new version is only visible
+        together with the change
+        """
+        team_ids = {team_id for team_id in team_ids if team_id is not None}
+        if team_ids:
+            cls.objects.filter(pk__in=team_ids).update(version=models.F("version") + 1)
+
+    @classmethod
+    def reserve_ticket_numbers(cls, team_id, count: int = 1) -> range:
+        """
+        Atomically reserves the next count ticket numbers of a team. The
+        increment happens in the database, so concurrent writers never
+        receive the same number. New tickets change the team, so its version
+        is bumped by the same statement
+        """
+        with transaction.atomic(savepoint=False):
+            cls.objects.filter(pk=team_id).update(
+                ticket_head=models.F("ticket_head") + count,
+                version=models.F("version") + 1,
+            )
+            head = (
+                cls.objects.filter(pk=team_id)
+                .values_list("ticket_head", flat=True)
+                .get()
+            )
+
+        return range(head - count + 1, head + 1)
@@ -0,0 +1,135 @@
+from collections import defaultdict
+
+from django.db import models
+from django.db.models import Case, F, Q, Value, When
+
+from .team import Team
+
+
+class TeamCounter(models.Model):
+    """
+    The number of tickets of a team, and how many of them are open, per
+    status, per assignee and per tag, kept current by every write to its
+    tickets. key is the id of the status, member or tag, None counting the
+    tickets without a status or an assignee. Keys are stored as text, as
+    members are keyed by text ids
+    """
+
+    STATUS = "status"
+    ASSIGNEE = "assignee"
+    TAG = "tag"
+    KINDS = [(STATUS, "status"), (ASSIGNEE, "assignee"), (TAG, "tag")]
+    # the types of the ids the keys of each kind are read back as
+    KEY_TYPES = {STATUS: int, ASSIGNEE: str, TAG: int}
+
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name="counters")
+    kind = models.CharField(max_length=8, choices=KINDS)
+    key = models.CharField(max_length=256, null=True, blank=True)
+    count = models.IntegerField(default=0)
+    open = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ["kind", "key"]
+        app_label = "api"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["team", "kind", "key"], name="unique_team_counter"
+            ),
+            models.UniqueConstraint(
+                fields=["team", "kind"],
+                condition=Q(key=None),
+                name="unique_team_counter_without_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"TeamCounter: {self.kind} {self.key} for Team: {self.team_id}"
+
+    @classmethod
+    def of_ticket(cls, status_id, assigned_user_id, tag_ids=()) -> list:
+        """
+        The (kind, key) of the counters a ticket is counted in
+        """
+        counters = [(cls.STATUS, status_id), (cls.ASSIGNEE, assigned_user_id)]
+        return counters + [(cls.TAG, tag_id) for tag_id in tag_ids]
+
+    @staticmethod
+    def tally(deltas: dict, team_id, counters, is_open: bool, sign: int = 1):
+        """
+        Counts a ticket in counters, a list of (kind, key), by adding it to
+        deltas, {(team id, kind, key): [count, open]}, or takes it away with
+        sign=-1
+        """
+        for kind, key in counters:
+            key = key if key is None else str(key)
+            delta = deltas.setdefault((team_id, kind, key), [0, 0])
+            delta[0] += sign
+            delta[1] += sign if is_open else 0
+
+    @classmethod
+    def apply(cls, deltas: dict):
+        """
+        Adds deltas, {(team id, kind, key): (count, open)}, to the counters
+        with one UPDATE of F expressions per team. Counters which do not
+        exist yet are created, and updated by a second UPDATE
+        """
+        by_team = defaultdict(dict)
+        for (team_id, kind, key), (count, open) in deltas.items():
+            if count or open:
+                by_team[team_id][(kind, key)] = (count, open)
+
+        for team_id, team_deltas in by_team.items():
+            counters = cls.objects.filter(team_id=team_id)
+            if cls.add(counters, team_deltas) < len(team_deltas):
+                existing = set(
+                    counters.filter(cls.matching(team_deltas)).values_list(
+                        "kind", "key"
+                    )
+                )
+                missing = {
+                    counter: delta
+                    for counter, delta in team_deltas.items()
+                    if counter not in existing
+                }
+                # a concurrent writer may create them in between
+                cls.objects.bulk_create(
+                    [cls(team_id=team_id, kind=k, key=key) for k, key in missing],
+                    ignore_conflicts=True,
+                )
+                cls.add(counters, missing)
+
+    @staticmethod
+    def matching(deltas) -> Q:
+        lookup = Q()
+        for kind, key in deltas:
+            lookup |= Q(kind=kind, key=key)
+        return lookup
+
+    @classmethod
+    def add(cls, counters, deltas) -> int:
+        def delta(index):
+            return Case(
+                *(
+                    When(Q(kind=kind, key=key), then=Value(values[index]))
+                    for (kind, key), values in deltas.items()
+                ),
+                default=Value(0),
+            )
+
+        return counters.filter(cls.matching(deltas)).update(
+            count=F("count") + delta(0), open=F("open") + delta(1)
+        )
+
+    @classmethod
+    def read(cls, team_id) -> dict:
+        """
+        {kind: {key: (count, open)}} of a team, in one query
+        """
+        counters = {kind: {} for kind, _ in cls.KINDS}
+        for kind, key, count, open in cls.objects.filter(team_id=team_id).values_list(
+            "kind", "key", "count", "open"
+        ):
+            if key is not None:
+                key = cls.KEY_TYPES[kind](key)
+            counters[kind][key] = (count, open)
+        return counters
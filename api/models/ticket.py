@@ -1,13 +1,25 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.dispatch import Signal
 
 from .member import Member
 from .team import Team
 from .ticket_status import TicketStatus
 from api.models.interfaces import HasUuid
 
+# sent with the arguments tickets and created by bulk inserts and updates of
+# tickets, which do not send post_save. See Ticket.bulk_saved
+tickets_bulk_saved = Signal()
+
 
 class Ticket(HasUuid):
+    # the fields the subtree rollups of a ticket's ancestors are counted from
+    ROLLUP_FIELDS = ("status_id", "due_date", "deactivated")
+    # the fields the team counters are counted from
+    COUNTED_FIELDS = ("status_id", "assigned_user_id", "deactivated")
+    # fields remembered as loaded or saved, to tell which saves change them
+    TRACKED_FIELDS = ("status_id", "assigned_user_id", "due_date", "deactivated")
+
     ticket_number = models.IntegerField()
 
     assigned_user = models.ForeignKey(
@@ -42,6 +54,78 @@ class Ticket(HasUuid):
     class Meta:
         ordering = ["id"]
         app_label = "api"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["team", "ticket_number"], name="unique_team_ticket_number"
+            )
+        ]
+        # tickets are always read within a team, so every index leads with it
+        indexes = [
+            # the status filter of the ticket list
+            models.Index(
+                fields=["team", "status", "id"], name="ticket_team_status_idx"
+            ),
+            # ordering the ticket list by creation, and the created cursor
+            models.Index(
+                fields=["team", "created", "id"], name="ticket_team_created_idx"
+            ),
+            # retrieve_by_user, which only reads active tickets
+            models.Index(
+                fields=["team", "assigned_user"],
+                condition=models.Q(deactivated=None),
+                name="ticket_active_assigned_idx",
+            ),
+            # active tickets of a team in id order
+            models.Index(
+                fields=["team", "id"],
+                condition=models.Q(deactivated=None),
+                name="ticket_active_idx",
+            ),
+            # the overdue tickets the team stats count besides the counters
+            models.Index(
+                fields=["team", "due_date"],
+                condition=models.Q(deactivated=None),
+                name="ticket_open_due_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        ticket = super().from_db(db, field_names, values)
+        ticket.saved_fields = ticket.loaded_fields()
+        return ticket
+
+    def loaded_fields(self) -> dict:
+        # deferred fields are left out rather than loaded
+        return {
+            field: self.__dict__[field]
+            for field in self.TRACKED_FIELDS
+            if field in self.__dict__
+        }
+
+    def saved_values(self, fields) -> tuple:
+        """
+        The values of fields as last loaded or saved, read from the database
+        when that is not known
+        """
+        saved = getattr(self, "saved_fields", {})
+        if all(field in saved for field in fields):
+            return tuple(saved[field] for field in fields)
+        return Ticket.objects.filter(pk=self.pk).values_list(*fields).get()
+
+    def saved_changes(self, fields):
+        """
+        (values as last loaded or saved, current values) of fields when one
+        of them changed since, None when none did or that is not known
+        """
+        saved = getattr(self, "saved_fields", None)
+        if saved is None or all(
+            getattr(self, field) == saved[field] for field in fields if field in saved
+        ):
+            return None
+        # fields which were deferred have not changed since
+        before = tuple(saved.get(field, getattr(self, field)) for field in fields)
+        return before, tuple(getattr(self, field) for field in fields)
 
     @classmethod
     def retrieve_by_user(cls, user: settings.AUTH_USER_MODEL, team: Team):
@@ -51,18 +135,76 @@ class Ticket(HasUuid):
             models.Q(assigned_user=user),
         )
 
+    @classmethod
+    def bulk_create_numbered(cls, team: Team, tickets: list) -> list:
+        """
+        Inserts tickets for a team with a single reservation of ticket numbers
+        and a single bulk insert, returning the tickets with primary keys set
+        """
+        if not tickets:
+            return []
+
+        with transaction.atomic():
+            numbers = Team.reserve_ticket_numbers(team.id, len(tickets))
+            for ticket, number in zip(tickets, numbers):
+                ticket.team = team
+                ticket.ticket_number = number
+
+            tickets = cls.objects.bulk_create(tickets)
+
+            # not every backend returns primary keys from a bulk insert
+            if tickets[0].pk is None:
+                ids = dict(
+                    cls.objects.filter(
+                        object_uuid__in=[ticket.object_uuid for ticket in tickets]
+                    ).values_list("object_uuid", "id")
+                )
+                for ticket in tickets:
+                    ticket.pk = ids[ticket.object_uuid]
+
+            cls.bulk_saved(tickets, created=True)
+
+        team.ticket_head = numbers[-1]
+        return tickets
+
+    @classmethod
+    def bulk_saved(cls, tickets: list, created: bool = False):
+        """
+        Sends tickets_bulk_saved for tickets written by bulk queries, whose
+        receivers still see the fields the tickets were loaded with
+        """
+        tickets_bulk_saved.send(sender=cls, tickets=tickets, created=created)
+        for ticket in tickets:
+            ticket.saved_fields = ticket.loaded_fields()
+
     def __str__(self):
         return f"Ticket: {self.title} for Team: {self.team.name}"
 
     def _pre_create(self):
         team = self.team
 
-        team.ticket_head += 1
-        team.save()
-        self.ticket_number = team.ticket_head
+        (self.ticket_number,) = Team.reserve_ticket_numbers(team.id)
+        team.ticket_head = self.ticket_number
+
+    def delete(self, *args, **kwargs):
+        # a missing node raises RelatedObjectDoesNotExist, an AttributeError
+        node = getattr(self, "ticket_node", None)
+        if node is None:
+            return super().delete(*args, **kwargs)
+
+        # the children of the ticket move up to its parent
+        with transaction.atomic():
+            node.detach()
+            return super().delete(*args, **kwargs)
 
     def save(self, *args, **kwargs):
-        if self._state.adding:
-            self._pre_create()
+        if not self._state.adding:
+            super(Ticket, self).save(*args, **kwargs)
+        else:
+            # a failed insert releases its ticket number instead of leaving a gap
+            with transaction.atomic():
+                self._pre_create()
+                super(Ticket, self).save(*args, **kwargs)
 
-        super(Ticket, self).save(*args, **kwargs)
+        # post_save receivers have seen the fields as they were loaded
+        self.saved_fields = self.loaded_fields()
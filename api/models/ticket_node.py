@@ -1,14 +1,259 @@
-from django.db import models
+from collections import Counter
 
+from django.db import models, transaction
+
+from .team import Team
 from .ticket import Ticket
 from treebeard import mp_tree
 
 
-# this file experiments with the treebeard library
+def earliest(*dates):
+    dates = [date for date in dates if date is not None]
+    return min(dates) if dates else None
+
+
+class Rollup:
+    """
+    Totals over a set of tickets: how many there are, how many are open, how
+    many have each status and the nearest due date of the open ones
+    """
+
+    def __init__(self, count=0, open=0, statuses=None, due=None):
+        self.count = count
+        self.open = open
+        self.statuses = Counter(statuses or {})
+        self.due = due
+
+    @classmethod
+    def of_state(cls, status_id, due_date, deactivated):
+        is_open = deactivated is None
+        return cls(
+            count=1,
+            open=int(is_open),
+            statuses={str(status_id): 1} if status_id is not None else {},
+            due=due_date if is_open else None,
+        )
+
+    @classmethod
+    def of_ticket(cls, ticket: Ticket):
+        return cls.of_state(*ticket.saved_values(Ticket.ROLLUP_FIELDS))
+
+    def __add__(self, other):
+        return Rollup(
+            self.count + other.count,
+            self.open + other.open,
+            self.statuses + other.statuses,
+            earliest(self.due, other.due),
+        )
+
+
+class InvalidMove(ValueError):
+    """
+    A move of a batch which would break the hierarchy, index being its place
+    in the batch
+    """
+
+    def __init__(self, index: int, message: str):
+        super().__init__(message)
+        self.index = index
+
+
 class TicketNode(mp_tree.MP_Node):
+    """
+    The place of a ticket in the parent / child hierarchy of its team, as a
+    materialized path: the path of a node starts with the path of each of
+    its ancestors, steplen characters per level. Only tickets with a parent
+    or children have a node, every tree lying within a single team.
+
+    Each node also holds the rollup of its descendants, kept current along
+    the ancestor path as tickets move, change or go away
+    """
+
+    ROLLUP_FIELDS = [
+        "descendant_count",
+        "open_count",
+        "status_counts",
+        "nearest_due_date",
+    ]
+
     ticket = models.OneToOneField(
         Ticket, on_delete=models.CASCADE, related_name="ticket_node"
     )
 
+    descendant_count = models.PositiveIntegerField(default=0)
+    # descendants which are not deactivated
+    open_count = models.PositiveIntegerField(default=0)
+    # descendants per status id, statuses without any left out
+    status_counts = models.JSONField(default=dict, blank=True)
+    # the earliest due date of the open descendants
+    nearest_due_date = models.DateTimeField(null=True, blank=True)
+
     def __unicode__(self):
         return "Ticket :%s " % self.ticket.title
+
+    @classmethod
+    def parent_path(cls, path: str) -> str:
+        return path[: -cls.steplen]
+
+    @classmethod
+    def ancestor_paths(cls, path: str) -> list:
+        return [path[:end] for end in range(cls.steplen, len(path), cls.steplen)]
+
+    @property
+    def closed_count(self) -> int:
+        return self.descendant_count - self.open_count
+
+    @property
+    def rollup(self) -> Rollup:
+        return Rollup(
+            self.descendant_count,
+            self.open_count,
+            self.status_counts,
+            self.nearest_due_date,
+        )
+
+    @rollup.setter
+    def rollup(self, rollup: Rollup):
+        self.descendant_count = rollup.count
+        self.open_count = rollup.open
+        self.status_counts = {
+            status: count for status, count in rollup.statuses.items() if count > 0
+        }
+        self.nearest_due_date = rollup.due
+
+    @classmethod
+    def of(cls, ticket: Ticket):
+        return cls.objects.filter(ticket=ticket).first()
+
+    @classmethod
+    def is_below(cls, ticket: Ticket, ancestor: Ticket) -> bool:
+        """
+        Whether ticket is ancestor itself or one of its descendants
+        """
+        if ticket.pk == ancestor.pk:
+            return True
+        paths = dict(
+            cls.objects.filter(ticket__in=[ticket, ancestor]).values_list(
+                "ticket_id", "path"
+            )
+        )
+        return ancestor.pk in paths and paths.get(ticket.pk, "").startswith(
+            paths[ancestor.pk]
+        )
+
+    @classmethod
+    def set_parent(cls, ticket: Ticket, parent: Ticket = None):
+        """
+        Makes parent the parent of ticket, moving the subtree below ticket
+        along, or makes ticket a root when parent is None. Raises ValueError
+        when parent is the ticket itself or one of its descendants
+        """
+        if parent is not None and parent.pk == ticket.pk:
+            raise ValueError("a ticket cannot be its own parent")
+        if parent is not None and parent.team_id != ticket.team_id:
+            raise ValueError("the parent must belong to the same team")
+
+        with transaction.atomic():
+            node = cls.of(ticket)
+            if parent is None:
+                if node is not None and node.depth > 1:
+                    moved = Rollup.of_ticket(ticket) + node.rollup
+                    ancestors = cls.ancestor_paths(node.path)
+                    node.move(cls.get_last_root_node(), "last-sibling")
+                    cls.update_rollups(ancestors, removed=moved)
+                    Team.bump_version(ticket.team_id)
+                return
+
+            # the parent's row serializes concurrent additions of children
+            parent_node = cls.objects.select_for_update().filter(ticket=parent).first()
+            if parent_node is None:
+                parent_node = cls.add_root(ticket=parent)
+
+            ancestors = [*cls.ancestor_paths(parent_node.path), parent_node.path]
+            if node is None:
+                parent_node.add_child(ticket=ticket)
+                cls.update_rollups(ancestors, added=Rollup.of_ticket(ticket))
+            elif parent_node.path.startswith(node.path):
+                raise ValueError("a ticket cannot be moved below its descendants")
+            elif cls.parent_path(node.path) != parent_node.path:
+                moved = Rollup.of_ticket(ticket) + node.rollup
+                previous = cls.ancestor_paths(node.path)
+                node.move(parent_node, "last-child")
+                # ancestors the subtree stays below keep their totals
+                cls.update_rollups(set(previous) - set(ancestors), removed=moved)
+                cls.update_rollups(set(ancestors) - set(previous), added=moved)
+            else:
+                return
+            Team.bump_version(ticket.team_id)
+
+    @classmethod
+    def set_parents(cls, moves):
+        """
+        Applies set_parent to each (ticket, parent) of moves in order, in one
+        transaction, each move validated against the hierarchy the previous
+        ones left. Every move rewrites the paths of the subtree it moves in
+        one UPDATE, whatever its size. Raises InvalidMove, applying none of
+        the moves, when one is refused
+        """
+        with transaction.atomic():
+            for index, (ticket, parent) in enumerate(moves):
+                try:
+                    cls.set_parent(ticket, parent)
+                except ValueError as error:
+                    raise InvalidMove(index, str(error)) from error
+
+    @classmethod
+    def update_rollups(cls, paths, added: Rollup = None, removed: Rollup = None):
+        """
+        Adds the totals of added to, and takes those of removed from, the
+        rollups of the nodes at paths. Nearest due dates which removed may
+        have set are read again from the descendants, so the tickets must
+        be saved and the hierarchy in place beforehand
+        """
+        if not paths:
+            return
+
+        nodes = list(
+            cls.objects.select_for_update().filter(path__in=paths).order_by("path")
+        )
+        stale = []
+        for node in nodes:
+            rollup = node.rollup
+            if removed is not None:
+                rollup.count -= removed.count
+                rollup.open -= removed.open
+                rollup.statuses.subtract(removed.statuses)
+                if removed.due is not None and rollup.due is not None:
+                    if removed.due <= rollup.due:
+                        stale.append(node)
+            if added is not None:
+                rollup += added
+            node.rollup = rollup
+
+        for node in stale:
+            node.nearest_due_date = node.descendants_due_date()
+        cls.objects.bulk_update(nodes, cls.ROLLUP_FIELDS)
+
+    def descendants_due_date(self):
+        return Ticket.objects.filter(
+            ticket_node__path__startswith=self.path,
+            ticket_node__depth__gt=self.depth,
+            deactivated=None,
+        ).aggregate(due=models.Min("due_date"))["due"]
+
+    def detach(self):
+        """
+        Removes the node of a ticket about to be deleted, its children moving
+        up to its parent, or becoming roots
+        """
+        with transaction.atomic():
+            parent = self.get_parent()
+            ancestors = type(self).ancestor_paths(self.path)
+            for child in self.get_children():
+                if parent is None:
+                    child.move(type(self).get_last_root_node(), "last-sibling")
+                else:
+                    child.move(parent, "last-child")
+            type(self).objects.filter(pk=self.pk).delete()
+            # the children stay below the ancestors, only the ticket leaves
+            type(self).update_rollups(ancestors, removed=Rollup.of_ticket(self.ticket))
@@ -1,7 +1,9 @@
 # this here defines the ticket_tags
 from django.db import models
+from django.dispatch import Signal
 import uuid
 from .team import Team
+from .team_counter import TeamCounter
 from .ticket import Ticket
 from .tag import Tag
 from api.models.interfaces import HasUuid
@@ -9,6 +11,11 @@ from hashlib import md5
 import re
 
 
+# sent whenever tags are linked to or unlinked from a ticket, with the
+# arguments ticket, added (Tag instances) and removed (Tag ids)
+ticket_tags_changed = Signal()
+
+
 class TicketTag(HasUuid):
     id = models.CharField(max_length=256, unique=True, editable=False, primary_key=True)
     tag = models.ForeignKey(Tag, on_delete=models.CASCADE)
@@ -34,28 +41,90 @@ class TicketTag(HasUuid):
         if not tag_list:
             return
 
-        for tag in tag_list:
-            cls.objects.create(tag=tag, ticket=ticket, team=ticket.team)
+        cls.bulk_create_all([(ticket, tag_list)])
 
     @classmethod
-    def delete_difference(cls, tag_list: list, ticket_instance: Ticket):
-        if tag_list:
-            filters = models.Q(tag=tag_list[0])
-            for tag in tag_list[1:]:
-                filters |= models.Q(tag=tag)
-
-            # select all that are not in the tag list
-            to_be_deleted = cls.objects.filter(ticket=ticket_instance).exclude(filters)
+    def bulk_create_all(cls, tag_lists: list):
+        """
+        Inserts the tags of many tickets at once, given (ticket, tag_list) pairs
+        """
+        tag_lists = [
+            (ticket, list(dict.fromkeys(tag_list)))
+            for ticket, tag_list in tag_lists
+            if tag_list
+        ]
 
+        ticket_tags = []
+        for ticket, tag_list in tag_lists:
             for tag in tag_list:
-                cls.objects.get_or_create(
-                    ticket=ticket_instance, tag=tag, team=ticket_instance.team
-                )
-        else:
-            to_be_deleted = cls.objects.filter(ticket=ticket_instance)
-
-        for ticket_tag in to_be_deleted:
-            ticket_tag.delete()
+                ticket_tag = cls(tag=tag, ticket=ticket, team=ticket.team)
+                ticket_tag._pre_create()
+                ticket_tags.append(ticket_tag)
+
+        ticket_tags = cls.objects.bulk_create(ticket_tags)
+        deltas = {}
+        for ticket, tag_list in tag_lists:
+            cls.count_tags(deltas, ticket, [tag.id for tag in tag_list])
+        TeamCounter.apply(deltas)
+        Team.bump_version(*{ticket.team_id for ticket, _ in tag_lists})
+
+        for ticket, tag_list in tag_lists:
+            ticket_tags_changed.send(
+                sender=cls, ticket=ticket, added=tag_list, removed=[]
+            )
+
+        return ticket_tags
+
+    @classmethod
+    def delete_difference(cls, tag_list: list, ticket_instance: Ticket) -> tuple:
+        """
+        Makes tag_list the tags of the ticket with one read of the current
+        tags, one bulk insert and one bulk delete. Returns the added Tag
+        instances and the removed tag ids
+        """
+        wanted = {tag.id: tag for tag in tag_list or []}
+        current = set(
+            cls.objects.filter(ticket=ticket_instance).values_list("tag_id", flat=True)
+        )
+
+        added = [tag for tag_id, tag in wanted.items() if tag_id not in current]
+        removed = sorted(current.difference(wanted))
+
+        if added:
+            ticket_tags = [
+                cls(tag=tag, ticket=ticket_instance, team=ticket_instance.team)
+                for tag in added
+            ]
+            for ticket_tag in ticket_tags:
+                ticket_tag._pre_create()
+            cls.objects.bulk_create(ticket_tags)
+
+        if removed:
+            cls.objects.filter(ticket=ticket_instance, tag_id__in=removed).delete()
+
+        if added or removed:
+            deltas = {}
+            cls.count_tags(deltas, ticket_instance, [tag.id for tag in added])
+            cls.count_tags(deltas, ticket_instance, removed, sign=-1)
+            TeamCounter.apply(deltas)
+            Team.bump_version(ticket_instance.team_id)
+            ticket_tags_changed.send(
+                sender=cls, ticket=ticket_instance, added=added, removed=removed
+            )
+
+        return added, removed
+
+    @staticmethod
+    def count_tags(deltas: dict, ticket: Ticket, tag_ids: list, sign: int = 1):
+        # the ticket as saved, which a pending save accounts for in turn
+        (deactivated,) = ticket.saved_values(("deactivated",))
+        TeamCounter.tally(
+            deltas,
+            ticket.team_id,
+            [(TeamCounter.TAG, tag_id) for tag_id in tag_ids],
+            deactivated is None,
+            sign,
+        )
 
     def __str__(self):
         return f"TicketTag: {self.created} for Team: {self.team.name}"
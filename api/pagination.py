@@ -0,0 +1,143 @@
+import json
+
+from django.db import connections
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+"""
+pagination for the team related list endpoints. Page number pagination stays
+the default; ?pagination=cursor opts into keyset pagination, which neither
+counts the whole set nor skips over rows with OFFSET
+"""
+
+# sets up to this size are counted exactly even when an approximation is asked
+APPROXIMATE_COUNT_EXACT_BELOW = 1000
+
+
+def approximate_count(queryset) -> tuple:
+    """
+    Returns (count, is_exact). Small sets are counted exactly through a
+    limited subquery; larger ones use the planner's row estimate where the
+    database provides one
+    """
+    queryset = queryset.order_by()
+    limited = queryset[: APPROXIMATE_COUNT_EXACT_BELOW + 1].count()
+    if limited <= APPROXIMATE_COUNT_EXACT_BELOW:
+        return limited, True
+
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count(), True
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return max(int(plan[0]["Plan"]["Plan Rows"]), limited), False
+
+
+class TeamCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the view's cursor_ordering_fields, selected with
+    ?ordering=<field> or ?ordering=-<field>. Rows are ordered by the field
+    then by id, which keeps the order of equal values stable, but cursors
+    only hold a value of the field: rows sharing the value a page ends on
+    are skipped with an offset, so the fields should be unique or nearly so
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    count_query_param = "count"
+
+    def get_ordering(self, request, queryset, view):
+        allowed = getattr(view, "cursor_ordering_fields", ["id"])
+        ordering = request.query_params.get("ordering") or getattr(
+            view, "cursor_ordering", allowed[0]
+        )
+        if ordering.lstrip("-") not in allowed:
+            ordering = getattr(view, "cursor_ordering", allowed[0])
+
+        field = ordering.lstrip("-")
+        if field in ("id", "pk"):
+            return (ordering,)
+        return (ordering, "-id" if ordering.startswith("-") else "id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) == "approximate":
+            self.count = approximate_count(queryset)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            count, is_exact = self.count
+            response.data["count"] = count
+            response.data["count_is_exact"] = is_exact
+        return response
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": "ordering",
+                "required": False,
+                "in": "query",
+                "description": "Field to order the cursor by, one of "
+                + ", ".join(getattr(view, "cursor_ordering_fields", ["id"])),
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to approximate to include an estimated count",
+                "schema": {"type": "string"},
+            },
+        ]
+
+
+class TeamListPagination(PageNumberPagination):
+    """
+    Page number pagination, unless the client asks for ?pagination=cursor or
+    follows a cursor link, in which case TeamCursorPagination is used
+    """
+
+    pagination_query_param = "pagination"
+
+    def use_cursor(self, request) -> bool:
+        return (
+            request.query_params.get(self.pagination_query_param) == "cursor"
+            or TeamCursorPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_pagination = None
+        if self.use_cursor(request):
+            self.cursor_pagination = TeamCursorPagination()
+            return self.cursor_pagination.paginate_queryset(queryset, request, view)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data) -> Response:
+        if self.cursor_pagination is not None:
+            return self.cursor_pagination.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            super().get_schema_operation_parameters(view)
+            + [
+                {
+                    "name": self.pagination_query_param,
+                    "required": False,
+                    "in": "query",
+                    "description": "Set to cursor to use cursor pagination",
+                    "schema": {"type": "string"},
+                }
+            ]
+            + TeamCursorPagination().get_schema_operation_parameters(view)
+        )
@@ -1,17 +1,23 @@
 from rest_framework.permissions import BasePermission, IsAuthenticated, SAFE_METHODS
-from hashlib import md5
 from .models import Member, Team
-from .methods import hash_team_id
+from .team_context import TeamContext
 
 
 class BaseMemberPermissions(BasePermission):
     # this will throw a member not found exception
+    # the record is shared with the rest of the request through its TeamContext
 
     @staticmethod
-    def retrieveMemberRecord(username, obj):
-        team = obj if isinstance(obj, Team) else obj.team
-        member_pk = hash_team_id(team, username)
-        return Member.objects.get(pk=member_pk)
+    def retrieveMemberRecord(request, obj):
+        context = TeamContext.from_request(request)
+        if isinstance(obj, Team):
+            team = obj
+        elif type(obj).team.is_cached(obj):
+            team = obj.team
+        else:
+            # resolved through the context rather than loaded for every obj
+            team = context.get_team(obj.team_id)
+        return context.get_team_member(team, request.user)
 
 
 # only permit this if the user is approved
@@ -19,7 +25,7 @@ class IsMemberUser(BaseMemberPermissions):
     def has_object_permission(self, request, view, obj):
 
         try:
-            self.retrieveMemberRecord(request.user.username, obj)
+            self.retrieveMemberRecord(request, obj)
             return True
         except Member.DoesNotExist:
             return False
@@ -45,7 +51,7 @@ class IsAdminMemberOrReadOnly(BaseMemberPermissions):
             try:
                 # Write permissions are only allowed to the owner of the object, or admin.
 
-                member_record = self.retrieveMemberRecord(request.user.username, obj)
+                member_record = self.retrieveMemberRecord(request, obj)
                 return member_record.is_admin()
 
             except Member.DoesNotExist:
@@ -57,7 +63,7 @@ class IsAdminMemberOrReadOnly(BaseMemberPermissions):
 class IsAdminMember(BaseMemberPermissions):
     def has_object_permission(self, request, view, object):
         try:
-            member_record = self.retrieveMemberRecord(request.user.username, object)
+            member_record = self.retrieveMemberRecord(request, object)
             return member_record.is_admin()
         except Member.DoesNotExist:
             return False
@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Tag, Team, TicketStatus
+
+"""
+process wide cache of rendered list responses of small, rarely changing team
+resources, keyed by (team id, model name) and the variant of the request,
+and only served while the team is at the version it was rendered at. Every
+write to these resources bumps the team version, so every process misses
+once the change commits. Saving or deleting an instance also drops its
+team's entries of that model right away and once the transaction commits,
+and a response rendered from data read before the latest invalidation is
+never stored. Entries expire after TIMEOUT seconds, and the least recently
+used entries are evicted beyond MAX_BYTES of content
+"""
+
+DEFAULT_TIMEOUT = 300
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+CACHED_MODELS = (Tag, TicketStatus)
+
+
+class ResponseCache:
+    def __init__(self, timeout=None, max_bytes=None):
+        self._timeout = timeout
+        self._max_bytes = max_bytes
+        # (team id, model name) ->
+        #     {variant: (team version, expires, content, content type)}
+        self._entries = OrderedDict()
+        # (team id, model name) -> monotonic time of the latest invalidation
+        self._invalidated = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def timeout(self) -> float:
+        if self._timeout is not None:
+            return self._timeout
+        return getattr(settings, "RESPONSE_CACHE", {}).get("TIMEOUT", DEFAULT_TIMEOUT)
+
+    @property
+    def max_bytes(self) -> int:
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return getattr(settings, "RESPONSE_CACHE", {}).get(
+            "MAX_BYTES", DEFAULT_MAX_BYTES
+        )
+
+    def get(self, team: Team, model_name, variant):
+        """
+        returns the (content, content type) cached for the team's current
+        version, or None on a miss
+        """
+        key = (team.id, model_name)
+        with self._lock:
+            variants = self._entries.get(key, {})
+            entry = variants.get(variant)
+            if entry is None or entry[0] != team.version or entry[1] < time.monotonic():
+                if entry is not None:
+                    self._discard(key, variant)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def set(self, team: Team, model_name, variant, content, content_type, started):
+        """
+        stores a response rendered from data read after the team, and so its
+        version, and after started, a time.monotonic() taken before the
+        request read anything
+        """
+        if self.timeout <= 0 or len(content) > self.max_bytes:
+            return
+
+        key = (team.id, model_name)
+        with self._lock:
+            if started <= self._invalidated.get(key, float("-inf")):
+                return
+
+            self._discard(key, variant)
+            self._entries.setdefault(key, {})[variant] = (
+                team.version,
+                time.monotonic() + self.timeout,
+                content,
+                content_type,
+            )
+            self._entries.move_to_end(key)
+            self._bytes += len(content)
+
+            while self._bytes > self.max_bytes:
+                _, variants = self._entries.popitem(last=False)
+                self._bytes -= sum(len(entry[2]) for entry in variants.values())
+                self.evictions += 1
+
+    def _discard(self, key, variant):
+        variants = self._entries.get(key)
+        if variants is not None and variant in variants:
+            self._bytes -= len(variants.pop(variant)[2])
+            if not variants:
+                del self._entries[key]
+
+    def invalidate(self, team_id, model_name):
+        key = (team_id, model_name)
+        now = time.monotonic()
+        with self._lock:
+            variants = self._entries.pop(key, {})
+            self._bytes -= sum(len(entry[2]) for entry in variants.values())
+            self._invalidated[key] = now
+            self.invalidations += 1
+
+            # only requests still in flight can hold data older than these
+            if len(self._invalidated) > 1000:
+                self._invalidated = {
+                    key: at
+                    for key, at in self._invalidated.items()
+                    if at > now - self.timeout
+                }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidated.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": sum(len(variants) for variants in self._entries.values()),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def invalidate_team(team_id, model_name):
+    response_cache.invalidate(team_id, model_name)
+    # responses rendered before the change commits must not outlive it
+    transaction.on_commit(lambda: response_cache.invalidate(team_id, model_name))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=TicketStatus)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=TicketStatus)
+def cached_entry_changed(sender, instance, **kwargs):
+    invalidate_team(instance.team_id, sender._meta.model_name)
@@ -1,6 +1,10 @@
 from .team_serializer import TeamSerializer
 from .user_serializer import UserSerializer
-from .ticket_serializer import TicketSerializer
+from .ticket_serializer import (
+    TicketDetailSerializer,
+    TicketMoveSerializer,
+    TicketSerializer,
+)
 from .tag_serializer import TagSerializer
 from .ticket_status_serializer import TicketStatusSerializer
 from .member_serializer import MemberSerializer
@@ -8,5 +12,5 @@ from .ticket_comment_serializer import TicketCommentSerializer
 from .event_serializer import EventSerializer
 from .pinned_ticket_serializer import PinnedTicketSerializer
 from .team_invite_serializer import TeamInviteSerializer
-from .ticket_node_serializer import TicketNodeSerializer
+from .ticket_node_serializer import TicketNodeSerializer, TicketRollupSerializer
 from .user_invite_serializer import UserInviteSerializer
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from .sparse_fieldsets import SparseFieldsetMixin
 from .user_serializer import UserSerializer
 from ..models import Event
 
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     On writes,\n
     - user expects a primary key\n
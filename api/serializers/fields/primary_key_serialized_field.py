@@ -1,4 +1,90 @@
+from django.db.models import Manager, Prefetch, prefetch_related_objects
 from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, MANY_RELATION_KWARGS
+
+from ..sparse_fieldsets import Fieldset, serializer_reads
+
+
+def relation_paths(model, serializer):
+    """
+    The lookups of the relations of model which serializer renders, at
+    every depth
+    """
+    _, relations = serializer_reads(model, serializer)
+
+    def paths(tree, prefix=""):
+        for name, (_, below) in tree.items():
+            yield prefix + name
+            yield from paths(below or {}, f"{prefix}{name}__")
+
+    return list(paths(relations or {}))
+
+
+def batch_load(field, queryset, nested: bool = False):
+    """
+    Dataloader style batching for a relation serialized as part of a list.
+    The first time the field is read for a list, the relation is loaded for
+    every instance of that list with a single IN query; instances which
+    already have the relation loaded (select_related / prefetch_related)
+    are left alone. With nested, the relations rendered by the serializer
+    nesting the related instances are loaded the same way, as that
+    serializer is not part of the list and cannot batch them itself
+    """
+    root = field.root
+    if (
+        not isinstance(root, serializers.ListSerializer)
+        or field.parent is not root.child
+    ):
+        return
+
+    instances = root.instance
+    if isinstance(instances, Manager) or getattr(field, "_batch", None) is instances:
+        return
+    field._batch = instances
+
+    lookup = "__".join(field.source_attrs)
+    lookups = [Prefetch(lookup, queryset=queryset)]
+    if nested:
+        relation = getattr(field, "child_relation", field)
+        # the serializer is kept to render the related instances
+        relation._nested = relation.nested_serializer()
+        lookups += [
+            f"{lookup}__{path}"
+            for path in relation_paths(queryset.model, relation._nested)
+        ]
+    prefetch_related_objects(list(instances), *lookups)
+
+
+def preload_related(serializer, items: list):
+    """
+    Resolves the primary keys every item of a list refers to through the
+    serializer's PrimaryKeySerializedFields, with one query per field, ahead
+    of validating the items one by one
+    """
+    for field in serializer.fields.values():
+        many = isinstance(field, PrimaryKeySerializedManyField)
+        relation = field.child_relation if many else field
+        if field.read_only or not isinstance(relation, PrimaryKeySerializedField):
+            continue
+
+        pks = set()
+        for item in items:
+            value = item.get(field.field_name) if isinstance(item, dict) else None
+            for pk in value if many and isinstance(value, list) else [value]:
+                if isinstance(pk, (int, str)) and not isinstance(pk, bool):
+                    pks.add(pk)
+
+        relation.preload(pks)
+
+
+class PrimaryKeySerializedManyField(ManyRelatedField):
+    def get_attribute(self, instance):
+        queryset = self.child_relation.get_queryset()
+        expanded = self.child_relation.is_expanded
+        if not expanded:
+            queryset = queryset.only("pk")
+        batch_load(self, queryset, nested=expanded)
+        return super().get_attribute(instance)
 
 
 class PrimaryKeySerializedField(serializers.PrimaryKeyRelatedField):
@@ -6,21 +92,67 @@ class PrimaryKeySerializedField(serializers.PrimaryKeyRelatedField):
     Custom field subclassing PrimaryKeyRelated
     On writes, this allows us to specify the primary key for a resource
     On reads, this will serialize the associated resource, nesting it
-    within the outer json
+    within the outer json, or only its primary key when the field is not
+    expanded. When serializing a list, the related resources are loaded
+    for the whole list at once
     """
 
+    # the part of a sparse fieldset below this field, and whether ?expand=
+    # expands it, see sparse_fieldsets
+    fieldset = None
+    expanded = None
+
     def __init__(self, **kwargs):
         self.serializer = kwargs.pop("serializer")
-        self.many = kwargs.get("many")
+        # whether reads nest the resource when ?expand= is not given
+        self.expand = kwargs.pop("expand", True)
         super().__init__(**kwargs)
 
+    @property
+    def is_expanded(self) -> bool:
+        return self.expand if self.expanded is None else self.expanded
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {"child_relation": cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return PrimaryKeySerializedManyField(**list_kwargs)
+
+    def preload(self, pks):
+        self._preloaded = self.get_queryset().in_bulk(list(pks))
+
+    def to_internal_value(self, data):
+        preloaded = getattr(self, "_preloaded", {})
+        if isinstance(data, (int, str)) and not isinstance(data, bool):
+            if data in preloaded:
+                return preloaded[data]
+
+        return super().to_internal_value(data)
+
+    def use_pk_only_optimization(self):
+        # an expanded instance is serialized, so there is nothing to gain
+        return not self.is_expanded
+
+    def get_attribute(self, instance):
+        if self.is_expanded:
+            batch_load(self, self.get_queryset(), nested=True)
+        return super().get_attribute(instance)
+
+    def nested_serializer(self):
+        fieldset = self.fieldset or Fieldset()
+        return self.serializer(
+            fields=fieldset.fields, omit=fieldset.omit, expand=fieldset.expand
+        )
+
     def to_representation(self, value):
         if self.pk_field is not None:
             return self.pk_field.to_representation(value.pk)
+        if not self.is_expanded:
+            return value.pk
 
-        if self.many:
-            return self.serializer(value, many=self.many).data
-
-        else:
-            instance = self.queryset.get(pk=value.pk)
-            return self.serializer(instance).data
+        # one serializer renders every related instance of this field
+        if getattr(self, "_nested", None) is None:
+            self._nested = self.nested_serializer()
+        return self._nested.to_representation(value)
@@ -1,14 +1,15 @@
 from rest_framework import serializers
+from .sparse_fieldsets import SparseFieldsetMixin
 from django.contrib.auth import get_user_model
 from .user_serializer import UserSerializer
 from ..models import Member
 
 
-class MemberSerializer(serializers.ModelSerializer):
+class MemberSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     id = serializers.ReadOnlyField()
     owner = UserSerializer(many=False, read_only=True)
     object_uuid = serializers.ReadOnlyField()
-    team_id = serializers.ReadOnlyField(source="team.id")
+    team_id = serializers.ReadOnlyField()
     created = serializers.DateTimeField(read_only=True)
     activated = serializers.DateTimeField(read_only=True)
     deactivated = serializers.DateTimeField(read_only=True)
@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from .sparse_fieldsets import SparseFieldsetMixin
 from ..models import Ticket, PinnedTicket
 from .fields.primary_key_serialized_field import PrimaryKeySerializedField
 from .ticket_serializer import TicketSerializer
 
 
-class PinnedTicketSerializer(serializers.ModelSerializer):
+class PinnedTicketSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     id = serializers.ReadOnlyField()
     ticket = PrimaryKeySerializedField(
         many=False,
@@ -0,0 +1,281 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField
+
+"""
+sparse fieldsets. On reads, ?fields= limits the serializer of the response
+to the listed fields and ?omit= drops the listed ones. Both take comma
+separated field names, with dots reaching into nested objects, e.g.
+?fields=id,title,status.title or ?omit=team,assigned_user.owner. ?expand=
+lists the PrimaryKeySerializedFields to render as nested objects, the others
+rendering as primary keys; without it each field follows its own default.
+prune_queryset then drops the joins, prefetches and columns of the view's
+queryset which the limited serializer no longer reads
+"""
+
+FIELDS_PARAM = "fields"
+OMIT_PARAM = "omit"
+EXPAND_PARAM = "expand"
+
+
+def parse_fieldset(value) -> dict:
+    """
+    Turns "a.b,a.c,d" into {"a": {"b": None, "c": None}, "d": None}, None
+    standing for the whole field. Naming a field whole wins over naming
+    parts of it
+    """
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str):
+        value = value.split(",")
+
+    tree = {}
+    for path in value:
+        names = [name.strip() for name in path.split(".") if name.strip()]
+        node = tree
+        for depth, name in enumerate(names):
+            if name in node and node[name] is None:
+                break
+            if depth == len(names) - 1:
+                node[name] = None
+            else:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class Fieldset:
+    """
+    The fields a serializer renders, omits and expands, as parse_fieldset
+    trees. fields and expand of None leave the choice to the serializer
+    """
+
+    def __init__(self, fields=None, omit=None, expand=None):
+        self.fields = parse_fieldset(fields) if fields is not None else None
+        self.omit = parse_fieldset(omit) if omit is not None else {}
+        self.expand = parse_fieldset(expand) if expand is not None else None
+
+    def __bool__(self):
+        return self.fields is not None or bool(self.omit) or self.expand is not None
+
+    def includes(self, name) -> bool:
+        if self.fields is not None and name not in self.fields:
+            return False
+        return not (name in self.omit and self.omit[name] is None)
+
+    def expands(self, name, default: bool) -> bool:
+        return default if self.expand is None else name in self.expand
+
+    def below(self, name) -> "Fieldset":
+        """
+        The part of the fieldset applying to the fields of the named field
+        """
+        return Fieldset(
+            self.fields.get(name) if self.fields is not None else None,
+            self.omit.get(name),
+            self.expand.get(name) if self.expand is not None else None,
+        )
+
+
+def requested_fieldset(request) -> Fieldset:
+    """
+    The fieldset of a read request, empty for writes
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return Fieldset()
+
+    params = request.query_params
+    return Fieldset(
+        params.get(FIELDS_PARAM) or None,
+        params.get(OMIT_PARAM) or None,
+        params.get(EXPAND_PARAM),
+    )
+
+
+def list_child(field):
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, ManyRelatedField):
+        return field.child_relation
+    return field
+
+
+class SparseFieldsetMixin:
+    """
+    Limits a serializer to a fieldset, given as the fields, omit and expand
+    arguments or, for the serializer of a response, by the request
+    """
+
+    fieldset = None
+
+    def __init__(self, *args, fields=None, omit=None, expand=None, **kwargs):
+        if fields is not None or omit is not None or expand is not None:
+            self.fieldset = Fieldset(fields, omit, expand)
+        super().__init__(*args, **kwargs)
+
+    def is_response_root(self) -> bool:
+        parent = getattr(self, "parent", None)
+        return parent is None or (
+            isinstance(parent, serializers.ListSerializer) and parent.parent is None
+        )
+
+    def get_fieldset(self) -> Fieldset:
+        if self.fieldset is not None:
+            return self.fieldset
+        if self.is_response_root():
+            return requested_fieldset(self.context.get("request"))
+        return Fieldset()
+
+    def get_fields(self):
+        fieldset = self.get_fieldset()
+        fields = {
+            name: field
+            for name, field in super().get_fields().items()
+            if fieldset.includes(name)
+        }
+
+        # hands the part of the fieldset below each field on to it
+        for name, field in fields.items():
+            field = list_child(field)
+            if hasattr(field, "fieldset"):
+                field.fieldset = fieldset.below(name)
+            if hasattr(field, "expanded"):
+                field.expanded = fieldset.expands(name, field.expand)
+        return fields
+
+
+def nested_serializer(field):
+    """
+    The serializer rendering the related objects of a relation field, if
+    any
+    """
+    field = list_child(field)
+    if isinstance(field, serializers.BaseSerializer):
+        return field
+    if getattr(field, "is_expanded", False):
+        return field.nested_serializer()
+    return None
+
+
+def serializer_reads(model, serializer) -> tuple:
+    """
+    Returns (columns, relations) of model read by serializer: the names of
+    the concrete fields it renders, or None when it reads attributes which
+    are not fields, and the reads of each relation it renders
+    """
+    columns, relations = {model._meta.pk.name}, {}
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            return None, None
+
+        name = field.source_attrs[0]
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # properties and methods are assumed to read columns only, while
+            # attributes the model lacks are skipped when rendering
+            if hasattr(model, name):
+                columns = None
+            continue
+
+        if not model_field.is_relation:
+            if columns is not None:
+                columns.add(name)
+            continue
+
+        if model_field.concrete and columns is not None:
+            columns.add(model_field.name)
+
+        # team_id and the like are read from the row itself
+        if name == getattr(model_field, "attname", None) != model_field.name:
+            continue
+
+        nested = nested_serializer(field)
+        if hasattr(list_child(field), "is_expanded") and nested is None:
+            # collapsed to primary keys, read from the row or the through table
+            if model_field.many_to_many:
+                relations[model_field.name] = (
+                    {model_field.related_model._meta.pk.name},
+                    {},
+                )
+        elif len(field.source_attrs) > 1 or nested is None:
+            relations[model_field.name] = (None, {})
+        else:
+            relations[model_field.name] = serializer_reads(
+                model_field.related_model, nested
+            )
+
+    return columns, relations
+
+
+def prune_queryset(queryset, serializer, keep=()):
+    """
+    Drops the select_related and prefetch_related lookups of queryset which
+    serializer does not render, and defers the columns it does not read.
+    keep names further columns of the queryset's model to load
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    columns, relations = serializer_reads(queryset.model, serializer)
+    if relations is None:
+        return queryset
+
+    def read(lookup: str) -> tuple:
+        reads = (columns, relations)
+        for name in lookup.split("__"):
+            if reads[1] is None:
+                return reads
+            reads = reads[1].get(name)
+            if reads is None:
+                return None
+        return reads
+
+    only = set(columns) | set(keep) if columns is not None else None
+
+    select_related = queryset.query.select_related
+    if isinstance(select_related, dict):
+
+        def paths(tree, prefix=""):
+            for name, below in tree.items():
+                path = prefix + name
+                reads = read(path)
+                if reads is None:
+                    continue
+                yield path
+                if only is not None and reads[0] is not None:
+                    only.update(f"{path}__{column}" for column in reads[0])
+                yield from paths(below, path + "__")
+
+        kept = list(paths(select_related))
+        queryset = queryset.select_related(None)
+        if kept:
+            queryset = queryset.select_related(*kept)
+
+    prefetches = queryset._prefetch_related_lookups
+    if prefetches:
+        kept = []
+        for lookup in prefetches:
+            reads = read(getattr(lookup, "prefetch_to", lookup))
+            if reads is None:
+                continue
+
+            # the related rows of a plain lookup only load the columns read
+            if isinstance(lookup, str) and "__" not in lookup and reads[0]:
+                related = queryset.model._meta.get_field(lookup).related_model
+                lookup = Prefetch(
+                    lookup, queryset=related._default_manager.only(*reads[0])
+                )
+            kept.append(lookup)
+        queryset = queryset.prefetch_related(None).prefetch_related(*kept)
+
+    if only is not None:
+        if any(field.name == "team" for field in queryset.model._meta.fields):
+            # the team of an instance is read by the permission checks
+            only.add("team")
+        queryset = queryset.only(*only)
+    return queryset
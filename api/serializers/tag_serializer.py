@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from .sparse_fieldsets import SparseFieldsetMixin
 from ..models import *
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     id = serializers.ReadOnlyField()
     created = serializers.DateTimeField(read_only=True)
     activated = serializers.DateTimeField(read_only=True)
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from .sparse_fieldsets import SparseFieldsetMixin
 from .team_serializer import TeamSerializer
 from ..models import TeamInvite
 
 
-class TeamInviteSerializer(serializers.ModelSerializer):
+class TeamInviteSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     id = serializers.ReadOnlyField()
     user_email = serializers.EmailField(source="user.email")
     team = TeamSerializer(many=False, read_only=True)
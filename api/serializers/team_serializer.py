@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from .sparse_fieldsets import SparseFieldsetMixin
 from django.contrib.auth import get_user_model
 from ..models import *
 
 
-class TeamSerializer(serializers.ModelSerializer):
+class TeamSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     # make the following fields read only
     id = serializers.ReadOnlyField()
     ticket_head = serializers.ReadOnlyField()
@@ -22,4 +23,5 @@ class TeamSerializer(serializers.ModelSerializer):
             "created",
             "activated",
             "deactivated",
+            "event_retention_days",
         ]
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from .sparse_fieldsets import SparseFieldsetMixin
 from .user_serializer import UserSerializer
 from ..models import *
 
 
-class TicketCommentSerializer(serializers.ModelSerializer):
+class TicketCommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     ticket_id = serializers.ReadOnlyField(source="ticket.id")
     team_id = serializers.ReadOnlyField(source="team.id")
     owner = UserSerializer(many=False, read_only=True)
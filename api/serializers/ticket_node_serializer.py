@@ -1,10 +1,31 @@
 from rest_framework import serializers
+from .sparse_fieldsets import SparseFieldsetMixin
 from ..models import TicketNode
 
 
-class TicketNodeSerializer(serializers.ModelSerializer):
+class TicketNodeSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     ticket_id = serializers.ReadOnlyField()
 
     class Meta:
         model = TicketNode
         fields = ["ticket_id"]
+
+
+class TicketRollupSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Totals over the descendants of a ticket, status_counts mapping status
+    ids to the number of descendants with that status
+    """
+
+    closed_count = serializers.ReadOnlyField()
+
+    class Meta:
+        model = TicketNode
+        fields = [
+            "descendant_count",
+            "open_count",
+            "closed_count",
+            "status_counts",
+            "nearest_due_date",
+        ]
+        read_only_fields = fields
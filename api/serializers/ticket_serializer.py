@@ -1,14 +1,142 @@
+from django.db import transaction
 from rest_framework import serializers
-from .fields.primary_key_serialized_field import PrimaryKeySerializedField
+from .sparse_fieldsets import SparseFieldsetMixin
+from rest_framework.settings import api_settings
+from .fields.primary_key_serialized_field import (
+    PrimaryKeySerializedField,
+    preload_related,
+)
 from .ticket_comment_serializer import TicketCommentSerializer
 from .tag_serializer import TagSerializer
 from .member_serializer import MemberSerializer
 from .ticket_status_serializer import TicketStatusSerializer
 from .team_serializer import TeamSerializer
-from ..models import Ticket, Tag, Member, TicketStatus, TicketTag
+from .ticket_node_serializer import TicketRollupSerializer
+from ..models import (
+    Ticket,
+    Tag,
+    Member,
+    TicketNode,
+    TicketStatus,
+    TicketTag,
+)
 
 
-class TicketSerializer(serializers.ModelSerializer):
+def set_parent(ticket: Ticket, parent):
+    # moves that would break the hierarchy are reported like invalid input
+    try:
+        TicketNode.set_parent(ticket, parent)
+    except ValueError as error:
+        raise serializers.ValidationError({"parent_id": [str(error)]})
+
+
+class TicketListSerializer(serializers.ListSerializer):
+    """
+    Creates and updates lists of tickets with bulk queries. Unlike the
+    default list serializer, items are validated individually so that the
+    valid items can be saved while the invalid ones are reported
+    """
+
+    def validate_items(self, data) -> tuple:
+        """
+        Returns the validated data of every valid item alongside their index,
+        and a list of {"index", "errors"} for every invalid item
+        """
+        if not isinstance(data, list):
+            message = self.error_messages["not_a_list"].format(
+                input_type=type(data).__name__
+            )
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [message]}, code="not_a_list"
+            )
+
+        if self.max_length is not None and len(data) > self.max_length:
+            message = self.error_messages["max_length"].format(
+                max_length=self.max_length
+            )
+            raise serializers.ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [message]}, code="max_length"
+            )
+
+        preload_related(self.child, data)
+
+        valid, errors = [], []
+        for index, item in enumerate(data):
+            try:
+                valid.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                errors.append({"index": index, "errors": exc.detail})
+
+        return valid, errors
+
+    def create(self, validated_data):
+        if not validated_data:
+            return []
+
+        team = validated_data[0]["team"]
+        tag_lists = [attrs.pop("tag_list", None) for attrs in validated_data]
+        parents = [attrs.get("parent_id") for attrs in validated_data]
+        tickets = [
+            Ticket(**self.model_attrs(attrs), team=team) for attrs in validated_data
+        ]
+
+        with transaction.atomic():
+            tickets = Ticket.bulk_create_numbered(team, tickets)
+            TicketTag.bulk_create_all(zip(tickets, tag_lists))
+            for ticket, parent in zip(tickets, parents):
+                if parent is not None:
+                    TicketNode.set_parent(ticket, parent)
+
+        return tickets
+
+    def update(self, instances, validated_data):
+        """
+        Updates the instances with their validated data. Items whose new
+        parent would break the hierarchy are left unchanged, their errors
+        kept in move_errors by their place in instances
+        """
+        self.move_errors = {}
+        updated, updated_fields = [], set()
+
+        with transaction.atomic():
+            for position, (instance, attrs) in enumerate(
+                zip(instances, validated_data)
+            ):
+                if "parent_id" in attrs:
+                    try:
+                        TicketNode.set_parent(instance, attrs["parent_id"])
+                    except ValueError as error:
+                        self.move_errors[position] = {"parent_id": [str(error)]}
+                        continue
+
+                tag_list = attrs.pop("tag_list", None)
+                attrs = self.model_attrs(attrs)
+
+                if tag_list is not None:
+                    TicketTag.delete_difference(tag_list, instance)
+                    getattr(instance, "_prefetched_objects_cache", {}).pop(
+                        "tag_list", None
+                    )
+
+                for field, value in attrs.items():
+                    setattr(instance, field, value)
+                updated_fields.update(attrs)
+                updated.append(instance)
+
+            if updated_fields:
+                Ticket.objects.bulk_update(updated, list(updated_fields))
+                Ticket.bulk_saved(updated)
+
+        return updated
+
+    @staticmethod
+    def model_attrs(attrs) -> dict:
+        # parent_id and nested comments are not columns of the ticket
+        excluded = ("parent_id", "comments", "team")
+        return {key: value for key, value in attrs.items() if key not in excluded}
+
+
+class TicketSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     On writes,\n
     - tag_list expects a list of primary keys\n
@@ -38,7 +166,7 @@ class TicketSerializer(serializers.ModelSerializer):
         many=False,
         required=False,
         allow_null=True,
-        queryset=Member.objects.all(),
+        queryset=Member.objects.all().select_related("owner"),
         serializer=MemberSerializer,
     )
 
@@ -57,6 +185,7 @@ class TicketSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Ticket
+        list_serializer_class = TicketListSerializer
         fields = [
             "id",
             "ticket_number",
@@ -75,13 +204,43 @@ class TicketSerializer(serializers.ModelSerializer):
             "deactivated",
         ]
 
+    def validate_parent_id(self, value):
+        """
+        Resolves the parent ticket, which must belong to the same team
+        """
+        if value is None:
+            return None
+
+        parents = Ticket.objects.filter(pk=value)
+        view = self.context.get("view")
+        if view is not None and hasattr(view, "get_team"):
+            parents = parents.filter(team=view.get_team())
+
+        parent = parents.first()
+        if parent is None:
+            raise serializers.ValidationError("Ticket not found.")
+        return parent
+
+    def validate(self, attrs):
+        parent = attrs.get("parent_id")
+        if parent is not None and isinstance(self.instance, Ticket):
+            if TicketNode.is_below(parent, self.instance):
+                raise serializers.ValidationError(
+                    {"parent_id": ["A ticket cannot be moved below itself."]}
+                )
+        return attrs
+
     # this creates a record from the json, modifying the keys
     def create(self, validated_data):
         tag_list = validated_data.pop("tag_list", None)
+        parent = validated_data.pop("parent_id", None)
 
-        ticket = Ticket.objects.create(**validated_data)
+        with transaction.atomic(savepoint=False):
+            ticket = Ticket.objects.create(**validated_data)
 
-        TicketTag.create_all(tag_list, ticket)
+            TicketTag.create_all(tag_list, ticket)
+            if parent is not None:
+                TicketNode.set_parent(ticket, parent)
 
         return ticket
 
@@ -89,6 +248,32 @@ class TicketSerializer(serializers.ModelSerializer):
     def update(self, instance: Ticket, validated_data):
         tag_list = validated_data.pop("tag_list", None)
 
-        TicketTag.delete_difference(tag_list, instance)
+        with transaction.atomic(savepoint=False):
+            TicketTag.delete_difference(tag_list, instance)
+            if "parent_id" in validated_data:
+                set_parent(instance, validated_data.pop("parent_id"))
+
+            return super().update(instance, validated_data)
+
+
+class TicketDetailSerializer(TicketSerializer):
+    """
+    A ticket with the rollup of its descendants, null for tickets outside
+    any hierarchy
+    """
+
+    rollup = TicketRollupSerializer(
+        source="ticket_node", read_only=True, allow_null=True
+    )
+
+    class Meta(TicketSerializer.Meta):
+        fields = TicketSerializer.Meta.fields + ["rollup"]
+
+
+class TicketMoveSerializer(serializers.Serializer):
+    """
+    One move of a batch: a ticket and its new parent, null for the top
+    """
 
-        return super().update(instance, validated_data)
+    id = serializers.IntegerField()
+    parent_id = serializers.IntegerField(allow_null=True)
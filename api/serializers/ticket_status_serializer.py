@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from .sparse_fieldsets import SparseFieldsetMixin
 from ..models import TicketStatus
 
 
-class TicketStatusSerializer(serializers.ModelSerializer):
+class TicketStatusSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     id = serializers.ReadOnlyField()
     object_uuid = serializers.ReadOnlyField()
     created = serializers.DateTimeField(read_only=True)
@@ -1,9 +1,10 @@
 from rest_framework import serializers
+from .sparse_fieldsets import SparseFieldsetMixin
 from .team_serializer import TeamSerializer
 from ..models import TeamInvite
 
 
-class UserInviteSerializer(serializers.ModelSerializer):
+class UserInviteSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     id = serializers.ReadOnlyField()
     team = TeamSerializer(read_only=True)
 
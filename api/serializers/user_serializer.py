@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from .sparse_fieldsets import SparseFieldsetMixin
 from django.contrib.auth import get_user_model
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     id = serializers.ReadOnlyField()
     email = serializers.ReadOnlyField()
 
@@ -140,6 +140,30 @@ REST_FRAMEWORK = {
     "DATETIME_FORMAT": "%Y-%m-%dT%H:%M:%S%z",
 }
 
+# Cross request cache of team membership lookups, see api/membership_cache.py
+MEMBERSHIP_CACHE = {"TIMEOUT": 300, "MAX_ENTRIES": 10000}
+
+# Buffered writes of team events, see api/event_writer.py. MODE is either
+# "buffered" or "sync"; the test suite runs in sync mode
+EVENT_WRITER = {"MODE": "buffered", "BATCH_SIZE": 100, "FLUSH_INTERVAL": 1.0}
+
+# Events older than DAYS are moved to the archive by the archive_events
+# command, unless their team sets its own event_retention_days. DAYS of None
+# keeps events until a team sets a retention
+EVENT_RETENTION = {"DAYS": 365, "CHUNK_SIZE": 1000}
+
+# Per process autocomplete indexes of recently queried teams, see
+# api/autocomplete.py
+AUTOCOMPLETE = {"TIMEOUT": 300, "MAX_TEAMS": 100}
+
+# Per process cache of rendered tag and status lists, see
+# api/response_cache.py. Statistics are served at api/cache-stats/
+RESPONSE_CACHE = {"TIMEOUT": 300, "MAX_BYTES": 16 * 1024 * 1024}
+
+# Per process cache of ticket stats, keyed by team version, see
+# api/ticket_stats.py
+TICKET_STATS_CACHE = {"TIMEOUT": 300, "MAX_ENTRIES": 1000}
+
 REST_USE_JWT = True
 JWT_AUTH_COOKIE = "sluggo-auth-token"
 JWT_AUTH_REFRESH_COOKIE = "sluggo-auth-refresh-token"
@@ -0,0 +1,79 @@
+from django.shortcuts import get_object_or_404
+
+from .models import Member, Team
+from .methods import hash_team_id
+from .membership_cache import membership_cache, NOT_A_MEMBER
+
+"""
+request scoped resolution of the team and member records. The team nested
+viewsets and every member permission class need the same Team and the
+caller's Member; the context resolves each of them at most once per request
+"""
+
+CONTEXT_ATTRIBUTE = "team_context"
+
+
+class TeamContext:
+    def __init__(self):
+        self._teams = {}
+        self._members = {}
+
+    @classmethod
+    def from_request(cls, request):
+        context = getattr(request, CONTEXT_ATTRIBUTE, None)
+        if context is None:
+            context = cls()
+            setattr(request, CONTEXT_ATTRIBUTE, context)
+        return context
+
+    def get_team(self, team_id) -> Team:
+        key = f"{team_id}"
+        if key not in self._teams:
+            self._teams[key] = get_object_or_404(Team, pk=team_id)
+        return self._teams[key]
+
+    def add_team(self, team: Team):
+        self._teams.setdefault(f"{team.id}", team)
+
+    # this will throw a member not found exception
+    def get_member(self, member_pk: str) -> Member:
+        if member_pk not in self._members:
+            try:
+                member = Member.objects.get(pk=member_pk)
+
+                # share the team instance already resolved for this request
+                team = self._teams.get(f"{member.team_id}")
+                if team is not None:
+                    member.team = team
+            except Member.DoesNotExist:
+                member = None
+
+            self._members[member_pk] = member
+
+        member = self._members[member_pk]
+        if member is None:
+            raise Member.DoesNotExist(f"no member with primary key {member_pk}")
+        return member
+
+    def get_team_member(self, team: Team, user) -> Member:
+        self.add_team(team)
+        member_pk = hash_team_id(team, user.username)
+
+        # requests from the same user share their membership through the
+        # process wide cache while the team is unchanged, falling back to
+        # the database on a miss
+        if member_pk not in self._members:
+            cached = membership_cache.get(team, user.id)
+            if cached is NOT_A_MEMBER:
+                self._members[member_pk] = None
+            elif cached is not None:
+                cached.team = team
+                self._members[member_pk] = cached
+            else:
+                try:
+                    member = self.get_member(member_pk)
+                    membership_cache.set(team, user.id, member)
+                except Member.DoesNotExist:
+                    membership_cache.set(team, user.id, NOT_A_MEMBER)
+
+        return self.get_member(member_pk)
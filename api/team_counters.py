@@ -0,0 +1,224 @@
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import (
+    Member,
+    Tag,
+    Team,
+    TeamCounter,
+    Ticket,
+    TicketStatus,
+    TicketTag,
+    tickets_bulk_saved,
+)
+
+"""
+keeps TeamCounter current. Every write to a ticket adds the difference it
+makes to the counters of its status, assignee and tags as F expression
+deltas, within the writing transaction, so the counters are exact without
+ever counting a team's tickets. Linking and unlinking tags is accounted for
+by TicketTag itself, once per statement. reconcile_counters recounts the
+counters from the tickets, for repair
+"""
+
+
+def tags_of(ticket_ids) -> dict:
+    tags = {}
+    for ticket_id, tag_id in TicketTag.objects.filter(
+        ticket_id__in=ticket_ids
+    ).values_list("ticket_id", "tag_id"):
+        tags.setdefault(ticket_id, []).append(tag_id)
+    return tags
+
+
+def count_changes(tickets) -> dict:
+    """
+    The deltas of the changes of the counted fields of tickets since they
+    were loaded or last saved. The tags of the tickets are only read for
+    those which were opened or closed
+    """
+    changed = []
+    for ticket in tickets:
+        changes = ticket.saved_changes(Ticket.COUNTED_FIELDS)
+        if changes is not None:
+            changed.append((ticket, *changes))
+
+    reopened = [
+        ticket.pk
+        for ticket, (*_, was_closed), (*_, closed) in changed
+        if (was_closed is None) != (closed is None)
+    ]
+    tags = tags_of(reopened) if reopened else {}
+
+    deltas = {}
+    for ticket, before, after in changed:
+        for (status_id, assigned_user_id, deactivated), sign in [
+            (before, -1),
+            (after, 1),
+        ]:
+            TeamCounter.tally(
+                deltas,
+                ticket.team_id,
+                TeamCounter.of_ticket(
+                    status_id, assigned_user_id, tags.get(ticket.pk, ())
+                ),
+                deactivated is None,
+                sign,
+            )
+    return deltas
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        deltas = {}
+        TeamCounter.tally(
+            deltas,
+            instance.team_id,
+            TeamCounter.of_ticket(instance.status_id, instance.assigned_user_id),
+            instance.deactivated is None,
+        )
+        TeamCounter.apply(deltas)
+    else:
+        TeamCounter.apply(count_changes([instance]))
+
+
+@receiver(tickets_bulk_saved)
+def tickets_saved(sender, tickets, created=False, **kwargs):
+    if not created:
+        TeamCounter.apply(count_changes(tickets))
+        return
+
+    # new tickets are tagged afterwards
+    deltas = {}
+    for ticket in tickets:
+        TeamCounter.tally(
+            deltas,
+            ticket.team_id,
+            TeamCounter.of_ticket(ticket.status_id, ticket.assigned_user_id),
+            ticket.deactivated is None,
+        )
+    TeamCounter.apply(deltas)
+
+
+@receiver(pre_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    # the counters of a team being deleted go with it
+    if Team.is_deleting(instance.team_id):
+        return
+
+    # before its tags go with it
+    status_id, assigned_user_id, deactivated = instance.saved_values(
+        Ticket.COUNTED_FIELDS
+    )
+    deltas = {}
+    TeamCounter.tally(
+        deltas,
+        instance.team_id,
+        TeamCounter.of_ticket(
+            status_id, assigned_user_id, tags_of([instance.pk]).get(instance.pk, ())
+        ),
+        deactivated is None,
+        sign=-1,
+    )
+    TeamCounter.apply(deltas)
+
+
+def merge_counter(team_id, kind, key):
+    """
+    Moves the tickets counted under key to the counter without a key, as
+    the tickets of a deleted status or member lose it without being saved
+    """
+    if Team.is_deleting(team_id):
+        return
+
+    counter = TeamCounter.objects.filter(team_id=team_id, kind=kind, key=key).first()
+    if counter is None:
+        return
+    TeamCounter.apply({(team_id, kind, None): (counter.count, counter.open)})
+    counter.delete()
+
+
+@receiver(post_delete, sender=TicketStatus)
+def status_deleted(sender, instance, **kwargs):
+    merge_counter(instance.team_id, TeamCounter.STATUS, instance.pk)
+
+
+@receiver(post_delete, sender=Member)
+def member_deleted(sender, instance, **kwargs):
+    merge_counter(instance.team_id, TeamCounter.ASSIGNEE, instance.pk)
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    if Team.is_deleting(instance.team_id):
+        return
+    TeamCounter.objects.filter(
+        team_id=instance.team_id, kind=TeamCounter.TAG, key=instance.pk
+    ).delete()
+
+
+def recount(team_id) -> dict:
+    """
+    {(kind, key): (count, open)} of a team, counted from its tickets with
+    three grouped queries
+    """
+    tickets = Ticket.objects.filter(team_id=team_id).order_by()
+    ticket_tags = TicketTag.objects.filter(ticket__team_id=team_id).order_by()
+    counters = {}
+    for kind, field, rows, deactivated in [
+        (TeamCounter.STATUS, "status", tickets, "deactivated"),
+        (TeamCounter.ASSIGNEE, "assigned_user", tickets, "deactivated"),
+        (TeamCounter.TAG, "tag", ticket_tags, "ticket__deactivated"),
+    ]:
+        for key, count, open in rows.values_list(field).annotate(
+            count=Count("pk"), open=Count("pk", filter=Q(**{deactivated: None}))
+        ):
+            counters[(kind, key if key is None else str(key))] = (count, open)
+    return counters
+
+
+def reconcile_counters(team_id=None) -> dict:
+    """
+    Recounts the counters of every team, or of a team, and fixes those
+    which drifted. Each team is locked while it is recounted, which holds
+    off the writes to its tickets. Returns {team id: number of counters
+    fixed}
+    """
+    teams = Team.objects.order_by("id")
+    if team_id is not None:
+        teams = teams.filter(pk=team_id)
+
+    fixed = {}
+    for pk in teams.values_list("pk", flat=True):
+        with transaction.atomic():
+            Team.objects.select_for_update().filter(pk=pk).first()
+            counted = recount(pk)
+            stored = {
+                (counter.kind, counter.key): counter
+                for counter in TeamCounter.objects.filter(team_id=pk)
+            }
+
+            drifted = []
+            for key, counter in stored.items():
+                count, open = counted.get(key, (0, 0))
+                if (counter.count, counter.open) != (count, open):
+                    counter.count, counter.open = count, open
+                    drifted.append(counter)
+            TeamCounter.objects.bulk_update(drifted, ["count", "open"])
+
+            missing = [
+                TeamCounter(team_id=pk, kind=kind, key=key, count=count, open=open)
+                for (kind, key), (count, open) in counted.items()
+                if (kind, key) not in stored
+            ]
+            TeamCounter.objects.bulk_create(missing)
+
+            if drifted or missing:
+                Team.bump_version(pk)
+            fixed[pk] = len(drifted) + len(missing)
+    return fixed
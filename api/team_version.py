@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    Member,
+    PinnedTicket,
+    Tag,
+    Team,
+    Ticket,
+    TicketComment,
+    TicketStatus,
+    tickets_bulk_saved,
+)
+
+"""
+keeps Team.version current. Every write to a team's tickets, tags, statuses,
+members or pins, or to the users of its members, bumps it within the writing
+transaction, so the team nested viewsets can derive ETags from the team row
+they load anyway and answer If-None-Match without reading anything else. Writes which bypass signals
+(queryset.update, bulk inserts of ticket tags) call Team.bump_version
+themselves, once per statement rather than once per row
+"""
+
+VERSIONED_MODELS = (Ticket, TicketComment, Tag, TicketStatus, Member, PinnedTicket)
+
+
+def versioned_receiver(signal):
+    def decorator(function):
+        for sender in VERSIONED_MODELS:
+            function = receiver(signal, sender=sender)(function)
+        return function
+
+    return decorator
+
+
+@versioned_receiver(post_save)
+def team_entry_saved(sender, instance, created=False, raw=False, **kwargs):
+    # new tickets bump the version while reserving their ticket number
+    if not raw and not (created and sender is Ticket):
+        Team.bump_version(instance.team_id)
+
+
+@versioned_receiver(post_delete)
+def team_entry_deleted(sender, instance, **kwargs):
+    if not Team.is_deleting(instance.team_id):
+        Team.bump_version(instance.team_id)
+
+
+@receiver(tickets_bulk_saved)
+def tickets_saved(sender, tickets, **kwargs):
+    Team.bump_version(*(ticket.team_id for ticket in tickets))
+
+
+@receiver(post_save, sender=Team)
+def team_saved(sender, instance, created=False, raw=False, **kwargs):
+    # members, tickets and pins are serialized with their team
+    if not created and not raw:
+        Team.bump_version(instance.id)
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(
+    sender, instance, created=False, raw=False, update_fields=None, **kwargs
+):
+    # members, tickets and comments are serialized with their users, whose
+    # logins alone change nothing rendered
+    if created or raw or update_fields == {"last_login"}:
+        return
+    Team.bump_version(
+        *Member.objects.filter(owner=instance).values_list("team_id", flat=True)
+    )
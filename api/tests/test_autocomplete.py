@@ -0,0 +1,171 @@
+from unittest import mock
+
+from django.utils import timezone
+
+from api.autocomplete import AutocompleteIndex, TrigramIndex, TICKETS
+from .test_base import *
+
+
+class TrigramIndexTestCase(TestCase):
+    def setUp(self):
+        self.index = TrigramIndex()
+        for key, text in enumerate(
+            ["login button broken", "logout fails", "dark mode", "login page slow"]
+        ):
+            self.index.add(key, text)
+
+    def keys(self, query, limit=10):
+        return [key for key, _, _ in self.index.search(query, limit)]
+
+    def testTypos(self):
+        self.assertEqual(self.keys("logn button")[0], 0)
+        self.assertEqual(self.keys("drak mode"), [2])
+
+    def testShorterTextsWinTies(self):
+        # both contain every trigram of "login", the page title is shorter
+        self.assertEqual(self.keys("login")[:2], [3, 0])
+        self.assertEqual(self.keys("login", limit=1), [3])
+
+    def testExactMatchAmongManyPartialOnes(self):
+        # every title holds all the trigrams of "login", and only the cut on
+        # similarity keeps the exact match among the candidates
+        index = TrigramIndex()
+        for key in range(1500):
+            index.add(key, f"login issue {key}")
+        index.add(1500, "login")
+        self.assertEqual([key for key, _, _ in index.search("login", 5)][0], 1500)
+
+    def testUpdates(self):
+        self.index.add(2, "light mode")
+        self.assertEqual(self.keys("dark"), [])
+        self.assertEqual(self.keys("light"), [2])
+
+        self.index.remove(2)
+        self.assertEqual(self.keys("light"), [])
+        self.assertNotIn("lig", self.index.postings)
+        self.assertEqual(len(self.index), 3)
+
+
+class AutocompleteEndpointTestCase(TeamRelatedCore):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("team-autocomplete-list", kwargs={TEAM_PK: self.team.id})
+        self.ticket = Ticket.objects.create(team=self.team, title="Export to CSV")
+        self.tag = Tag.objects.create(team=self.team, title="exporter")
+
+    def get(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def testMatchesEveryKind(self):
+        data = self.get(q="exprt")
+
+        self.assertEqual([ticket["id"] for ticket in data["tickets"]], [self.ticket.id])
+        self.assertEqual(data["tickets"][0]["title"], "Export to CSV")
+        self.assertEqual([tag["id"] for tag in data["tags"]], [self.tag.id])
+
+        data = self.get(q=self.user.username[:8], kinds="members")
+        self.assertEqual(list(data), ["members"])
+        self.assertEqual(data["members"][0]["username"], self.user.username)
+
+    def testIndexIsBuiltOnce(self):
+        self.get(q="export")
+
+        # the team and membership lookups only, the index is already built
+        with self.assertNumQueries(1):
+            self.get(q="csv")
+
+    def testChangesApplyOnCommit(self):
+        self.get(q="export")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ticket.title = "Import from CSV"
+            self.ticket.save()
+            Ticket.objects.create(team=self.team, title="Export to PDF")
+
+        titles = [ticket["title"] for ticket in self.get(q="export")["tickets"]]
+        self.assertEqual(titles, ["Export to PDF"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+        self.assertEqual(self.get(q="exporter")["tags"], [])
+
+    def testDeactivatedTicketsAreLeftOut(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ticket.deactivated = timezone.now()
+            self.ticket.save()
+        self.assertEqual(self.get(q="export")["tickets"], [])
+
+    def testRollbackLeavesTheIndex(self):
+        self.get(q="export")
+
+        # callbacks of a rolled back transaction never run
+        with self.captureOnCommitCallbacks(execute=False):
+            Ticket.objects.create(team=self.team, title="Export to XML")
+        self.assertEqual(len(self.get(q="export")["tickets"]), 1)
+
+    def testLimitAndEmptyQuery(self):
+        for i in range(5):
+            Ticket.objects.create(team=self.team, title=f"Export {i}")
+
+        self.assertEqual(len(self.get(q="export", limit=2)["tickets"]), 2)
+        self.assertEqual(len(self.get(q="export", limit="x")["tickets"]), 6)
+        self.assertEqual(self.get(q=" "), {"tickets": [], "tags": [], "members": []})
+
+    def testNonMembers(self):
+        other_user = generateArbitraryUsers(1)[0]
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get(self.url, {"q": "export"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AutocompleteIndexTestCase(TestCase):
+    def setUp(self):
+        self.teams = generateArbitraryTeams(3)
+        for team in self.teams:
+            Ticket.objects.create(team=team, title=f"ticket of {team.name}")
+
+    def testLeastRecentlyUsedTeamsAreDropped(self):
+        index = AutocompleteIndex(timeout=60, max_teams=2)
+        for team in self.teams:
+            index.search(team.id, "ticket", [TICKETS])
+
+        self.assertFalse(index.loaded(self.teams[0].id))
+        self.assertTrue(index.loaded(self.teams[2].id))
+
+    def testTimeout(self):
+        index = AutocompleteIndex(timeout=10, max_teams=10, background=False)
+        team = self.teams[0]
+
+        with mock.patch("api.autocomplete.time.monotonic", return_value=100):
+            index.search(team.id, "ticket", [TICKETS])
+        Ticket.objects.filter(team=team).update(title="renamed")
+
+        with mock.patch("api.autocomplete.time.monotonic", return_value=105):
+            self.assertEqual(
+                len(index.search(team.id, "ticket", [TICKETS])[TICKETS]), 1
+            )
+        with mock.patch("api.autocomplete.time.monotonic", return_value=111):
+            self.assertEqual(index.search(team.id, "ticket", [TICKETS])[TICKETS], [])
+
+
+class AutocompleteRebuildTestCase(TransactionTestCase):
+    def testExpiredIndexIsServedWhileRebuilding(self):
+        team = generateArbitraryTeams(1)[0]
+        ticket = Ticket.objects.create(team=team, title="original title")
+        index = AutocompleteIndex(timeout=10, max_teams=10)
+
+        with mock.patch("api.autocomplete.time.monotonic", return_value=100):
+            index.search(team.id, "original", [TICKETS])
+        Ticket.objects.filter(pk=ticket.pk).update(title="renamed title")
+
+        with mock.patch("api.autocomplete.time.monotonic", return_value=200):
+            stale = index.search(team.id, "original", [TICKETS])[TICKETS]
+        self.assertEqual([key for key, _, _ in stale], [ticket.pk])
+
+        deadline = time.monotonic() + 5
+        while index.search(team.id, "original", [TICKETS])[TICKETS]:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual(len(index.search(team.id, "renamed", [TICKETS])[TICKETS]), 1)
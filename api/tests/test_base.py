@@ -1,11 +1,20 @@
-from django.test import TestCase
+from django.test import (
+    TestCase as DjangoTestCase,
+    TransactionTestCase,
+    override_settings,
+)
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.urls import reverse
 from django.conf import settings
+from django.db import connection, close_old_connections, OperationalError
+from django.test.utils import CaptureQueriesContext
 import random
 import string
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
 from api.models import (
     Ticket,
@@ -16,12 +25,21 @@ from api.models import (
     TicketTag,
     TicketNode,
     PinnedTicket,
+    TeamInvite,
+    TeamCounter,
+    Event,
+    ticket_tags_changed,
 )
+from api.membership_cache import membership_cache
+from api.autocomplete import autocomplete_index
+from api.response_cache import response_cache
+from api.ticket_stats import stats_cache
 from ..serializers import (
     UserSerializer,
     TicketStatusSerializer,
     TagSerializer,
     TicketSerializer,
+    TicketDetailSerializer,
     MemberSerializer,
     TeamSerializer,
 )
@@ -37,6 +55,21 @@ Base class for all team related tests, querying CRUD operations
 """
 
 
+@override_settings(EVENT_WRITER={"MODE": "sync"})
+class TestCase(DjangoTestCase):
+    """
+    Clears the process wide caches, which outlive the transaction each test
+    is rolled back in, and writes events synchronously so tests can see them
+    """
+
+    def _pre_setup(self):
+        super()._pre_setup()
+        membership_cache.clear()
+        autocomplete_index.clear()
+        response_cache.clear()
+        stats_cache.clear()
+
+
 def randomString(length: int) -> str:
     return "".join(random.choice(string.ascii_letters) for _ in range(length))
 
@@ -119,6 +152,47 @@ def generateArbitraryTickets(
     return tickets
 
 
+# attempts of a concurrent write at a locked database, a millisecond apart
+LOCK_RETRIES = 5000
+
+
+def createTicketsConcurrently(team, writers: int, tickets_per_writer: int) -> list:
+    """
+    Creates tickets from several threads at once, each with its own database
+    connection, and returns the ticket numbers they were given
+    """
+
+    def write(_):
+        numbers = []
+        try:
+            for _ in range(tickets_per_writer):
+                # sqlite only allows one writer at a time, so retry on locks,
+                # failing rather than hanging when a lock is never released
+                for attempt in range(LOCK_RETRIES):
+                    try:
+                        ticket = Ticket.objects.create(
+                            team=team, title=randomString(10)
+                        )
+                        break
+                    except OperationalError:
+                        if attempt == LOCK_RETRIES - 1:
+                            raise
+                        time.sleep(0.001)
+                numbers.append(ticket.ticket_number)
+        finally:
+            close_old_connections()
+            connection.close()
+        return numbers
+
+    # locks also fail some search reindexing, which only leaves it stale
+    with mock.patch("api.ticket_search.logger"), ThreadPoolExecutor(
+        max_workers=writers
+    ) as executor:
+        results = list(executor.map(write, range(writers)))
+
+    return [number for numbers in results for number in numbers]
+
+
 class TeamRelatedCore(TestCase):
     prefix = ""
     model = None
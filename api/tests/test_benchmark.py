@@ -0,0 +1,714 @@
+import json
+import os
+from time import perf_counter
+from unittest import skipUnless
+
+from django.utils import timezone
+
+from .test_base import *
+from api.models import Event
+from api.team_counters import reconcile_counters
+from api.ticket_rollups import rebuild_rollups
+from api.ticket_search import reindex_tickets
+from api.autocomplete import autocomplete_index
+
+"""
+Query count, latency and payload size benchmarks for every REST endpoint,
+run against a team seeded with SLUGGO_BENCHMARK_TICKETS tickets (10k by
+default). Skipped unless SLUGGO_BENCHMARK=True, since seeding is slow:
+
+    SLUGGO_BENCHMARK=True python manage.py test api.tests.test_benchmark
+
+Each endpoint fails when it runs more queries, returns a larger payload, or
+takes more than SLUGGO_BENCHMARK_TIME_TOLERANCE times longer than recorded in
+benchmark_baseline.json. Run with SLUGGO_BENCHMARK_UPDATE=True to record a new
+baseline after an intended change.
+"""
+
+BENCHMARK = os.environ.get("SLUGGO_BENCHMARK") == "True"
+UPDATE_BASELINE = os.environ.get("SLUGGO_BENCHMARK_UPDATE") == "True"
+TICKET_COUNT = int(os.environ.get("SLUGGO_BENCHMARK_TICKETS", 10000))
+TIME_TOLERANCE = float(os.environ.get("SLUGGO_BENCHMARK_TIME_TOLERANCE", 2.0))
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmark_baseline.json")
+
+MEMBER_COUNT = 50
+TAG_COUNT = 50
+TAGS_PER_TICKET = 3
+EVENT_COUNT = 1000
+# the moved subtree holds 1 + width + width² tickets
+MOVE_TREE_WIDTH = int(os.environ.get("SLUGGO_BENCHMARK_MOVE_WIDTH", 100))
+USER_PINS = 200
+REPEAT = 5
+BATCH_SIZE = 1000
+
+
+def seedBenchmarkTeam(owner, ticket_count: int = TICKET_COUNT) -> Team:
+    """
+    Seeds a team with tickets, statuses, tags, members, pins, events and
+    invites using bulk inserts. The owner is an admin member of the team
+    """
+    team = Team.objects.create(name=f"benchmark-{randomString(10)}")
+    owner_member = Member.objects.create(team=team, owner=owner, role="AD")
+    statuses = list(TicketStatus.objects.filter(team=team))
+
+    usernames = [f"benchmark-{team.id}-{i}" for i in range(MEMBER_COUNT * 2)]
+    User.objects.bulk_create(
+        [User(username=name, email=f"{name}@sluggo.org") for name in usernames]
+    )
+    users = list(User.objects.filter(username__in=usernames).order_by("id"))
+    member_users, invited_users = users[:MEMBER_COUNT], users[MEMBER_COUNT:]
+
+    def prepared(instances):
+        # bulk_create skips save(), which is where the ids are derived
+        for instance in instances:
+            instance._pre_create()
+        return instances
+
+    Member.objects.bulk_create(
+        prepared([Member(team=team, owner=user) for user in member_users])
+    )
+    members = [owner_member, *Member.objects.filter(owner__in=member_users)]
+
+    Tag.objects.bulk_create(
+        prepared([Tag(team=team, title=f"tag-{i}") for i in range(TAG_COUNT)])
+    )
+    tags = list(Tag.objects.filter(team=team))
+
+    Ticket.objects.bulk_create(
+        [
+            Ticket(
+                team=team,
+                ticket_number=i + 1,
+                title=randomString(20),
+                description=randomString(200),
+                status=statuses[i % len(statuses)],
+                assigned_user=members[i % len(members)],
+            )
+            for i in range(ticket_count)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    Team.objects.filter(pk=team.pk).update(ticket_head=ticket_count)
+    tickets = list(Ticket.objects.filter(team=team).order_by("id"))
+
+    TicketTag.objects.bulk_create(
+        prepared(
+            [
+                TicketTag(team=team, ticket=ticket, tag=tags[(i + offset) % len(tags)])
+                for i, ticket in enumerate(tickets)
+                for offset in range(TAGS_PER_TICKET)
+            ]
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+    pins = [
+        PinnedTicket(team=team, member=owner_member, ticket=ticket)
+        for ticket in tickets[:USER_PINS]
+    ]
+    pins += [
+        PinnedTicket(team=team, member=member, ticket=tickets[i])
+        for i, member in enumerate(members[1:])
+    ]
+    PinnedTicket.objects.bulk_create(prepared(pins), batch_size=BATCH_SIZE)
+
+    Event.objects.bulk_create(
+        [
+            Event(
+                team=team,
+                user=owner,
+                event_type=Event.UPDATE,
+                description=randomString(50),
+                object=tickets[i % len(tickets)].object_uuid,
+            )
+            for i in range(EVENT_COUNT)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    TeamInvite.objects.bulk_create(
+        [TeamInvite(team=team, user=user) for user in invited_users]
+    )
+
+    return Team.objects.get(pk=team.pk)
+
+
+@skipUnless(BENCHMARK, "set SLUGGO_BENCHMARK=True to run the endpoint benchmarks")
+@override_settings(EVENT_WRITER={"MODE": "buffered"})
+class EndpointBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(**TeamRelatedCore.user_dict)
+        cls.team = seedBenchmarkTeam(cls.user)
+        cls.member = Member.objects.get(team=cls.team, owner=cls.user)
+        cls.ticket = Ticket.objects.filter(team=cls.team).order_by("-id").first()
+        cls.status = TicketStatus.objects.filter(team=cls.team).first()
+        cls.tag = Tag.objects.filter(team=cls.team).first()
+        cls.event = Event.objects.filter(team=cls.team).first()
+        cls.pin = PinnedTicket.objects.filter(member=cls.member).first()
+        cls.invite = TeamInvite.objects.create(
+            team=Team.objects.create(name=randomString(10)), user=cls.user
+        )
+        # the seed uses bulk inserts, which the search index and the team
+        # counters do not see
+        reindex_tickets(None)
+        reconcile_counters(cls.team.id)
+
+    @classmethod
+    def setUpClass(cls):
+        # set outside of setUpTestData, which copies its attributes per test
+        with open(BASELINE_PATH) as baseline_file:
+            cls.baseline = json.load(baseline_file)
+        cls.results = {}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE_BASELINE and cls.results:
+            baseline = {**cls.baseline, **cls.results}
+            with open(BASELINE_PATH, "w") as baseline_file:
+                json.dump(baseline, baseline_file, indent=4, sort_keys=True)
+                baseline_file.write("\n")
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.counter = 0
+
+    def team_url(self, prefix, pk=None, **kwargs):
+        kwargs[TEAM_PK] = self.team.id
+        if pk is None:
+            return reverse(prefix + "-list", kwargs=kwargs)
+        return reverse(prefix + "-detail", kwargs={**kwargs, "pk": pk})
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f"{prefix}-{self.counter}"
+
+    def endpoints(self):
+        """
+        (name, method, url, data factory, expected status) for every endpoint
+        """
+        ticket, member = self.ticket.pk, self.member.pk
+        return [
+            ("teams-list", "get", reverse("team-list"), None, 200),
+            (
+                "teams-detail",
+                "get",
+                reverse("team-detail", args=[self.team.id]),
+                None,
+                200,
+            ),
+            ("tickets-list", "get", self.team_url("team-tickets"), None, 200),
+            (
+                "tickets-list-cursor",
+                "get",
+                self.team_url("team-tickets") + "?pagination=cursor",
+                None,
+                200,
+            ),
+            (
+                "tickets-list-board",
+                "get",
+                self.team_url("team-tickets")
+                + "?fields=id,ticket_number,title,status.id,assigned_user.id",
+                None,
+                200,
+            ),
+            (
+                "tickets-export",
+                "get",
+                reverse("team-tickets-export", kwargs={TEAM_PK: self.team.id}),
+                None,
+                200,
+            ),
+            (
+                "tickets-stats",
+                "get",
+                reverse("team-tickets-stats", kwargs={TEAM_PK: self.team.id}),
+                None,
+                200,
+            ),
+            (
+                "tickets-board",
+                "get",
+                reverse("team-tickets-board", kwargs={TEAM_PK: self.team.id}),
+                None,
+                200,
+            ),
+            (
+                "tickets-list-board-pks",
+                "get",
+                self.team_url("team-tickets")
+                + "?fields=id,ticket_number,title,status,assigned_user,tag_list"
+                + "&expand=",
+                None,
+                200,
+            ),
+            (
+                "tickets-search",
+                "get",
+                self.team_url("team-tickets") + f"?q={self.ticket.title}",
+                None,
+                200,
+            ),
+            ("tickets-detail", "get", self.team_url("team-tickets", ticket), None, 200),
+            (
+                "tickets-create",
+                "post",
+                self.team_url("team-tickets"),
+                lambda: {
+                    "title": self.unique("ticket"),
+                    "status": self.status.pk,
+                    "assigned_user": member,
+                    "tag_list": [self.tag.pk],
+                },
+                201,
+            ),
+            (
+                "tickets-update",
+                "patch",
+                self.team_url("team-tickets", ticket),
+                lambda: {"title": self.unique("ticket"), "tag_list": [self.tag.pk]},
+                200,
+            ),
+            (
+                "tickets-bulk-create",
+                "post",
+                reverse("team-tickets-bulk", kwargs={TEAM_PK: self.team.id}),
+                lambda: [
+                    {
+                        "title": self.unique("ticket"),
+                        "status": self.status.pk,
+                        "tag_list": [self.tag.pk],
+                    }
+                    for _ in range(100)
+                ],
+                201,
+            ),
+            ("members-list", "get", self.team_url("team-members"), None, 200),
+            ("members-detail", "get", self.team_url("team-members", member), None, 200),
+            ("statuses-list", "get", self.team_url("team-statuses"), None, 200),
+            (
+                "statuses-create",
+                "post",
+                self.team_url("team-statuses"),
+                lambda: {"title": self.unique("status")},
+                201,
+            ),
+            ("tags-list", "get", self.team_url("team-tags"), None, 200),
+            (
+                "tags-create",
+                "post",
+                self.team_url("team-tags"),
+                lambda: {"title": self.unique("new-tag")},
+                201,
+            ),
+            ("events-list", "get", self.team_url("team-events"), None, 200),
+            (
+                "events-list-cursor",
+                "get",
+                self.team_url("team-events") + "?pagination=cursor",
+                None,
+                200,
+            ),
+            (
+                "events-detail",
+                "get",
+                self.team_url("team-events", self.event.pk),
+                None,
+                200,
+            ),
+            ("invites-list", "get", self.team_url("team-invites"), None, 200),
+            (
+                "pinned-tickets-list",
+                "get",
+                self.team_url("pinned-tickets", member_pk=member),
+                None,
+                200,
+            ),
+            (
+                "pinned-tickets-detail",
+                "get",
+                self.team_url("pinned-tickets", self.pin.pk, member_pk=member),
+                None,
+                200,
+            ),
+            (
+                "user-pinned-tickets",
+                "get",
+                reverse("user-pinned-tickets-list"),
+                None,
+                200,
+            ),
+            (
+                "user-assigned-tickets",
+                "get",
+                reverse("user-assigned-tickets-list"),
+                None,
+                200,
+            ),
+            ("user-invites", "get", reverse("user-invites-list"), None, 200),
+            ("user-teams", "get", reverse("user-teams-list"), None, 200),
+        ]
+
+    def measure(self, method, url, data, expected_status) -> dict:
+        def request():
+            response = getattr(self.client, method)(
+                url, data=data() if data else None, format="json"
+            )
+            if response.streaming:
+                # streamed bodies are only produced while being read
+                response.body = b"".join(response.streaming_content)
+            else:
+                response.body = response.content
+            self.assertEqual(response.status_code, expected_status, response.body)
+            return response
+
+        # warm up, so that per process caches do not count against the endpoint
+        request()
+
+        timings = []
+        for _ in range(REPEAT):
+            with CaptureQueriesContext(connection) as context:
+                start = perf_counter()
+                response = request()
+                timings.append(perf_counter() - start)
+
+        return {
+            "queries": len(context.captured_queries),
+            "time_ms": round(min(timings) * 1000, 3),
+            "bytes": len(response.body),
+        }
+
+    def assertWithinBaseline(self, name, result):
+        baseline = self.baseline.get(name)
+        if baseline is None:
+            print(f"\n{name}: no baseline recorded, {result}")
+            return
+
+        self.assertLessEqual(result["queries"], baseline["queries"], name)
+        self.assertLessEqual(result["bytes"], baseline["bytes"], name)
+        self.assertLessEqual(
+            result["time_ms"], baseline["time_ms"] * TIME_TOLERANCE, name
+        )
+
+    def testEndpoints(self):
+        for name, method, url, data, expected_status in self.endpoints():
+            with self.subTest(endpoint=name):
+                result = self.measure(method, url, data, expected_status)
+                self.results[name] = result
+                print(
+                    f"\n{name:24} {result['queries']:4} queries "
+                    f"{result['time_ms']:10.3f} ms {result['bytes']:8} bytes",
+                    end="",
+                )
+
+                if not UPDATE_BASELINE:
+                    self.assertWithinBaseline(name, result)
+
+
+@skipUnless(BENCHMARK, "set SLUGGO_BENCHMARK=True to run the endpoint benchmarks")
+class TicketNumberStressBenchmark(TransactionTestCase):
+    """
+    Many parallel writers creating tickets in the same team, reporting the
+    throughput and checking that no ticket number was handed out twice
+    """
+
+    writers = 16
+    tickets_per_writer = 100
+
+    def testParallelWriters(self):
+        team = generateArbitraryTeams(1)[0]
+
+        start = perf_counter()
+        numbers = createTicketsConcurrently(team, self.writers, self.tickets_per_writer)
+        elapsed = perf_counter() - start
+
+        expected = self.writers * self.tickets_per_writer
+        print(
+            f"\n{self.writers} writers created {expected} tickets in "
+            f"{elapsed:.3f} s, {expected / elapsed:.1f} tickets/s",
+            end="",
+        )
+        self.assertEqual(sorted(numbers), list(range(1, expected + 1)))
+        self.assertEqual(
+            Ticket.objects.filter(team=team).values("ticket_number").distinct().count(),
+            expected,
+        )
+
+
+@skipUnless(BENCHMARK, "set SLUGGO_BENCHMARK=True to run the endpoint benchmarks")
+class QueryPlanBenchmark(TestCase):
+    """
+    EXPLAIN plans and timings of the team scoped access patterns, first with
+    the model indexes and then with them dropped, which the test transaction
+    rolls back. Several teams are seeded and half of the tickets deactivated,
+    so that the team and active filters are selective
+    """
+
+    teams = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(**TeamRelatedCore.user_dict)
+        cls.team = seedBenchmarkTeam(cls.user)
+        for _ in range(cls.teams - 1):
+            seedBenchmarkTeam(cls.user)
+
+        Ticket.objects.filter(ticket_number__gt=TICKET_COUNT // 2).update(
+            deactivated=timezone.now()
+        )
+        cls.member = Member.objects.filter(team=cls.team).last()
+        cls.status = TicketStatus.objects.filter(team=cls.team).first()
+
+    def patterns(self):
+        """
+        (name, queryset, index expected in the plan) for each access pattern
+        """
+        team, member = self.team, self.member
+        return [
+            (
+                "ticket-retrieve-by-user",
+                Ticket.retrieve_by_user(member, team),
+                "ticket_active_assigned_idx",
+            ),
+            (
+                "ticket-status-filter",
+                Ticket.objects.filter(team=team, status=self.status)[:PAGE_SIZE],
+                "ticket_team_status_idx",
+            ),
+            (
+                "ticket-created-order",
+                Ticket.objects.filter(team=team).order_by("created", "id")[:PAGE_SIZE],
+                "ticket_team_created_idx",
+            ),
+            (
+                "ticket-active",
+                Ticket.objects.filter(team=team, deactivated=None)[:PAGE_SIZE],
+                "ticket_active_idx",
+            ),
+            (
+                "event-list",
+                Event.objects.filter(team=team).order_by("-created", "-id")[:PAGE_SIZE],
+                "event_team_created_idx",
+            ),
+            (
+                "pinned-tickets",
+                PinnedTicket.objects.filter(team=team, member=member),
+                "pinned_team_member_idx",
+            ),
+            (
+                "member-list",
+                Member.objects.filter(team=team).order_by("created")[:PAGE_SIZE],
+                "member_team_created_idx",
+            ),
+        ]
+
+    @staticmethod
+    def indexes():
+        return [
+            index.name
+            for model in (Ticket, Event, PinnedTicket, Member)
+            for index in model._meta.indexes
+        ]
+
+    @staticmethod
+    def measure(queryset):
+        timings = []
+        for _ in range(REPEAT):
+            start = perf_counter()
+            list(queryset.all())
+            timings.append((perf_counter() - start) * 1000)
+        return queryset.explain(), min(timings)
+
+    def testPlans(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        after = {name: self.measure(qs) for name, qs, _ in self.patterns()}
+        with connection.cursor() as cursor:
+            for index in self.indexes():
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(index)}")
+            cursor.execute("ANALYZE")
+        before = {name: self.measure(qs) for name, qs, _ in self.patterns()}
+
+        for name, _, index in self.patterns():
+            with self.subTest(pattern=name):
+                print(
+                    f"\n{name:24} {before[name][1]:10.3f} ms before "
+                    f"{after[name][1]:10.3f} ms after"
+                    f"\n  before: {before[name][0]}\n  after:  {after[name][0]}",
+                    end="",
+                )
+                self.assertIn(index, after[name][0])
+
+
+@skipUnless(BENCHMARK, "set SLUGGO_BENCHMARK=True to run the endpoint benchmarks")
+class AutocompleteBenchmark(TestCase):
+    """
+    Autocomplete lookups on a team of AUTOCOMPLETE_TICKETS tickets, whose
+    titles are drawn from a vocabulary with a skewed word frequency so that
+    some trigrams are very common. Each lookup should take single digit
+    milliseconds once the index is built
+    """
+
+    tickets = int(os.environ.get("SLUGGO_BENCHMARK_AUTOCOMPLETE_TICKETS", 100000))
+    vocabulary = 2000
+    lookups = 50
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(**TeamRelatedCore.user_dict)
+        cls.team = Team.objects.create(name=f"benchmark-{randomString(10)}")
+        Member.objects.create(team=cls.team, owner=cls.user, role="AD")
+
+        rng = random.Random(0)
+        cls.words = [
+            randomString(rng.randint(3, 9)).lower() for _ in range(cls.vocabulary)
+        ]
+        weights = [1 / (rank + 1) for rank in range(cls.vocabulary)]
+        Ticket.objects.bulk_create(
+            [
+                Ticket(
+                    team=cls.team,
+                    ticket_number=i + 1,
+                    title=" ".join(
+                        rng.choices(cls.words, weights, k=rng.randint(3, 7))
+                    ),
+                )
+                for i in range(cls.tickets)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+    def queries(self):
+        # a misspelled common word followed by the start of another word
+        rng = random.Random(1)
+        for _ in range(self.lookups):
+            word = rng.choice(self.words[:300])
+            if len(word) > 4:
+                word = word[:2] + word[3:]
+            yield f"{word} {rng.choice(self.words)[:3]}"
+
+    def testLookups(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse("team-autocomplete-list", kwargs={TEAM_PK: self.team.id})
+
+        start = perf_counter()
+        client.get(url, {"q": "warm up"})
+        build_ms = (perf_counter() - start) * 1000
+
+        index, request = [], []
+        for query in self.queries():
+            start = perf_counter()
+            autocomplete_index.search(self.team.id, query, ["tickets"])
+            index.append((perf_counter() - start) * 1000)
+
+            start = perf_counter()
+            response = client.get(url, {"q": query, "kinds": "tickets"})
+            request.append((perf_counter() - start) * 1000)
+            self.assertEqual(response.status_code, 200)
+
+        index.sort()
+        request.sort()
+        p95 = int(len(index) * 0.95)
+        print(
+            f"\nautocomplete over {self.tickets} tickets: built in {build_ms:.0f} ms, "
+            f"lookup p50 {index[len(index) // 2]:.3f} ms p95 {index[p95]:.3f} ms, "
+            f"request p50 {request[len(request) // 2]:.3f} ms "
+            f"p95 {request[p95]:.3f} ms",
+            end="",
+        )
+        self.assertLess(index[p95], 10 * TIME_TOLERANCE)
+
+
+def seedHierarchy(team, width: int = MOVE_TREE_WIDTH) -> dict:
+    """
+    Seeds two roots, the first holding a subtree of 1 + width + width²
+    tickets, with bulk inserts of the tickets and of their nodes, whose
+    paths are computed here. Returns the tickets of the roots and the top
+    of the subtree
+    """
+    count = 3 + width + width * width
+    tickets = iter(
+        Ticket.bulk_create_numbered(
+            team, [Ticket(title=randomString(20)) for _ in range(count)]
+        )
+    )
+
+    nodes = []
+
+    def add(parent_path, depth, step, numchild=0):
+        path = TicketNode._get_path(parent_path, depth, step)
+        nodes.append(
+            TicketNode(ticket=next(tickets), path=path, depth=depth, numchild=numchild)
+        )
+        return nodes[-1]
+
+    first = add(None, 1, 1, numchild=1)
+    second = add(None, 1, 2)
+    top = add(first.path, 2, 1, numchild=width)
+    for i in range(1, width + 1):
+        child = add(top.path, 3, i, numchild=width)
+        for j in range(1, width + 1):
+            add(child.path, 4, j)
+
+    TicketNode.objects.bulk_create(nodes, batch_size=BATCH_SIZE)
+    rebuild_rollups(team.id)
+    return {"first": first.ticket, "second": second.ticket, "top": top.ticket}
+
+
+@skipUnless(BENCHMARK, "set SLUGGO_BENCHMARK=True to run the endpoint benchmarks")
+@override_settings(EVENT_WRITER={"MODE": "buffered"})
+class TicketMoveBenchmark(TestCase):
+    """
+    Batch moves of a large subtree between roots, reporting their latency
+    and checking that their queries do not grow with the subtree
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(**TeamRelatedCore.user_dict)
+        cls.team = Team.objects.create(name=f"benchmark-{randomString(10)}")
+        Member.objects.create(team=cls.team, owner=cls.user, role="AD")
+        cls.tickets = seedHierarchy(cls.team)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def move(self, ticket, parent) -> tuple:
+        with CaptureQueriesContext(connection) as context:
+            start = perf_counter()
+            response = self.client.post(
+                reverse("team-tickets-move", kwargs={TEAM_PK: self.team.id}),
+                [{"id": ticket.id, "parent_id": parent.id}],
+                format="json",
+            )
+            elapsed = perf_counter() - start
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return len(context.captured_queries), elapsed
+
+    def testMoveSubtree(self):
+        first, second, top = (self.tickets[k] for k in ["first", "second", "top"])
+        size = TicketNode.objects.filter(
+            path__startswith=TicketNode.of(top).path
+        ).count()
+
+        timings = []
+        for parent in [second, first] * (REPEAT // 2 + 1):
+            queries, elapsed = self.move(top, parent)
+            timings.append(elapsed)
+        print(
+            f"\nmoving {size} nodes: {queries} queries, "
+            f"{min(timings) * 1000:.3f} ms",
+            end="",
+        )
+
+        # a single ticket moves with as many queries as the whole subtree
+        leaf = TicketNode.objects.filter(depth=4).order_by("-path")[0]
+        self.assertEqual(self.move(leaf.ticket, second)[0], queries)
+        self.assertEqual(TicketNode.find_problems(), ([], [], [], [], []))
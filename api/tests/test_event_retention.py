@@ -0,0 +1,136 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from api.models import EventArchive
+from .test_base import *
+
+
+class EventRetentionTestCase(TestCase):
+    def setUp(self):
+        self.default_team, self.short_team = generateArbitraryTeams(2)
+        self.short_team.event_retention_days = 7
+        self.short_team.save()
+        self.user = generateArbitraryUsers(1)[0]
+        # midday, so events a few minutes apart fall on the same day
+        self.now = timezone.now().replace(hour=12)
+
+    def createEvents(self, team, age_days, count=1):
+        return Event.objects.bulk_create(
+            [
+                Event(
+                    team=team,
+                    user=self.user,
+                    event_type=Event.UPDATE,
+                    description=f"event {i}",
+                    object=team.object_uuid,
+                    created=self.now - timedelta(days=age_days, minutes=i),
+                )
+                for i in range(count)
+            ]
+        )
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command("archive_events", *args, stdout=out)
+        return out.getvalue()
+
+    def testExpiredUsesTeamRetention(self):
+        self.createEvents(self.default_team, 30)
+        self.createEvents(self.default_team, 400)
+        self.createEvents(self.short_team, 3)
+        self.createEvents(self.short_team, 30)
+
+        expired = Event.expired(365, now=self.now)
+        self.assertEqual(
+            sorted(expired.values_list("team_id", "description")),
+            sorted(
+                [(self.default_team.id, "event 0"), (self.short_team.id, "event 0")]
+            ),
+        )
+        self.assertEqual(
+            list(Event.expired(None, now=self.now).values_list("team_id", flat=True)),
+            [self.short_team.id],
+        )
+
+    def testArchivesInChunks(self):
+        self.createEvents(self.short_team, 10, count=5)
+        kept = self.createEvents(self.short_team, 1, count=2)
+
+        output = self.archive("--chunk-size", "2")
+
+        self.assertIn("archived 5 events in 3 chunks", output)
+        self.assertEqual(
+            sorted(Event.objects.values_list("id", flat=True)),
+            sorted(event.id for event in kept),
+        )
+
+        # all five were created on the same day, a row for each chunk
+        archives = EventArchive.objects.filter(team=self.short_team)
+        self.assertEqual([archive.event_count for archive in archives], [2, 2, 1])
+        events = EventArchive.events_of(self.short_team.id, archives[0].day)
+        self.assertEqual(len(events), 5)
+        self.assertEqual(events, sorted(events))
+        created, event_type, user_id, obj, description = events[0]
+        self.assertEqual(
+            (event_type, user_id, obj),
+            (Event.UPDATE, self.user.id, str(self.short_team.object_uuid)),
+        )
+
+    def testDryRunAndTeamFilter(self):
+        self.createEvents(self.default_team, 400, count=2)
+        self.createEvents(self.short_team, 30, count=3)
+
+        self.assertIn("5 events would be archived", self.archive("--dry-run"))
+        self.assertEqual(Event.objects.count(), 5)
+
+        self.archive("--team", str(self.default_team.id))
+        self.assertEqual(
+            set(Event.objects.values_list("team_id", flat=True)),
+            {self.short_team.id},
+        )
+
+    def testArchiveToFile(self):
+        self.createEvents(self.short_team, 10, count=3)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "events.jsonl.gz")
+            self.archive("--file", path)
+            with gzip.open(path, "rt") as file:
+                lines = [json.loads(line) for line in file]
+
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0][0], self.short_team.id)
+        self.assertFalse(Event.objects.exists())
+        self.assertFalse(EventArchive.objects.exists())
+
+    def testFileIsSyncedBeforeTheDelete(self):
+        self.createEvents(self.short_team, 10, count=2)
+        calls = []
+        fsync, delete = os.fsync, QuerySet.delete
+
+        def synced(fd):
+            calls.append("fsync")
+            return fsync(fd)
+
+        def deleted(queryset):
+            calls.append("delete")
+            return delete(queryset)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch("os.fsync", side_effect=synced), mock.patch.object(
+                QuerySet, "delete", deleted
+            ):
+                self.archive("--file", os.path.join(directory, "events.jsonl"))
+        self.assertEqual(calls, ["fsync", "delete"])
+
+    def testInvalidRetention(self):
+        with self.assertRaises(CommandError):
+            self.archive("--days", "0")
@@ -0,0 +1,212 @@
+from unittest import mock
+
+from django.db import OperationalError
+
+from api.event_writer import EventWriter
+from .test_base import *
+
+
+class EventRecordingTestCase(TeamRelatedCore):
+    """
+    Mutations through the team related endpoints are recorded as events of
+    the team, made by the requesting user
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.member = Member.objects.get(team=self.team, owner=self.user)
+        self.ticket = generateArbitraryTickets([self.team], 1)[0]
+
+    def url(self, prefix, pk=None, **kwargs):
+        kwargs[TEAM_PK] = self.team.id
+        if pk is None:
+            return reverse(prefix + "-list", kwargs=kwargs)
+        return reverse(prefix + "-detail", kwargs={"pk": pk, **kwargs})
+
+    def assertEvent(self, event_type, instance):
+        event = Event.objects.get(team=self.team, object=instance.object_uuid)
+        self.assertEqual(event.event_type, event_type)
+        self.assertEqual(event.user, self.user)
+        return event
+
+    def testTicketLifecycle(self):
+        response = self.client.post(
+            self.url("team-tickets"), {"title": "new ticket"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ticket = Ticket.objects.get(pk=response.data["id"])
+        event = self.assertEvent(Event.CREATE, ticket)
+        self.assertEqual(event.description, "Created ticket new ticket")
+
+        self.client.patch(
+            self.url("team-tickets", self.ticket.pk), {"title": "x"}, format="json"
+        )
+        self.assertEvent(Event.UPDATE, self.ticket)
+
+        self.client.delete(self.url("team-tickets", ticket.pk))
+        self.assertEqual(
+            list(
+                Event.objects.filter(object=ticket.object_uuid)
+                .order_by("id")
+                .values_list("event_type", flat=True)
+            ),
+            [Event.CREATE, Event.DELETE],
+        )
+
+    def testTagStatusAndPin(self):
+        self.client.post(self.url("team-tags"), {"title": "bug"}, format="json")
+        self.assertEvent(Event.CREATE, Tag.objects.get(title="bug"))
+
+        self.client.post(self.url("team-statuses"), {"title": "qa"}, format="json")
+        self.assertEvent(Event.CREATE, TicketStatus.objects.get(title="qa"))
+
+        response = self.client.post(
+            self.url("pinned-tickets", member_pk=self.member.pk),
+            {"ticket": self.ticket.pk},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEvent(Event.CREATE, PinnedTicket.objects.get(ticket=self.ticket))
+
+    def testMemberUpdate(self):
+        self.client.patch(
+            self.url("team-members", self.member.pk), {"bio": "new"}, format="json"
+        )
+        self.assertEvent(Event.UPDATE, self.member)
+
+    def testDeleteDescription(self):
+        pin = PinnedTicket.objects.create(
+            team=self.team, member=self.member, ticket=self.ticket
+        )
+        self.client.delete(self.url("pinned-tickets", pin.pk, member_pk=self.member.pk))
+
+        event = self.assertEvent(Event.DELETE, pin)
+        self.assertEqual(event.description, f"Deleted pinned ticket {pin.object_uuid}")
+
+    def testBulkUpdate(self):
+        tickets = generateArbitraryTickets([self.team], 3)
+        data = [{"id": ticket.id, "title": "bulk"} for ticket in tickets]
+
+        response = self.client.patch(
+            reverse("team-tickets-bulk", kwargs={TEAM_PK: self.team.id}),
+            data,
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for ticket in tickets:
+            self.assertEvent(Event.UPDATE, ticket)
+
+    def testEventsAreNotRecordedForEvents(self):
+        self.client.patch(
+            self.url("team-tickets", self.ticket.pk), {"title": "x"}, format="json"
+        )
+        event = Event.objects.get(team=self.team)
+
+        self.client.delete(self.url("team-events", event.pk))
+        self.assertFalse(Event.objects.filter(team=self.team).exists())
+
+
+class BufferedEventWriterTestCase(TestCase):
+    def setUp(self):
+        self.team = generateArbitraryTeams(1)[0]
+        self.tickets = generateArbitraryTickets([self.team], 5)
+        self.writer = EventWriter(mode="buffered", batch_size=3, flush_interval=60)
+
+        # flushing is driven by hand here, see the thread test below
+        patcher = mock.patch.object(self.writer, "start")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def testBufferedUntilCommit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.writer.record(Event.CREATE, self.tickets[0])
+        self.assertEqual(self.writer.pending, 0)
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.writer.pending, 1)
+        self.assertFalse(Event.objects.exists())
+
+    def testFlushIsOneInsert(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer.record(Event.UPDATE, self.tickets[:2])
+            self.writer.record(Event.DELETE, self.tickets[2])
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.writer.flush(), 3)
+        self.assertEqual(len(context.captured_queries), 1)
+
+        self.assertEqual(self.writer.pending, 0)
+        self.assertEqual(Event.objects.filter(team=self.team).count(), 3)
+
+    def testFullBufferWakesTheWriter(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer.record(Event.CREATE, self.tickets[:2])
+        self.assertFalse(self.writer._wakeup.is_set())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer.record(Event.CREATE, self.tickets[2])
+        self.assertTrue(self.writer._wakeup.is_set())
+
+    def testRecordedTimeIsKept(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.writer.record(Event.CREATE, self.tickets[0])
+        recorded = self.writer._buffer[0].created
+
+        self.writer.flush()
+        self.assertEqual(Event.objects.get().created, recorded)
+
+
+class EventWriterThreadTestCase(TransactionTestCase):
+    def testFlushesOnInterval(self):
+        team = generateArbitraryTeams(1)[0]
+        tickets = generateArbitraryTickets([team], 3)
+        writer = EventWriter(mode="buffered", batch_size=100, flush_interval=0.01)
+
+        # outside of a transaction the events are queued straight away
+        writer.record(Event.CREATE, tickets)
+        try:
+            deadline = time.monotonic() + 5
+            while Event.objects.count() < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            writer.stop()
+
+        self.assertEqual(Event.objects.filter(team=team).count(), 3)
+        self.assertEqual(writer.pending, 0)
+
+
+class EventWriterFailureTestCase(TransactionTestCase):
+    # the foreign keys are only checked once the inserts commit
+    def testRejectedEventsAreDroppedAlone(self):
+        teams = generateArbitraryTeams(2)
+        tickets = generateArbitraryTickets(teams, 2)
+        writer = EventWriter(mode="buffered", batch_size=100, flush_interval=60)
+        with mock.patch.object(writer, "start"):
+            writer.record(Event.CREATE, tickets)
+
+        deleted = tickets[0].team
+        deleted.delete()
+        with self.assertLogs("api.event_writer", "WARNING"):
+            self.assertEqual(writer.flush(), 2)
+
+        self.assertEqual(Event.objects.count(), 2)
+        self.assertFalse(Event.objects.filter(team_id=deleted.id).exists())
+        self.assertEqual(writer.pending, 0)
+
+    def testFailedBatchesAreKept(self):
+        team = generateArbitraryTeams(1)[0]
+        tickets = generateArbitraryTickets([team], 3)
+        writer = EventWriter(mode="buffered", batch_size=100, flush_interval=60)
+        with mock.patch.object(writer, "start"):
+            writer.record(Event.CREATE, tickets)
+
+        with mock.patch.object(
+            Event.objects, "bulk_create", side_effect=OperationalError
+        ):
+            with self.assertRaises(OperationalError):
+                writer.flush()
+        self.assertEqual(writer.pending, 3)
+
+        self.assertEqual(writer.flush(), 3)
+        self.assertEqual(Event.objects.filter(team=team).count(), 3)
@@ -0,0 +1,134 @@
+from unittest import mock
+
+from api.membership_cache import MembershipCache, NOT_A_MEMBER
+from .test_base import *
+
+
+class MembershipCacheTestCase(TestCase):
+    def setUp(self):
+        self.team = generateArbitraryTeams(1)[0]
+        self.users = generateArbitraryUsers(3)
+        self.members = [
+            Member.objects.create(team=self.team, owner=user) for user in self.users
+        ]
+
+    def testLeastRecentlyUsedEviction(self):
+        cache = MembershipCache(timeout=60, max_entries=2)
+        first, second, third = self.members
+
+        cache.set(self.team, first.owner_id, first)
+        cache.set(self.team, second.owner_id, second)
+
+        # touching the first entry leaves the second as least recently used
+        self.assertEqual(cache.get(self.team, first.owner_id).pk, first.pk)
+        cache.set(self.team, third.owner_id, third)
+
+        self.assertIsNone(cache.get(self.team, second.owner_id))
+        self.assertEqual(cache.get(self.team, first.owner_id).pk, first.pk)
+        self.assertEqual(cache.get(self.team, third.owner_id).pk, third.pk)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def testTimeout(self):
+        cache = MembershipCache(timeout=10, max_entries=10)
+        member = self.members[0]
+
+        with mock.patch("api.versioned_cache.time.monotonic", return_value=100):
+            cache.set(self.team, member.owner_id, member)
+        with mock.patch("api.versioned_cache.time.monotonic", return_value=105):
+            self.assertIsNotNone(cache.get(self.team, member.owner_id))
+        with mock.patch("api.versioned_cache.time.monotonic", return_value=111):
+            self.assertIsNone(cache.get(self.team, member.owner_id))
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["entries"], 0)
+
+    def testReturnsCopies(self):
+        cache = MembershipCache(timeout=60, max_entries=10)
+        member = self.members[0]
+        cache.set(self.team, member.owner_id, member)
+
+        cache.get(self.team, member.owner_id).role = Member.Roles.ADMIN
+        self.assertEqual(
+            cache.get(self.team, member.owner_id).role, Member.Roles.APPROVED
+        )
+
+    def testSignalsInvalidate(self):
+        member = self.members[0]
+        membership_cache.set(self.team, member.owner_id, member)
+
+        member.role = Member.Roles.ADMIN
+        member.save()
+        self.assertIsNone(membership_cache.get(self.team, member.owner_id))
+
+        membership_cache.set(self.team, member.owner_id, member)
+        member.delete()
+        self.assertIsNone(membership_cache.get(self.team, member.owner_id))
+
+    def testStaleOnceTheTeamChanges(self):
+        # the cache of another process, which signals do not reach
+        cache = MembershipCache(timeout=60, max_entries=10)
+        member = self.members[0]
+        cache.set(self.team, member.owner_id, member)
+        self.assertIsNotNone(cache.get(self.team, member.owner_id))
+
+        member.role = Member.Roles.ADMIN
+        member.save()
+        team = Team.objects.get(pk=self.team.pk)
+        self.assertIsNone(cache.get(team, member.owner_id))
+
+        cache.set(team, member.owner_id, member)
+        member.delete()
+        self.assertIsNone(cache.get(Team.objects.get(pk=team.pk), member.owner_id))
+
+
+class MembershipCacheRequestTestCase(TeamRelatedCore):
+    def url(self):
+        return reverse("team-tickets-list", kwargs={TEAM_PK: self.team.id})
+
+    def memberLookups(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url(), format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            query
+            for query in context.captured_queries
+            if 'FROM "api_member" WHERE "api_member"."id" =' in query["sql"]
+        ]
+
+    def testSharedAcrossRequests(self):
+        self.assertEqual(len(self.memberLookups()), 1)
+        self.assertEqual(len(self.memberLookups()), 0)
+
+        stats = membership_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def testRoleChangeInvalidates(self):
+        self.memberLookups()
+
+        member = Member.objects.get(team=self.team, owner=self.user)
+        member.role = Member.Roles.APPROVED
+        member.save()
+
+        self.assertEqual(len(self.memberLookups()), 1)
+
+    def testInviteAcceptanceInvalidates(self):
+        invited = User.objects.create(username="invited", email="invited@a.org")
+        client = APIClient()
+        client.force_authenticate(user=invited)
+
+        response = client.get(self.url(), format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertIs(membership_cache.get(self.team, invited.id), NOT_A_MEMBER)
+
+        invite = TeamInvite.objects.create(team=self.team, user=invited)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.put(
+                reverse("user-invites-detail", kwargs={"pk": invite.id}),
+                {},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = client.get(self.url(), format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from .test_base import *
+
+
+class CursorPaginationTestCase(TeamRelatedCore):
+    prefix = "team-tickets"
+
+    def setUp(self):
+        super().setUp()
+        self.tickets = generateArbitraryTickets([self.team], 25)
+        self.url = reverse(self.prefix + "-list", kwargs={TEAM_PK: self.team.id})
+
+    def pages(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        pages = [response.data]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(response.data)
+        return pages
+
+    def testPageNumberIsDefault(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["count"], 25)
+        self.assertEqual(len(response.data["results"]), PAGE_SIZE)
+
+    def testCursorPagesThroughEverything(self):
+        pages = self.pages({"pagination": "cursor"})
+
+        self.assertEqual(len(pages), 3)
+        ids = [ticket["id"] for page in pages for ticket in page["results"]]
+        self.assertEqual(ids, sorted(ticket.id for ticket in self.tickets))
+        self.assertNotIn("count", pages[0])
+
+    def testCursorOrdering(self):
+        pages = self.pages({"pagination": "cursor", "ordering": "-ticket_number"})
+
+        numbers = [t["ticket_number"] for page in pages for t in page["results"]]
+        self.assertEqual(numbers, list(range(25, 0, -1)))
+
+    def testCursorIgnoresUnknownOrdering(self):
+        pages = self.pages({"pagination": "cursor", "ordering": "title"})
+
+        ids = [ticket["id"] for page in pages for ticket in page["results"]]
+        self.assertEqual(ids, sorted(ticket.id for ticket in self.tickets))
+
+    def testCursorSkipsCount(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url, {"pagination": "cursor"})
+
+        sql = [query["sql"] for query in context.captured_queries]
+        self.assertFalse(any("COUNT(" in query for query in sql))
+        self.assertFalse(any("OFFSET" in query for query in sql))
+
+    def testApproximateCount(self):
+        response = self.client.get(
+            self.url, {"pagination": "cursor", "count": "approximate"}
+        )
+        self.assertEqual(response.data["count"], 25)
+        self.assertTrue(response.data["count_is_exact"])
+
+        with mock.patch("api.pagination.APPROXIMATE_COUNT_EXACT_BELOW", 10):
+            response = self.client.get(
+                self.url, {"pagination": "cursor", "count": "approximate"}
+            )
+        self.assertEqual(response.data["count"], 25)
+
+    def testEventsAndMembers(self):
+        for prefix in ["team-events", "team-members"]:
+            response = self.client.get(
+                reverse(prefix + "-list", kwargs={TEAM_PK: self.team.id}),
+                {"pagination": "cursor"},
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn("next", response.data)
+            self.assertNotIn("count", response.data)
@@ -0,0 +1,165 @@
+from django.test import Client
+
+from api.admin import sluggo_admin
+from api.response_cache import ResponseCache
+from .test_base import *
+
+
+class ResponseCacheTestCase(TestCase):
+    def setUp(self):
+        self.teams = [Team(id=pk, version=1) for pk in [1, 2, 3]]
+
+    def testLeastRecentlyUsedEviction(self):
+        cache = ResponseCache(timeout=60, max_bytes=10)
+        cache.set(self.teams[0], "tag", "/a", b"12345", "application/json", 0)
+        cache.set(self.teams[1], "tag", "/a", b"12345", "application/json", 0)
+
+        # touching the first team leaves the second as least recently used
+        self.assertIsNotNone(cache.get(self.teams[0], "tag", "/a"))
+        cache.set(self.teams[2], "tag", "/a", b"123", "application/json", 0)
+
+        self.assertIsNone(cache.get(self.teams[1], "tag", "/a"))
+        self.assertEqual(
+            cache.get(self.teams[0], "tag", "/a"), (b"12345", "application/json")
+        )
+        stats = cache.stats()
+        self.assertEqual((stats["entries"], stats["bytes"]), (2, 8))
+        self.assertEqual(stats["evictions"], 1)
+
+    def testTimeout(self):
+        cache = ResponseCache(timeout=10, max_bytes=100)
+
+        with mock.patch("api.response_cache.time.monotonic", return_value=100):
+            cache.set(self.teams[0], "tag", "/a", b"[]", "application/json", 99)
+        with mock.patch("api.response_cache.time.monotonic", return_value=105):
+            self.assertIsNotNone(cache.get(self.teams[0], "tag", "/a"))
+        with mock.patch("api.response_cache.time.monotonic", return_value=111):
+            self.assertIsNone(cache.get(self.teams[0], "tag", "/a"))
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["bytes"]), (1, 1, 0))
+
+    def testResponsesReadBeforeAnInvalidationAreDropped(self):
+        cache = ResponseCache(timeout=60, max_bytes=100)
+
+        with mock.patch("api.response_cache.time.monotonic", return_value=100):
+            cache.invalidate(self.teams[0].id, "tag")
+        cache.set(self.teams[0], "tag", "/a", b"[]", "application/json", 100)
+        self.assertIsNone(cache.get(self.teams[0], "tag", "/a"))
+
+        cache.set(self.teams[0], "tag", "/a", b"[]", "application/json", 101)
+        self.assertIsNotNone(cache.get(self.teams[0], "tag", "/a"))
+
+    def testOtherTeamVersions(self):
+        cache = ResponseCache(timeout=60, max_bytes=100)
+        cache.set(self.teams[0], "tag", "/a", b"[]", "application/json", 0)
+
+        # as read by a process which did not see the invalidation
+        self.assertIsNone(cache.get(Team(id=1, version=2), "tag", "/a"))
+        self.assertIsNone(cache.get(self.teams[0], "tag", "/a"))
+        self.assertEqual(cache.stats()["bytes"], 0)
+
+        cache.set(Team(id=1, version=2), "tag", "/a", b"[]", "application/json", 0)
+        self.assertIsNotNone(cache.get(Team(id=1, version=2), "tag", "/a"))
+
+
+class CachedListTestCase(TeamRelatedCore):
+    """
+    Tag and status lists are served from the response cache until a tag or
+    status of the team changes, however it is changed
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.tags_url = reverse("team-tags-list", kwargs={TEAM_PK: self.team.id})
+        self.statuses_url = reverse(
+            "team-statuses-list", kwargs={TEAM_PK: self.team.id}
+        )
+
+    def titles(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(item["title"] for item in response.json())
+
+    def testHits(self):
+        Tag.objects.create(team=self.team, title="bug")
+        self.assertEqual(self.titles(self.tags_url), ["bug"])
+
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.titles(self.tags_url), ["bug"])
+        self.assertFalse([q for q in context.captured_queries if "api_tag" in q["sql"]])
+        self.assertEqual(response_cache.stats()["hits"], 1)
+
+    def testWritesThroughTheApi(self):
+        self.titles(self.tags_url)
+        self.titles(self.statuses_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.tags_url, {"title": "bug"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.titles(self.tags_url), ["bug"])
+
+        # the statuses were rendered for the version before the write
+        self.assertEqual(response_cache.stats()["hits"], 0)
+        self.titles(self.statuses_url)
+        self.titles(self.statuses_url)
+        self.assertEqual(response_cache.stats()["hits"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse(
+                    "team-tags-detail",
+                    kwargs={TEAM_PK: self.team.id, "pk": response.data["id"]},
+                )
+            )
+        self.assertEqual(self.titles(self.tags_url), [])
+
+    def testWritesThroughTheAdmin(self):
+        tag = Tag.objects.create(team=self.team, title="bug")
+        self.titles(self.tags_url)
+
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        admin_client = Client()
+        admin_client.force_login(self.user)
+        response = admin_client.post(
+            reverse(f"{sluggo_admin.name}:api_tag_change", args=[tag.pk]),
+            {"team": self.team.pk, "title": "defect"},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.titles(self.tags_url), ["defect"])
+
+    def testWritesOfOtherProcesses(self):
+        Tag.objects.create(team=self.team, title="bug")
+        self.titles(self.tags_url)
+
+        # no signal reaches this process, only the new team version
+        Tag.objects.filter(team=self.team).update(title="defect")
+        Team.bump_version(self.team.id)
+        self.assertEqual(self.titles(self.tags_url), ["defect"])
+
+    def testTeamDefaults(self):
+        response = self.client.post(
+            reverse("team-list"), {"name": "another team"}, format="json"
+        )
+        url = reverse("team-statuses-list", kwargs={TEAM_PK: response.data["id"]})
+        self.assertEqual(self.titles(url), ["Done", "In Progress", "To do"])
+
+    def testOtherRenderersAreNotCached(self):
+        self.client.get(self.tags_url, HTTP_ACCEPT="text/html")
+        self.assertEqual(response_cache.stats()["entries"], 0)
+
+    def testStats(self):
+        self.titles(self.tags_url)
+        self.assertEqual(
+            self.client.get(reverse("cache-stats")).status_code,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse("cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["responses"]["entries"], 1)
+        self.assertGreater(response.data["responses"]["bytes"], 0)
+        self.assertIn("hit_rate", response.data["membership"])
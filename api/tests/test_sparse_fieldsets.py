@@ -0,0 +1,199 @@
+from api.serializers.sparse_fieldsets import parse_fieldset
+from .test_base import *
+
+
+class ParseFieldsetTestCase(TestCase):
+    def testNesting(self):
+        self.assertEqual(
+            parse_fieldset("id, status.title,status.color,,assigned_user.owner.id"),
+            {
+                "id": None,
+                "status": {"title": None, "color": None},
+                "assigned_user": {"owner": {"id": None}},
+            },
+        )
+
+    def testWholeFieldsWin(self):
+        self.assertEqual(parse_fieldset("team.name,team"), {"team": None})
+        self.assertEqual(parse_fieldset("team,team.name"), {"team": None})
+
+
+class SparseFieldsetCore(TeamRelatedCore):
+    def setUp(self):
+        super().setUp()
+        self.member = Member.objects.get(team=self.team, owner=self.user)
+        self.status = TicketStatus.objects.create(team=self.team, title="triage")
+        self.tag = Tag.objects.create(team=self.team, title="bug")
+        for ticket in generateArbitraryTickets([self.team], 3):
+            ticket.status = self.status
+            ticket.assigned_user = self.member
+            ticket.save()
+            TicketTag.create_all([self.tag], ticket)
+
+        self.url = reverse("team-tickets-list", kwargs={TEAM_PK: self.team.id})
+
+    def get(self, params, url=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.queries = [query["sql"] for query in context.captured_queries]
+        return response.json()
+
+    def ticketQuery(self):
+        (query,) = [q for q in self.queries if q.startswith('SELECT "api_ticket"."id"')]
+        return query
+
+
+class SparseFieldsetTestCase(SparseFieldsetCore):
+    """
+    ?fields= and ?omit= limit the rendered fields of reads, and the joins,
+    prefetches and columns of the queries behind them
+    """
+
+    def testFields(self):
+        data = self.get({"fields": "id,ticket_number,title,status.id,assigned_user"})
+        ticket = data["results"][0]
+
+        self.assertEqual(
+            set(ticket), {"id", "ticket_number", "title", "status", "assigned_user"}
+        )
+        self.assertEqual(ticket["status"], {"id": self.status.id})
+        self.assertEqual(ticket["assigned_user"]["owner"]["id"], self.user.id)
+
+        query = self.ticketQuery()
+        self.assertNotIn("api_team", query)
+        self.assertNotIn('"api_ticket"."description"', query)
+        self.assertNotIn('"api_ticketstatus"."title"', query)
+        self.assertIn('JOIN "auth_user"', query)
+        self.assertFalse([q for q in self.queries if "api_tickettag" in q])
+
+    def testOmit(self):
+        data = self.get({"omit": "team,tag_list,assigned_user.owner"})
+        ticket = data["results"][0]
+
+        self.assertNotIn("team", ticket)
+        self.assertNotIn("tag_list", ticket)
+        self.assertNotIn("owner", ticket["assigned_user"])
+        self.assertEqual(ticket["status"]["title"], "triage")
+
+        query = self.ticketQuery()
+        self.assertNotIn("api_team", query)
+        self.assertNotIn("auth_user", query)
+        self.assertIn('"api_ticket"."description"', query)
+        self.assertFalse([q for q in self.queries if "api_tickettag" in q])
+
+    def testFewerQueriesThanTheFullList(self):
+        self.get({})
+        full = len(self.queries)
+        self.get({"fields": "id,title"})
+        self.assertLess(len(self.queries), full)
+
+    def testCursorPagination(self):
+        data = self.get({"fields": "id", "pagination": "cursor", "ordering": "created"})
+        self.assertEqual([set(ticket) for ticket in data["results"]], [{"id"}] * 3)
+        self.assertEqual(len(self.queries), 3)
+
+    def testDetail(self):
+        ticket = Ticket.objects.filter(team=self.team).first()
+        url = reverse(
+            "team-tickets-detail", kwargs={TEAM_PK: self.team.id, "pk": ticket.pk}
+        )
+        self.assertEqual(
+            self.get({"fields": "id,title"}, url),
+            {
+                "id": ticket.id,
+                "title": ticket.title,
+            },
+        )
+
+    def testOtherViews(self):
+        members = self.get(
+            {"fields": "id,owner.username"},
+            reverse("team-members-list", kwargs={TEAM_PK: self.team.id}),
+        )
+        self.assertEqual(
+            members["results"],
+            [{"id": self.member.id, "owner": {"username": self.user.username}}],
+        )
+
+        tags = self.get(
+            {"omit": "created,activated,deactivated,object_uuid"},
+            reverse("team-tags-list", kwargs={TEAM_PK: self.team.id}),
+        )
+        self.assertEqual(
+            tags, [{"id": self.tag.id, "team_id": self.team.id, "title": "bug"}]
+        )
+
+    def testWritesRenderAllFields(self):
+        response = self.client.post(
+            self.url + "?fields=id", {"title": "new"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["title"], "new")
+        self.assertIn("team", response.data)
+
+
+class ExpandTestCase(SparseFieldsetCore):
+    """
+    ?expand= switches relations between nested objects and primary keys
+    """
+
+    def testCollapseAll(self):
+        data = self.get({"expand": ""})
+        ticket = data["results"][0]
+
+        self.assertEqual(ticket["status"], self.status.id)
+        self.assertEqual(ticket["assigned_user"], self.member.id)
+        self.assertEqual(ticket["tag_list"], [self.tag.id])
+        self.assertIsInstance(ticket["team"], dict)
+
+        query = self.ticketQuery()
+        self.assertNotIn("api_ticketstatus", query)
+        self.assertNotIn("api_member", query)
+        (tags,) = [q for q in self.queries if "api_tickettag" in q]
+        self.assertNotIn('"api_tag"."title"', tags)
+
+    def testExpandSome(self):
+        ticket = self.get({"expand": "status"})["results"][0]
+
+        self.assertEqual(ticket["status"]["title"], "triage")
+        self.assertEqual(ticket["assigned_user"], self.member.id)
+        self.assertEqual(ticket["tag_list"], [self.tag.id])
+        self.assertNotIn("api_member", self.ticketQuery())
+
+    def testWithFields(self):
+        ticket = self.get({"fields": "id,status,assigned_user", "expand": ""})
+        self.assertEqual(
+            ticket["results"][0],
+            {
+                "id": ticket["results"][0]["id"],
+                "status": self.status.id,
+                "assigned_user": self.member.id,
+            },
+        )
+        self.assertEqual(len(self.queries), 4)
+        self.assertNotIn("JOIN", self.ticketQuery())
+
+    def testNested(self):
+        ticket = Ticket.objects.filter(team=self.team).first()
+        PinnedTicket.objects.create(team=self.team, ticket=ticket, member=self.member)
+        url = reverse(
+            "pinned-tickets-list",
+            kwargs={TEAM_PK: self.team.id, "member_pk": self.member.pk},
+        )
+
+        (pin,) = self.get({"expand": "ticket.status"}, url)
+        self.assertEqual(pin["ticket"]["status"]["title"], "triage")
+        self.assertEqual(pin["ticket"]["assigned_user"], self.member.id)
+
+        (pin,) = self.get({"expand": ""}, url)
+        self.assertEqual(pin["ticket"], ticket.id)
+
+    def testWritesExpandEverything(self):
+        response = self.client.post(
+            self.url + "?expand=",
+            {"title": "new", "status": self.status.id},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["status"]["title"], "triage")
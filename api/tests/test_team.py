@@ -30,6 +30,20 @@ class TeamTestCase(TeamRelatedCore):
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def testStaleSaveKeepsTicketHead(self):
+        # loaded before tickets reserve their numbers, as a concurrent
+        # PATCH of the team would be
+        stale = Team.objects.get(pk=self.team.pk)
+        first = Ticket.objects.create(team=self.team, title="first")
+
+        stale.name = "renamed"
+        stale.save()
+
+        second = Ticket.objects.create(team=self.team, title="second")
+        self.assertEqual((first.ticket_number, second.ticket_number), (1, 2))
+        team = Team.objects.get(pk=self.team.pk)
+        self.assertEqual((team.name, team.ticket_head), ("renamed", 2))
+
     def testDelete(self):
         response = self.client.delete(
             reverse("team-detail", kwargs={"pk": self.team.id}), format="json"
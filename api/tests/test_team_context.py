@@ -0,0 +1,126 @@
+from .test_base import *
+
+
+@override_settings(EVENT_WRITER={"MODE": "buffered"})
+class TeamContextQueryCountTestCase(TeamRelatedCore):
+    """
+    The team and the requesting member should be resolved once per request,
+    no matter how many permission classes or viewset methods need them.
+    Events are left to the buffered writer, which inserts them after the
+    response, as it does outside of tests. Writes other than ticket creation
+    include one team version bump, and ticket creation one update of the
+    team counters
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.member = Member.objects.get(team=self.team, owner=self.user)
+        self.tickets = generateArbitraryTickets([self.team], 3)
+        self.ticket = self.tickets[0]
+
+    def team_url(self, prefix, **kwargs):
+        return reverse(prefix + "-list", kwargs={TEAM_PK: self.team.id, **kwargs})
+
+    def detail_url(self, prefix, pk, **kwargs):
+        return reverse(
+            prefix + "-detail", kwargs={TEAM_PK: self.team.id, "pk": pk, **kwargs}
+        )
+
+    def assertLookups(self, queries, table, expected=1):
+        # full record lookups by primary key, not single column reads
+        lookups = [
+            query
+            for query in queries
+            if query["sql"].startswith("SELECT")
+            and f'"{table}"."object_uuid"' in query["sql"]
+            and f'FROM "{table}" WHERE "{table}"."id" =' in query["sql"]
+        ]
+        self.assertEqual(len(lookups), expected, [q["sql"] for q in lookups])
+
+    def assertRequest(
+        self, method, url, num_queries, data=None, expected_status=200, team_lookups=1
+    ):
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(url, data=data, format="json")
+
+        self.assertEqual(response.status_code, expected_status)
+        self.assertLookups(context.captured_queries, "api_team", team_lookups)
+        self.assertEqual(len(context.captured_queries), num_queries)
+        return context.captured_queries
+
+    def testTicketList(self):
+        queries = self.assertRequest("get", self.team_url("team-tickets"), 5)
+        self.assertLookups(queries, "api_member")
+
+    def testTicketDetail(self):
+        queries = self.assertRequest(
+            "get", self.detail_url("team-tickets", self.ticket.pk), 4
+        )
+        self.assertLookups(queries, "api_member")
+
+    def testTicketCreate(self):
+        queries = self.assertRequest(
+            "post",
+            self.team_url("team-tickets"),
+            9,
+            data={"title": "ticket"},
+            expected_status=status.HTTP_201_CREATED,
+        )
+        self.assertLookups(queries, "api_member")
+
+    def testTicketUpdate(self):
+        queries = self.assertRequest(
+            "patch",
+            self.detail_url("team-tickets", self.ticket.pk),
+            8,
+            data={"title": "updated"},
+        )
+        self.assertLookups(queries, "api_member")
+
+    def testStatusList(self):
+        self.assertRequest("get", self.team_url("team-statuses"), 3)
+
+    def testStatusCreate(self):
+        queries = self.assertRequest(
+            "post",
+            self.team_url("team-statuses"),
+            5,
+            data={"title": "review"},
+            expected_status=status.HTTP_201_CREATED,
+        )
+        self.assertLookups(queries, "api_member")
+
+    def testTagList(self):
+        self.assertRequest("get", self.team_url("team-tags"), 3)
+
+    def testEventList(self):
+        self.assertRequest("get", self.team_url("team-events"), 3)
+
+    def testMemberList(self):
+        self.assertRequest("get", self.team_url("team-members"), 3)
+
+    def testMemberUpdate(self):
+        queries = self.assertRequest(
+            "patch",
+            self.detail_url("team-members", self.member.pk),
+            5,
+            data={"bio": "updated"},
+        )
+        # the updated instance itself is fetched through the team filtered queryset
+        self.assertLookups(queries, "api_member")
+
+    def testInviteList(self):
+        self.assertRequest("get", self.team_url("team-invites"), 3)
+
+    def testPinnedTicketList(self):
+        PinnedTicket.objects.create(
+            ticket=self.ticket, member=self.member, team=self.team
+        )
+        # the team of the pinned ticket is loaded with the other relations
+        # of the nested ticket, for the whole list
+        queries = self.assertRequest(
+            "get", self.team_url("pinned-tickets", member_pk=self.member.pk), 6
+        )
+
+        # the url member is the requesting member, so it is only fetched once
+        self.assertLookups(queries, "api_member")
@@ -0,0 +1,194 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.team_counters import recount
+from .test_base import *
+
+
+class TeamCounterTestCase(TeamRelatedCore):
+    """
+    the counters of a team follow every write to its tickets, their tags,
+    statuses and members, and always equal what counting the tickets gives
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("team-tickets-list", kwargs={TEAM_PK: self.team.id})
+        self.member = Member.objects.get(team=self.team, owner=self.user)
+        self.todo, self.doing, self.done = TicketStatus.objects.filter(team=self.team)
+        self.bug, self.ui = (
+            Tag.objects.create(team=self.team, title=t) for t in ["bug", "ui"]
+        )
+
+    def detailUrl(self, pk):
+        return reverse("team-tickets-detail", kwargs={TEAM_PK: self.team.id, "pk": pk})
+
+    def create(self, **data):
+        response = self.client.post(
+            self.url, {"title": "ticket", **data}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data["id"]
+
+    def patch(self, pk, data):
+        response = self.client.patch(self.detailUrl(pk), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
+    def counters(self) -> dict:
+        return {
+            (counter.kind, counter.key): (counter.count, counter.open)
+            for counter in TeamCounter.objects.filter(team=self.team)
+            if counter.count or counter.open
+        }
+
+    def assertCounted(self):
+        """
+        The maintained counters equal the counts of the tickets
+        """
+        self.assertEqual(self.counters(), recount(self.team.id))
+
+    def testTicketWrites(self):
+        first = self.create(
+            status=self.todo.id,
+            assigned_user=self.member.id,
+            tag_list=[self.bug.id, self.ui.id],
+        )
+        second = self.create(status=self.todo.id, tag_list=[self.bug.id])
+        self.assertEqual(
+            TeamCounter.read(self.team.id)[TeamCounter.TAG],
+            {self.bug.id: (2, 2), self.ui.id: (1, 1)},
+        )
+        self.assertCounted()
+
+        self.patch(first, {"status": self.doing.id, "tag_list": [self.ui.id]})
+        self.assertCounted()
+
+        ticket = Ticket.objects.get(pk=second)
+        ticket.deactivated = timezone.now()
+        ticket.save()
+        self.assertEqual(
+            TeamCounter.read(self.team.id)[TeamCounter.STATUS][self.todo.id], (1, 0)
+        )
+        self.assertCounted()
+
+        # reopened with a tag added, in one request
+        self.patch(second, {"tag_list": [self.bug.id, self.ui.id]})
+        ticket.deactivated = None
+        ticket.save()
+        self.assertCounted()
+
+        self.client.delete(self.detailUrl(first))
+        self.assertCounted()
+
+    def testBulkWrites(self):
+        url = reverse("team-tickets-bulk", kwargs={TEAM_PK: self.team.id})
+        response = self.client.post(
+            url,
+            [
+                {"title": "a", "status": self.todo.id, "tag_list": [self.bug.id]},
+                {"title": "b", "assigned_user": self.member.id},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertCounted()
+
+        a, b = (ticket["id"] for ticket in response.data["results"])
+        response = self.client.patch(
+            url,
+            [
+                {"id": a, "status": self.done.id, "tag_list": [self.ui.id]},
+                {"id": b, "assigned_user": None, "tag_list": [self.bug.id]},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertCounted()
+
+    def testDeletedStatusMemberAndTag(self):
+        self.create(status=self.doing.id, tag_list=[self.bug.id])
+        self.create(status=self.todo.id, assigned_user=self.member.id)
+
+        self.doing.delete()
+        self.assertCounted()
+        self.assertEqual(
+            TeamCounter.read(self.team.id)[TeamCounter.STATUS][None], (1, 1)
+        )
+
+        self.bug.delete()
+        self.member.delete()
+        self.assertCounted()
+
+    def testCountersOfOtherTeams(self):
+        self.create(status=self.todo.id)
+        other = generateArbitraryTickets([Team.objects.create(name="other")], 2)
+        self.assertCounted()
+        self.assertEqual(
+            TeamCounter.read(other[0].team_id)[TeamCounter.STATUS], {None: (2, 2)}
+        )
+
+    def testTeamDeletes(self):
+        def delete_queries(count, delete):
+            team = Team.objects.create(name=f"deleted {count}")
+            tag = Tag.objects.create(team=team, title="bug")
+            for ticket in generateArbitraryTickets([team], count):
+                TicketTag.create_all([tag], ticket)
+            with CaptureQueriesContext(connection) as context:
+                delete(team)
+            self.assertFalse(TeamCounter.objects.filter(team=team))
+            return len(context.captured_queries)
+
+        # the rows going with the team are not accounted for one by one
+        self.assertEqual(
+            delete_queries(2, lambda team: team.delete()),
+            delete_queries(20, lambda team: team.delete()),
+        )
+        self.assertEqual(
+            delete_queries(2, lambda team: Team.objects.filter(pk=team.pk).delete()),
+            delete_queries(20, lambda team: Team.objects.filter(pk=team.pk).delete()),
+        )
+
+        # the tickets of the remaining teams still are
+        self.create(status=self.todo.id, tag_list=[self.bug.id])
+        Ticket.objects.filter(team=self.team).delete()
+        self.assertCounted()
+
+    def testOneUpdatePerWrite(self):
+        pk = self.create(status=self.todo.id, tag_list=[self.bug.id])
+        self.create(status=self.doing.id)
+
+        ticket = Ticket.objects.get(pk=pk)
+        ticket.status = self.doing
+        ticket.deactivated = timezone.now()
+        with CaptureQueriesContext(connection) as context:
+            ticket.save()
+        writes = [q for q in context.captured_queries if "api_teamcounter" in q["sql"]]
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0]["sql"].startswith("UPDATE"))
+        self.assertCounted()
+
+        # saves leaving the counted fields alone do not touch the counters
+        with CaptureQueriesContext(connection) as context:
+            self.patch(pk, {"title": "renamed", "tag_list": [self.bug.id]})
+        self.assertFalse(
+            [q for q in context.captured_queries if "api_teamcounter" in q["sql"]]
+        )
+
+    def testReconcileCommand(self):
+        self.create(status=self.todo.id, tag_list=[self.bug.id])
+        self.create(status=self.todo.id, assigned_user=self.member.id)
+        TeamCounter.objects.filter(kind=TeamCounter.STATUS).update(count=7)
+        TeamCounter.objects.filter(kind=TeamCounter.TAG).delete()
+        version = Team.objects.get(pk=self.team.pk).version
+
+        stdout = StringIO()
+        call_command("reconcile_team_counters", f"--team={self.team.id}", stdout=stdout)
+        self.assertIn(f"team {self.team.id}: fixed 2 counters", stdout.getvalue())
+        self.assertCounted()
+        self.assertGreater(Team.objects.get(pk=self.team.pk).version, version)
+
+        stdout = StringIO()
+        call_command("reconcile_team_counters", stdout=stdout)
+        self.assertIn("fixing 0", stdout.getvalue())
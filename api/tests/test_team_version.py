@@ -0,0 +1,121 @@
+from .test_base import *
+
+
+class TeamVersionTestCase(TeamRelatedCore):
+    """
+    Writes to a team's tickets, tags, statuses, members and pins bump its
+    version, which the team nested reads turn into ETags
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.member = Member.objects.get(team=self.team, owner=self.user)
+        self.ticket = generateArbitraryTickets([self.team], 1)[0]
+        self.url = reverse("team-tickets-list", kwargs={TEAM_PK: self.team.id})
+
+    def version(self):
+        return Team.objects.values_list("version", flat=True).get(pk=self.team.pk)
+
+    def assertBumps(self, write):
+        before = self.version()
+        write()
+        self.assertGreater(self.version(), before)
+
+    def testWritesBumpTheVersion(self):
+        self.assertBumps(lambda: generateArbitraryTickets([self.team], 1))
+        self.assertBumps(lambda: self.ticket.save())
+        tag = Tag.objects.create(team=self.team, title="bug")
+        self.assertBumps(lambda: TicketTag.create_all([tag], self.ticket))
+        self.assertBumps(lambda: TicketTag.delete_difference([], self.ticket))
+        self.assertBumps(lambda: tag.delete())
+        self.assertBumps(
+            lambda: TicketStatus.objects.create(team=self.team, title="review")
+        )
+        self.assertBumps(
+            lambda: PinnedTicket.objects.create(
+                ticket=self.ticket, member=self.member, team=self.team
+            )
+        )
+        self.assertBumps(lambda: self.member.save())
+        self.assertBumps(lambda: self.ticket.delete())
+
+    def testOtherTeamsKeepTheirVersion(self):
+        other_team = generateArbitraryTeams(1)[0]
+        version = Team.objects.get(pk=other_team.pk).version
+        self.ticket.save()
+        self.assertEqual(Team.objects.get(pk=other_team.pk).version, version)
+
+    def testStaleTeamDoesNotOverwriteTheVersion(self):
+        team = Team.objects.get(pk=self.team.pk)
+        self.ticket.save()
+        version = self.version()
+
+        team.name = "renamed"
+        team.save()
+        self.assertGreater(self.version(), version)
+
+    def testNotModified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(response.content)
+        self.assertFalse(
+            [q for q in context.captured_queries if "api_ticket" in q["sql"]]
+        )
+
+    def testWritesChangeTheETag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.patch(
+            reverse(
+                "team-tickets-detail",
+                kwargs={TEAM_PK: self.team.id, "pk": self.ticket.pk},
+            ),
+            {"title": "changed"},
+            format="json",
+        )
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def testUserChangesChangeTheETag(self):
+        url = reverse("team-members-list", kwargs={TEAM_PK: self.team.id})
+        etag = self.client.get(url)["ETag"]
+        self.client.patch(
+            reverse("rest_user_details"), {"first_name": "changed"}, format="json"
+        )
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def testLoginsKeepTheVersion(self):
+        version = self.version()
+        self.user.save(update_fields=["last_login"])
+        self.assertEqual(self.version(), version)
+
+    def testETagsVaryByQuery(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, {"q": "x"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def testPermissionsComeFirst(self):
+        etag = self.client.get(self.url)["ETag"]
+        outsider = generateArbitraryUsers(1)[0]
+        self.client.force_authenticate(user=outsider)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def testUnversionedViews(self):
+        response = self.client.get(
+            reverse("team-events-list", kwargs={TEAM_PK: self.team.id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", response)
@@ -1,3 +1,4 @@
+from api.serializers import PinnedTicketSerializer
 from .test_base import *
 
 
@@ -25,7 +26,9 @@ class TicketTestCase(TeamRelatedCore):
         self.list()
 
     def testDetail(self):
-        self.detail()
+        # the detail response adds the rollup of the ticket's subtree
+        instance = self.model.objects.get(pk=self.pk)
+        self.detail(TicketDetailSerializer(instance).data)
 
     def testUpdate(self):
         updated_dict = self.data_dict
@@ -155,3 +158,301 @@ class WrongTeamTicketTestCase(TicketTestCase):
             format="json",
         )
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TicketSerializerQueryCountTestCase(TestCase):
+    """
+    Serializing a list of tickets should take the same number of queries no
+    matter how many tickets are in the list
+    """
+
+    def setUp(self):
+        self.team = generateArbitraryTeams(1)[0]
+        self.statuses = list(TicketStatus.objects.filter(team=self.team))
+        self.members = [
+            Member.objects.create(team=self.team, owner=user)
+            for user in generateArbitraryUsers(3)
+        ]
+        self.tags = [
+            Tag.objects.create(team=self.team, title=f"tag-{i}") for i in range(3)
+        ]
+
+        for i, ticket in enumerate(generateArbitraryTickets([self.team], 30)):
+            ticket.status = self.statuses[i % len(self.statuses)]
+            ticket.assigned_user = self.members[i % len(self.members)]
+            ticket.save()
+            TicketTag.create_all(self.tags[: i % 4], ticket)
+
+    def serializeQueries(self, count):
+        queryset = Ticket.objects.filter(team=self.team).select_related("team")
+        with CaptureQueriesContext(connection) as context:
+            data = TicketSerializer(queryset[:count], many=True).data
+
+        self.assertEqual(len(data), count)
+        return len(context.captured_queries)
+
+    def testConstantQueries(self):
+        # tickets, statuses, members with their owners, tags
+        self.assertEqual(self.serializeQueries(5), 4)
+        self.assertEqual(self.serializeQueries(30), 4)
+
+    def testNestedInPinnedTickets(self):
+        for ticket in Ticket.objects.filter(team=self.team):
+            PinnedTicket.objects.create(
+                team=self.team, member=self.members[0], ticket=ticket
+            )
+
+        def pinQueries(count):
+            with CaptureQueriesContext(connection) as context:
+                data = PinnedTicketSerializer(
+                    PinnedTicket.objects.all()[:count], many=True
+                ).data
+
+            self.assertEqual(len(data), count)
+            self.assertEqual(data[0]["ticket"]["team"]["id"], self.team.id)
+            return len(context.captured_queries)
+
+        self.assertEqual(pinQueries(5), pinQueries(30))
+
+    def testBatchedRepresentation(self):
+        queryset = Ticket.objects.filter(team=self.team).select_related("team")
+        batched = TicketSerializer(queryset, many=True).data
+
+        for ticket, data in zip(queryset, batched):
+            self.assertEqual(TicketSerializer(ticket).data, data)
+
+    def testUsesLoadedRelations(self):
+        queryset = (
+            Ticket.objects.filter(team=self.team)
+            .select_related("team", "assigned_user__owner", "status")
+            .prefetch_related("tag_list")
+        )
+        list(queryset)
+
+        with self.assertNumQueries(0):
+            TicketSerializer(queryset, many=True).data
+
+
+class TicketNumberConcurrencyTestCase(TransactionTestCase):
+    """
+    Tickets created concurrently within one team must each receive a
+    distinct ticket number
+    """
+
+    writers = 8
+    tickets_per_writer = 25
+
+    def setUp(self):
+        self.team = generateArbitraryTeams(1)[0]
+
+    def testConcurrentCreates(self):
+        numbers = createTicketsConcurrently(
+            self.team, self.writers, self.tickets_per_writer
+        )
+
+        expected = self.writers * self.tickets_per_writer
+        self.assertEqual(len(numbers), expected)
+        self.assertEqual(sorted(numbers), list(range(1, expected + 1)))
+        self.assertEqual(Team.objects.get(pk=self.team.pk).ticket_head, expected)
+
+
+class TicketBulkTestCase(TeamRelatedCore):
+    prefix = "team-tickets"
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse(self.prefix + "-bulk", kwargs={TEAM_PK: self.team.id})
+        self.status = TicketStatus.objects.filter(team=self.team).first()
+        self.member = Member.objects.get(team=self.team, owner=self.user)
+        self.tags = [
+            Tag.objects.create(team=self.team, title=f"tag-{i}") for i in range(3)
+        ]
+
+    def testBulkCreate(self):
+        tag_ids = [tag.id for tag in self.tags]
+        data = [
+            {
+                "title": f"ticket {i}",
+                "status": self.status.id,
+                "assigned_user": self.member.id,
+                "tag_list": tag_ids[:i],
+            }
+            for i in range(4)
+        ]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["errors"], [])
+
+        tickets = Ticket.objects.filter(team=self.team).order_by("ticket_number")
+        self.assertEqual([t.ticket_number for t in tickets], [1, 2, 3, 4])
+        self.assertEqual(Team.objects.get(pk=self.team.pk).ticket_head, 4)
+        self.assertEqual(
+            response.data["results"], TicketSerializer(tickets, many=True).data
+        )
+        for i, ticket in enumerate(tickets):
+            self.assertEqual(
+                sorted(ticket.tag_list.values_list("id", flat=True)), tag_ids[:i]
+            )
+
+        # one insert each for the tickets, their tags and their events, besides
+        # the first counters of the team
+        inserts = [
+            q
+            for q in context.captured_queries
+            if q["sql"].startswith("INSERT") and "api_teamcounter" not in q["sql"]
+        ]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(
+            Event.objects.filter(team=self.team, event_type=Event.CREATE).count(), 4
+        )
+
+    def testBulkCreatePartialFailure(self):
+        data = [
+            {"title": "valid"},
+            {"description": "missing title"},
+            {"title": "bad status", "status": 12345},
+            {"title": "also valid"},
+        ]
+
+        response = self.client.post(self.url, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [1, 2])
+        self.assertIn("title", response.data["errors"][0]["errors"])
+        self.assertIn("status", response.data["errors"][1]["errors"])
+        self.assertEqual(
+            [ticket["title"] for ticket in response.data["results"]],
+            ["valid", "also valid"],
+        )
+
+    def testBulkCreateAllInvalid(self):
+        response = self.client.post(self.url, data=[{}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.url, data={"title": "x"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.filter(team=self.team).exists())
+
+    def testBulkUpdate(self):
+        tickets = generateArbitraryTickets([self.team], 3)
+        other_team_ticket = generateArbitraryTickets(generateArbitraryTeams(1), 1)[0]
+        data = [
+            {"id": tickets[0].id, "title": "renamed", "tag_list": [self.tags[0].id]},
+            {"id": tickets[1].id, "status": self.status.id},
+            {"id": other_team_ticket.id, "title": "not in this team"},
+            {"id": tickets[2].id, "title": ""},
+        ]
+
+        response = self.client.patch(self.url, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [2, 3])
+
+        tickets = [Ticket.objects.get(pk=ticket.pk) for ticket in tickets]
+        self.assertEqual(tickets[0].title, "renamed")
+        self.assertEqual(list(tickets[0].tag_list.all()), [self.tags[0]])
+        self.assertEqual(tickets[1].status, self.status)
+        self.assertNotEqual(tickets[2].title, "")
+        self.assertEqual(
+            response.data["results"], TicketSerializer(tickets[:2], many=True).data
+        )
+        self.assertNotEqual(
+            Ticket.objects.get(pk=other_team_ticket.pk).title, "not in this team"
+        )
+
+    def testBulkUpdateDuplicateIds(self):
+        tickets = generateArbitraryTickets([self.team], 2)
+        titles = [ticket.title for ticket in tickets]
+        data = [
+            {"id": tickets[0].id, "title": "first"},
+            {"id": tickets[1].id, "title": "renamed"},
+            {"id": tickets[0].id, "title": "second"},
+        ]
+
+        response = self.client.patch(self.url, data=data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [0, 2])
+        self.assertIn("id", response.data["errors"][0]["errors"])
+        self.assertEqual(
+            [ticket["id"] for ticket in response.data["results"]], [tickets[1].id]
+        )
+        self.assertEqual(Ticket.objects.get(pk=tickets[0].pk).title, titles[0])
+        self.assertEqual(Ticket.objects.get(pk=tickets[1].pk).title, "renamed")
+
+    def testBulkCreateConstantQueries(self):
+        def bulkCreateQueries(count):
+            data = [
+                {
+                    "title": randomString(10),
+                    "status": self.status.id,
+                    "assigned_user": self.member.id,
+                    "tag_list": [tag.id for tag in self.tags],
+                }
+                for _ in range(count)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(self.url, data=data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(context.captured_queries)
+
+        # the first request also looks up the membership
+        bulkCreateQueries(1)
+        self.assertEqual(bulkCreateQueries(5), bulkCreateQueries(25))
+
+
+class TicketTagReconciliationTestCase(TestCase):
+    def setUp(self):
+        self.team = generateArbitraryTeams(1)[0]
+        self.ticket = generateArbitraryTickets([self.team], 1)[0]
+        self.tags = [
+            Tag.objects.create(team=self.team, title=f"tag-{i}") for i in range(40)
+        ]
+        TicketTag.create_all(self.tags[:20], self.ticket)
+
+        self.changes = []
+        ticket_tags_changed.connect(self.receiver, sender=TicketTag)
+        self.addCleanup(ticket_tags_changed.disconnect, self.receiver, sender=TicketTag)
+
+    def receiver(self, sender, ticket, added, removed, **kwargs):
+        self.changes.append((ticket, [tag.id for tag in added], removed))
+
+    def tagIds(self):
+        return sorted(self.ticket.tag_list.values_list("id", flat=True))
+
+    def testReplaceTags(self):
+        wanted = self.tags[10:30]
+
+        # one read, one insert, one delete, the counter deltas and the team
+        # version bump. The counters of the tags new to the team are created
+        # by a read, an insert and a second update
+        with self.assertNumQueries(8):
+            added, removed = TicketTag.delete_difference(wanted, self.ticket)
+
+        self.assertEqual(self.tagIds(), sorted(tag.id for tag in wanted))
+        self.assertEqual([tag.id for tag in added], [t.id for t in self.tags[20:30]])
+        self.assertEqual(removed, [tag.id for tag in self.tags[:10]])
+        self.assertEqual(
+            self.changes,
+            [(self.ticket, [tag.id for tag in added], removed)],
+        )
+
+    def testUnchangedTags(self):
+        with self.assertNumQueries(1):
+            TicketTag.delete_difference(self.tags[:20], self.ticket)
+
+        self.assertEqual(self.changes, [])
+
+    def testRemoveAllTags(self):
+        added, removed = TicketTag.delete_difference([], self.ticket)
+
+        self.assertEqual(self.tagIds(), [])
+        self.assertEqual(added, [])
+        self.assertEqual(len(removed), 20)
+
+    def testCreateAllSignals(self):
+        ticket = generateArbitraryTickets([self.team], 1)[0]
+        TicketTag.create_all([self.tags[0], self.tags[0], self.tags[1]], ticket)
+
+        self.assertEqual(
+            self.changes, [(ticket, [self.tags[0].id, self.tags[1].id], [])]
+        )
@@ -0,0 +1,118 @@
+from .test_base import *
+
+
+class TicketBoardTestCase(TeamRelatedCore):
+    """
+    the board renders a column per status with its first tickets and its
+    total, picked by one windowed query, and links each column to its next
+    tickets
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("team-tickets-board", kwargs={TEAM_PK: self.team.id})
+        self.todo, self.doing, self.done = TicketStatus.objects.filter(team=self.team)
+        self.bug = Tag.objects.create(team=self.team, title="bug")
+
+        self.tickets = generateArbitraryTickets([self.team], 8)
+        for ticket, status_ in zip(
+            self.tickets, [self.todo] * 5 + [self.doing] * 2 + [None]
+        ):
+            ticket.status = status_
+            ticket.save()
+        for ticket in self.tickets[1:6]:
+            TicketTag.create_all([self.bug], ticket)
+
+    def board(self, params=None, url=None) -> list:
+        response = self.client.get(url or self.url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return response.json()["columns"]
+
+    @staticmethod
+    def ids(column) -> list:
+        return [ticket["id"] for ticket in column["results"]]
+
+    def testColumns(self):
+        columns = self.board({"limit": 2})
+        self.assertEqual(
+            [(c["id"], c["count"]) for c in columns],
+            [(self.todo.id, 5), (self.doing.id, 2), (self.done.id, 0), (None, 1)],
+        )
+        todo, doing, done, unset = columns
+        self.assertEqual(todo["title"], self.todo.title)
+        self.assertEqual(self.ids(todo), [t.id for t in self.tickets[:2]])
+        self.assertEqual(self.ids(doing), [t.id for t in self.tickets[5:7]])
+        self.assertEqual(self.ids(unset), [self.tickets[7].id])
+        self.assertEqual(done["results"], [])
+        self.assertIsNotNone(todo["next"])
+        self.assertEqual([doing["next"], done["next"], unset["next"]], [None] * 3)
+
+        # rendered as the ticket list renders them
+        expected = TicketSerializer(self.tickets[0]).data
+        self.assertEqual(todo["results"][0]["title"], expected["title"])
+        self.assertEqual(len(todo["results"][0]), len(expected))
+
+    def testLoadMore(self):
+        url = self.board({"limit": 2})[0]["next"]
+        ids = [t.id for t in self.tickets[:2]]
+        while url:
+            (column,) = self.board(url=url)
+            self.assertEqual(column["count"], 5)
+            ids += self.ids(column)
+            url = column["next"]
+        self.assertEqual(ids, [t.id for t in self.tickets[:5]])
+
+        (column,) = self.board({"status": "none"})
+        self.assertEqual(self.ids(column), [self.tickets[7].id])
+
+    def testFilters(self):
+        columns = self.board({"tag_list__id": self.bug.id, "limit": 3})
+        self.assertEqual([c["count"] for c in columns], [4, 1, 0, 0])
+        self.assertEqual(self.ids(columns[0]), [t.id for t in self.tickets[1:4]])
+
+        (column,) = self.board(
+            {"tag_list__id": self.bug.id, "status": self.todo.id, "after": 4}
+        )
+        self.assertEqual(column["count"], 4)
+
+        # sparse fieldsets apply to the tickets
+        columns = self.board({"fields": "id,title"})
+        self.assertEqual(set(columns[0]["results"][0]), {"id", "title"})
+
+    def testOneWindowedQuery(self):
+        def queries(params):
+            with CaptureQueriesContext(connection) as context:
+                self.board(params)
+            return [q["sql"] for q in context.captured_queries]
+
+        # the membership of the requesting user is cached after the first
+        self.board()
+        unfiltered = queries({"limit": 2})
+        windowed = [sql for sql in unfiltered if "ROW_NUMBER()" in sql]
+        self.assertEqual(len(windowed), 1)
+        # the column totals come from the team counters
+        self.assertNotIn("COUNT(", windowed[0])
+
+        filtered = queries({"tag_list__id": self.bug.id})
+        self.assertEqual(len([sql for sql in filtered if "ROW_NUMBER()" in sql]), 1)
+
+        # the new tickets change the team, and so its cached membership
+        generateArbitraryTickets([self.team], 10)
+        self.board()
+        self.assertEqual(len(queries({"limit": 2})), len(unfiltered))
+
+    def testInvalidParameters(self):
+        for params in [
+            {"limit": 0},
+            {"limit": 101},
+            {"limit": "many"},
+            {"status": 12345},
+            {"status": self.todo.id, "after": -1},
+        ]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def testOnlyMembers(self):
+        self.client.force_authenticate(User.objects.create(username="outsider"))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
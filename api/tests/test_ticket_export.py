@@ -0,0 +1,90 @@
+import csv
+import json
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+
+from api.ticket_export import export_lines
+from .test_base import *
+
+
+class TicketExportTestCase(TeamRelatedCore):
+    """
+    the export streams every ticket of a team, resolving statuses, assignees
+    and tags a chunk at a time
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.member = Member.objects.get(team=self.team, owner=self.user)
+        self.status = TicketStatus.objects.create(team=self.team, title="triage")
+        self.tags = [
+            Tag.objects.create(team=self.team, title=title) for title in ["bug", "a, b"]
+        ]
+
+        self.tickets = generateArbitraryTickets([self.team], 5)
+        for ticket in self.tickets[:4]:
+            ticket.status = self.status
+            ticket.assigned_user = self.member
+            ticket.save()
+            TicketTag.create_all(self.tags, ticket)
+
+        self.url = reverse("team-tickets-export", kwargs={TEAM_PK: self.team.id})
+
+    def stream(self, params=None):
+        response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def testNdjson(self):
+        response, content = self.stream()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn("team-1-tickets.ndjson", response["Content-Disposition"])
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [t.id for t in self.tickets])
+        self.assertEqual(rows[0]["status"], "triage")
+        self.assertEqual(rows[0]["assigned_user"], self.user.username)
+        self.assertEqual(rows[0]["tags"], ["a, b", "bug"])
+        self.assertEqual(rows[4]["status"], None)
+        self.assertEqual(rows[4]["tags"], [])
+
+    def testCsv(self):
+        response, content = self.stream({"output": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["title"], self.tickets[0].title)
+        self.assertEqual(json.loads(rows[0]["tags"]), ["a, b", "bug"])
+        self.assertEqual(rows[0]["created"], self.tickets[0].created.isoformat())
+
+    def testUnknownFormat(self):
+        response = self.client.get(self.url, {"output": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def testOnlyMembers(self):
+        self.client.force_authenticate(User.objects.create(username="outsider"))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def testQueriesPerChunk(self):
+        # a ticket query, then statuses, assignees and tags per chunk, apart
+        # from the last chunk, which refers to no status or assignee
+        for chunk_size, queries in [(2, 1 + 3 + 3 + 1), (4, 1 + 3 + 1)]:
+            with CaptureQueriesContext(connection) as context:
+                lines = list(export_lines(self.team.id, chunk_size=chunk_size))
+            self.assertEqual(len(lines), 5)
+            self.assertEqual(len(context.captured_queries), queries)
+
+    def testCommand(self):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "export_tickets", self.team.id, "--format=csv", stdout=stdout, stderr=stderr
+        )
+        self.assertEqual(len(list(csv.DictReader(StringIO(stdout.getvalue())))), 5)
+        self.assertIn("exported 5 tickets", stderr.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command("export_tickets", 999, stdout=stdout, stderr=stderr)
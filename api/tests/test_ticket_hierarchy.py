@@ -0,0 +1,294 @@
+from .test_base import *
+
+
+class TicketHierarchyTestCase(TeamRelatedCore):
+    """
+    parent_id places tickets in the TicketNode hierarchy, which the subtree,
+    ancestors and children endpoints read with one query each
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("team-tickets-list", kwargs={TEAM_PK: self.team.id})
+
+    def create(self, title, parent=None):
+        data = {"title": title}
+        if parent is not None:
+            data["parent_id"] = parent
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data["id"]
+
+    def patch(self, pk, data):
+        return self.client.patch(
+            reverse("team-tickets-detail", kwargs={TEAM_PK: self.team.id, "pk": pk}),
+            data,
+            format="json",
+        )
+
+    def get(self, pk, action, params=None):
+        response = self.client.get(
+            reverse(f"team-tickets-{action}", kwargs={TEAM_PK: self.team.id, "pk": pk}),
+            params or {},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def titles(self, pk, action):
+        return [ticket["title"] for ticket in self.get(pk, action)]
+
+    def tree(self, pk, params=None):
+        def shape(item):
+            return {item["title"]: [shape(child) for child in item["children"]]}
+
+        return shape(self.get(pk, "subtree", params))
+
+    def buildTree(self):
+        """
+        root
+        ├── a
+        │   ├── a1
+        │   └── a2
+        │       └── a2x
+        └── b
+        """
+        ids = {"root": self.create("root")}
+        for title, parent in [
+            ("a", "root"),
+            ("b", "root"),
+            ("a1", "a"),
+            ("a2", "a"),
+            ("a2x", "a2"),
+        ]:
+            ids[title] = self.create(title, ids[parent])
+        return ids
+
+    def testSubtree(self):
+        ids = self.buildTree()
+        self.assertEqual(
+            self.tree(ids["root"]),
+            {"root": [{"a": [{"a1": []}, {"a2": [{"a2x": []}]}]}, {"b": []}]},
+        )
+        self.assertEqual(self.tree(ids["a2"]), {"a2": [{"a2x": []}]})
+        self.assertEqual(
+            self.tree(ids["root"], {"depth": 1}), {"root": [{"a": []}, {"b": []}]}
+        )
+
+        # a ticket outside any hierarchy is its own subtree
+        lone = self.create("lone")
+        self.assertEqual(self.tree(lone), {"lone": []})
+
+    def testAncestorsAndChildren(self):
+        ids = self.buildTree()
+        self.assertEqual(self.titles(ids["a2x"], "ancestors"), ["root", "a", "a2"])
+        self.assertEqual(self.titles(ids["root"], "ancestors"), [])
+        self.assertEqual(self.titles(ids["a"], "children"), ["a1", "a2"])
+        self.assertEqual(self.titles(ids["b"], "children"), [])
+        self.assertEqual(self.titles(self.create("lone"), "children"), [])
+
+    def testQueriesDoNotGrowWithTheTree(self):
+        ids = self.buildTree()
+        # caches the membership for the team version the tree left
+        self.get(ids["root"], "subtree")
+        counts = []
+        for pk in [ids["a2"], ids["root"]]:
+            with CaptureQueriesContext(connection) as context:
+                self.get(pk, "subtree")
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+        # the node, then the tickets of the tree in one query
+        with CaptureQueriesContext(connection) as context:
+            self.get(ids["root"], "subtree", {"omit": "tag_list"})
+        tree_queries = [
+            q["sql"] for q in context.captured_queries if "api_ticketnode" in q["sql"]
+        ]
+        self.assertEqual(len(tree_queries), 2)
+        self.assertFalse(
+            [q for q in context.captured_queries if "api_tickettag" in q["sql"]]
+        )
+
+    def testSparseFieldsets(self):
+        ids = self.buildTree()
+        root = self.get(ids["root"], "subtree", {"fields": "id,title", "expand": ""})
+        self.assertEqual(set(root), {"id", "title", "children"})
+        self.assertEqual(set(root["children"][0]), {"id", "title", "children"})
+
+    def testReparent(self):
+        ids = self.buildTree()
+
+        response = self.patch(ids["a2"], {"parent_id": ids["b"]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(
+            self.tree(ids["root"]),
+            {"root": [{"a": [{"a1": []}]}, {"b": [{"a2": [{"a2x": []}]}]}]},
+        )
+
+        response = self.patch(ids["a"], {"parent_id": None})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.titles(ids["a1"], "ancestors"), ["a"])
+        self.assertEqual(self.titles(ids["root"], "children"), ["b"])
+
+        # updates without parent_id leave the hierarchy alone
+        self.patch(ids["a2x"], {"title": "renamed"})
+        self.assertEqual(self.titles(ids["a2x"], "ancestors"), ["root", "b", "a2"])
+
+    def testInvalidParents(self):
+        ids = self.buildTree()
+
+        for parent in [ids["a2x"], ids["a"]]:
+            response = self.patch(ids["a"], {"parent_id": parent})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("parent_id", response.data)
+        self.assertEqual(self.titles(ids["a2x"], "ancestors"), ["root", "a", "a2"])
+
+        other = Team.objects.create(name="other")
+        (foreign,) = generateArbitraryTickets([other], 1)
+        response = self.client.post(
+            self.url, {"title": "x", "parent_id": foreign.id}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["parent_id"], ["Ticket not found."])
+
+    def testBulkCreate(self):
+        root = self.create("root")
+        response = self.client.post(
+            reverse("team-tickets-bulk", kwargs={TEAM_PK: self.team.id}),
+            [{"title": "a", "parent_id": root}, {"title": "b"}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.titles(root, "children"), ["a"])
+
+    def testBulkUpdate(self):
+        a, b, c = self.create("a"), self.create("b"), self.create("c")
+        url = reverse("team-tickets-bulk", kwargs={TEAM_PK: self.team.id})
+
+        response = self.client.patch(
+            url, [{"id": b, "parent_id": a}, {"id": c, "title": "c2"}], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["errors"], [])
+        self.assertEqual(self.titles(a, "children"), ["b"])
+
+        # a cycle is reported for its item, the others are still applied
+        response = self.client.patch(
+            url,
+            [
+                {"id": c, "title": "c3"},
+                {"id": a, "parent_id": b, "title": "renamed"},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        (error,) = response.data["errors"]
+        self.assertEqual(error["index"], 1)
+        self.assertIn("parent_id", error["errors"])
+        self.assertEqual([t["id"] for t in response.data["results"]], [c])
+        self.assertEqual(Ticket.objects.get(pk=a).title, "a")
+        self.assertEqual(Ticket.objects.get(pk=c).title, "c3")
+        self.assertEqual(self.titles(b, "ancestors"), ["a"])
+        self.assertEqual(TicketNode.find_problems(), ([], [], [], [], []))
+
+    def testDeleteMovesChildrenUp(self):
+        ids = self.buildTree()
+        response = self.client.delete(
+            reverse(
+                "team-tickets-detail", kwargs={TEAM_PK: self.team.id, "pk": ids["a"]}
+            )
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            self.tree(ids["root"]),
+            {"root": [{"b": []}, {"a1": []}, {"a2": [{"a2x": []}]}]},
+        )
+
+        self.client.delete(
+            reverse(
+                "team-tickets-detail",
+                kwargs={TEAM_PK: self.team.id, "pk": ids["root"]},
+            )
+        )
+        self.assertEqual(self.titles(ids["a2x"], "ancestors"), ["a2"])
+        self.assertEqual(TicketNode.find_problems(), ([], [], [], [], []))
+
+    def testReparentingChangesTheEtag(self):
+        ids = self.buildTree()
+        url = reverse(
+            "team-tickets-subtree", kwargs={TEAM_PK: self.team.id, "pk": ids["root"]}
+        )
+        etag = self.client.get(url)["ETag"]
+
+        self.patch(ids["a2"], {"parent_id": ids["b"]})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def move(self, moves):
+        return self.client.post(
+            reverse("team-tickets-move", kwargs={TEAM_PK: self.team.id}),
+            [{"id": pk, "parent_id": parent} for pk, parent in moves],
+            format="json",
+        )
+
+    def testBatchMove(self):
+        ids = self.buildTree()
+        response = self.move(
+            [(ids["a2"], ids["b"]), (ids["a1"], None), (ids["b"], ids["a1"])]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(
+            [ticket["id"] for ticket in response.data["results"]],
+            [ids["a2"], ids["a1"], ids["b"]],
+        )
+        self.assertEqual(self.tree(ids["a1"]), {"a1": [{"b": [{"a2": [{"a2x": []}]}]}]})
+        self.assertEqual(self.tree(ids["root"]), {"root": [{"a": []}]})
+        self.assertEqual(TicketNode.find_problems(), ([], [], [], [], []))
+
+    def testBatchMovesApplyInOrder(self):
+        ids = self.buildTree()
+
+        # a2 can only go below a2x once a2x has left it
+        response = self.move([(ids["a2"], ids["a2x"]), (ids["a2x"], ids["root"])])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["errors"][0]["index"], 0)
+        self.assertIn("parent_id", response.data["errors"][0]["errors"])
+
+        response = self.move([(ids["a2x"], ids["root"]), (ids["a2"], ids["a2x"])])
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(self.titles(ids["a2"], "ancestors"), ["root", "a2x"])
+
+    def testInvalidBatchMovesApplyNothing(self):
+        ids = self.buildTree()
+        before = self.tree(ids["root"])
+
+        response = self.move([(ids["b"], ids["a"]), (ids["a"], ids["a2x"])])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["errors"][0]["index"], 1)
+        self.assertEqual(self.tree(ids["root"]), before)
+
+        other = Team.objects.create(name="other")
+        (foreign,) = generateArbitraryTickets([other], 1)
+        response = self.move([(ids["b"], ids["a"]), (foreign.id, None)])
+        self.assertEqual(
+            response.data["errors"],
+            [{"index": 1, "errors": {"id": ["Ticket not found."]}}],
+        )
+
+        response = self.client.post(
+            reverse("team-tickets-move", kwargs={TEAM_PK: self.team.id}),
+            [{"id": ids["b"]}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("parent_id", response.data["errors"][0]["errors"])
+        self.assertEqual(self.tree(ids["root"]), before)
+
+    def testMoveQueriesDoNotGrowWithTheSubtree(self):
+        ids = self.buildTree()
+        counts = []
+        for moved in [ids["a1"], ids["a"]]:
+            with CaptureQueriesContext(connection) as context:
+                response = self.move([(moved, ids["b"])])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
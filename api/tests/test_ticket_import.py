@@ -0,0 +1,187 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+
+from api.ticket_export import export_lines
+from .test_base import *
+
+
+class TicketImportTestCase(TeamRelatedCore):
+    """
+    the import loads tickets in the export's format a chunk at a time, and
+    picks up where an interrupted run stopped
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+        response = self.client.post(
+            reverse("team-list"), {"name": "the new tracker"}, format="json"
+        )
+        self.target = Team.objects.get(pk=response.data["id"])
+
+    def writeFile(self, name, lines) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            file.writelines(lines)
+        return path
+
+    def importFile(self, path, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            "import_tickets", self.target.id, path, *args, stdout=stdout, stderr=stderr
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def rows(self, count):
+        return [
+            json.dumps(
+                {
+                    "id": i,
+                    "title": f"ticket {i}",
+                    "status": "triage" if i % 2 else "Done",
+                    "assigned_user": self.user.username,
+                    "tags": ["bug", "ui"] if i % 2 else [],
+                    "due_date": "2022-06-01T12:00:00Z" if i == 0 else None,
+                }
+            )
+            + "\n"
+            for i in range(count)
+        ]
+
+    def testRoundTrip(self):
+        member = Member.objects.get(team=self.team, owner=self.user)
+        status = TicketStatus.objects.create(team=self.team, title="triage")
+        tags = [Tag.objects.create(team=self.team, title=t) for t in ["bug", "ui"]]
+        for ticket in generateArbitraryTickets([self.team], 3):
+            ticket.status, ticket.assigned_user = status, member
+            ticket.save()
+            TicketTag.create_all(tags, ticket)
+
+        for output in ["ndjson", "csv"]:
+            with self.subTest(output=output):
+                Ticket.objects.filter(team=self.target).delete()
+                path = self.writeFile(
+                    f"export.{output}", export_lines(self.team.id, output)
+                )
+                self.importFile(path)
+
+                imported = Ticket.objects.filter(team=self.target).order_by("id")
+                self.assertEqual(
+                    [t.title for t in imported],
+                    list(
+                        Ticket.objects.filter(team=self.team)
+                        .order_by("id")
+                        .values_list("title", flat=True)
+                    ),
+                )
+                for ticket in imported:
+                    self.assertEqual(ticket.status.title, "triage")
+                    self.assertEqual(ticket.status.team, self.target)
+                    self.assertEqual(ticket.assigned_user.owner, self.user)
+                    self.assertEqual(
+                        sorted(tag.title for tag in ticket.tag_list.all()),
+                        ["bug", "ui"],
+                    )
+
+    def testChunks(self):
+        path = self.writeFile("tickets.ndjson", self.rows(5))
+        stdout, _ = self.importFile(path, "--chunk-size=2")
+
+        tickets = Ticket.objects.filter(team=self.target).order_by("ticket_number")
+        self.assertEqual([t.title for t in tickets], [f"ticket {i}" for i in range(5)])
+        self.assertEqual([t.ticket_number for t in tickets], [1, 2, 3, 4, 5])
+        self.assertEqual(tickets[0].due_date.year, 2022)
+        self.assertEqual(tickets[1].status.title, "triage")
+        self.assertEqual(tickets[0].status.title, "Done")
+        self.assertEqual(TicketTag.objects.filter(team=self.target).count(), 2 * 2)
+        self.assertEqual(stdout.count("rows/s"), 4)
+        self.assertIn("imported 5 tickets", stdout)
+
+    def testResume(self):
+        path = self.writeFile("tickets.ndjson", self.rows(6))
+
+        # the second chunk fails, leaving the first committed
+        bulk_create_all = TicketTag.bulk_create_all
+        calls = []
+
+        def failing(tag_lists):
+            calls.append(tag_lists)
+            if len(calls) == 2:
+                raise OperationalError("connection lost")
+            return bulk_create_all(tag_lists)
+
+        with mock.patch.object(TicketTag, "bulk_create_all", side_effect=failing):
+            with self.assertRaises(OperationalError):
+                self.importFile(path, "--chunk-size=2")
+        self.assertEqual(Ticket.objects.filter(team=self.target).count(), 2)
+
+        stdout, _ = self.importFile(path, "--chunk-size=2")
+        self.assertIn("imported 4 tickets", stdout)
+        self.assertIn("2 already imported", stdout)
+
+        # the failed chunk released its ticket numbers
+        self.assertEqual(
+            sorted(
+                Ticket.objects.filter(team=self.target).values_list(
+                    "ticket_number", flat=True
+                )
+            ),
+            [1, 2, 3, 4, 5, 6],
+        )
+
+        # another import under a different name is not a rerun
+        stdout, _ = self.importFile(path, "--source=again")
+        self.assertIn("imported 6 tickets", stdout)
+
+    def testCsvWithBlankIds(self):
+        path = self.writeFile(
+            "tickets.csv",
+            ["id,title,tags\r\n", ",first,\r\n", ",second,\r\n", ",third,\r\n"],
+        )
+        stdout, _ = self.importFile(path)
+        self.assertIn("imported 3 tickets", stdout)
+
+        stdout, _ = self.importFile(path)
+        self.assertIn("3 already imported", stdout)
+        self.assertEqual(Ticket.objects.filter(team=self.target).count(), 3)
+
+    def testInvalidRows(self):
+        path = self.writeFile(
+            "tickets.ndjson",
+            [
+                '{"title": "fine", "assigned_user": "nobody", "tags": ["a b"]}\n',
+                "not json\n",
+                '{"title": ""}\n',
+                '{"title": "late", "due_date": "soon"}\n',
+                "\n",
+                '{"title": "fine too"}\n',
+            ],
+        )
+        stdout, stderr = self.importFile(path)
+
+        self.assertEqual(
+            list(
+                Ticket.objects.filter(team=self.target).values_list("title", flat=True)
+            ),
+            ["fine", "fine too"],
+        )
+        self.assertIn("3 invalid", stdout)
+        self.assertIn("row 1: assigned_user: 'nobody' left out", stderr)
+        self.assertIn("row 1: tags: 'a b' left out", stderr)
+        self.assertIn("row 2: not a valid row", stderr)
+        self.assertIn("row 4: due_date: not a datetime", stderr)
+        self.assertFalse(Tag.objects.filter(title="a b").exists())
+
+    def testArguments(self):
+        with self.assertRaises(CommandError):
+            self.importFile(os.path.join(self.directory.name, "missing.ndjson"))
+
+        path = self.writeFile("tickets.ndjson", self.rows(1))
+        with self.assertRaises(CommandError):
+            call_command("import_tickets", 999, path, stdout=StringIO())
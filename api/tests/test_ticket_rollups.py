@@ -0,0 +1,192 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.ticket_rollups import rebuild_rollups
+from .test_base import *
+
+
+class TicketRollupTestCase(TeamRelatedCore):
+    """
+    every node holds the totals of its descendants, updated along the
+    ancestor path as tickets change, move and go away, and always equal to
+    what rebuilding them from scratch gives
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("team-tickets-list", kwargs={TEAM_PK: self.team.id})
+        self.todo, self.doing, self.done = TicketStatus.objects.filter(team=self.team)
+        self.now = timezone.now().replace(microsecond=0)
+
+    def due(self, days):
+        # as the API renders datetimes
+        due = self.now + datetime.timedelta(days=days)
+        return due.strftime(settings.REST_FRAMEWORK["DATETIME_FORMAT"])
+
+    def create(self, title, parent=None, **data):
+        data = {"title": title, "parent_id": parent, **data}
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return response.data["id"]
+
+    def detailUrl(self, pk):
+        return reverse("team-tickets-detail", kwargs={TEAM_PK: self.team.id, "pk": pk})
+
+    def patch(self, pk, data):
+        response = self.client.patch(self.detailUrl(pk), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
+    def rollup(self, pk):
+        response = self.client.get(self.detailUrl(pk))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()["rollup"]
+
+    def assertRebuilt(self):
+        """
+        The incrementally maintained rollups equal rebuilt ones
+        """
+        fields = ["path", *TicketNode.ROLLUP_FIELDS]
+        maintained = list(TicketNode.objects.order_by("path").values(*fields))
+        rebuild_rollups()
+        self.assertEqual(
+            maintained, list(TicketNode.objects.order_by("path").values(*fields))
+        )
+
+    def buildTree(self):
+        """
+        root
+        └── a           to do, due in 3 days
+            ├── a1      doing, due in 1 day
+            └── a2      done
+                └── a2x to do, due in 2 days
+        """
+        ids = {"root": self.create("root")}
+        ids["a"] = self.create(
+            "a", ids["root"], status=self.todo.id, due_date=self.due(3)
+        )
+        ids["a1"] = self.create(
+            "a1", ids["a"], status=self.doing.id, due_date=self.due(1)
+        )
+        ids["a2"] = self.create("a2", ids["a"], status=self.done.id)
+        ids["a2x"] = self.create(
+            "a2x", ids["a2"], status=self.todo.id, due_date=self.due(2)
+        )
+        return ids
+
+    def testDetail(self):
+        ids = self.buildTree()
+        self.assertEqual(
+            self.rollup(ids["root"]),
+            {
+                "descendant_count": 4,
+                "open_count": 4,
+                "closed_count": 0,
+                "status_counts": {
+                    str(self.todo.id): 2,
+                    str(self.doing.id): 1,
+                    str(self.done.id): 1,
+                },
+                "nearest_due_date": self.due(1),
+            },
+        )
+        self.assertEqual(self.rollup(ids["a2x"])["descendant_count"], 0)
+        self.assertIsNone(self.rollup(self.create("lone")))
+
+        # lists leave the rollups out
+        response = self.client.get(self.url)
+        self.assertNotIn("rollup", response.data["results"][0])
+
+        response = self.client.get(self.detailUrl(ids["root"]), {"fields": "id"})
+        self.assertEqual(response.json(), {"id": ids["root"]})
+        self.assertRebuilt()
+
+    def testTicketChanges(self):
+        ids = self.buildTree()
+
+        self.patch(ids["a1"], {"status": self.done.id, "due_date": None})
+        rollup = self.rollup(ids["root"])
+        self.assertEqual(rollup["status_counts"][str(self.done.id)], 2)
+        self.assertNotIn(str(self.doing.id), rollup["status_counts"])
+        self.assertEqual(rollup["nearest_due_date"], self.due(2))
+        self.assertRebuilt()
+
+        ticket = Ticket.objects.get(pk=ids["a2x"])
+        ticket.deactivated = timezone.now()
+        ticket.save()
+        rollup = self.rollup(ids["a"])
+        self.assertEqual((rollup["open_count"], rollup["closed_count"]), (2, 1))
+        self.assertIsNone(rollup["nearest_due_date"])
+        self.assertEqual(self.rollup(ids["root"])["nearest_due_date"], self.due(3))
+        self.assertRebuilt()
+
+        # changes outside the rollup fields leave the nodes alone
+        with CaptureQueriesContext(connection) as context:
+            self.patch(ids["a1"], {"title": "renamed"})
+        self.assertFalse(
+            [q for q in context.captured_queries if "api_ticketnode" in q["sql"]]
+        )
+
+    def testBulkUpdate(self):
+        ids = self.buildTree()
+        response = self.client.patch(
+            reverse("team-tickets-bulk", kwargs={TEAM_PK: self.team.id}),
+            [
+                {"id": ids["a1"], "status": self.todo.id},
+                {"id": ids["a2x"], "due_date": self.due(-1)},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
+        rollup = self.rollup(ids["root"])
+        self.assertEqual(rollup["status_counts"][str(self.todo.id)], 3)
+        self.assertEqual(rollup["nearest_due_date"], self.due(-1))
+        self.assertRebuilt()
+
+    def testMovesAndDeletes(self):
+        ids = self.buildTree()
+        ids["b"] = self.create("b", ids["root"])
+
+        self.patch(ids["a2"], {"parent_id": ids["b"]})
+        self.assertEqual(self.rollup(ids["a"])["descendant_count"], 1)
+        self.assertEqual(self.rollup(ids["b"])["nearest_due_date"], self.due(2))
+        self.assertEqual(self.rollup(ids["root"])["descendant_count"], 5)
+        self.assertRebuilt()
+
+        self.patch(ids["a"], {"parent_id": None})
+        self.assertEqual(self.rollup(ids["root"])["nearest_due_date"], self.due(2))
+        self.assertRebuilt()
+
+        self.client.delete(self.detailUrl(ids["a2"]))
+        self.assertEqual(self.rollup(ids["b"])["descendant_count"], 1)
+        self.assertEqual(
+            self.rollup(ids["root"])["status_counts"], {str(self.todo.id): 1}
+        )
+        self.assertRebuilt()
+
+    def testDeletedStatus(self):
+        ids = self.buildTree()
+        key = str(self.doing.id)
+        self.doing.delete()
+        self.assertNotIn(key, self.rollup(ids["root"])["status_counts"])
+        self.assertRebuilt()
+
+    def testRebuildCommand(self):
+        ids = self.buildTree()
+        TicketNode.objects.update(descendant_count=0, status_counts={})
+
+        stdout = StringIO()
+        call_command("rebuild_ticket_rollups", f"--team={self.team.id}", stdout=stdout)
+        self.assertIn("rebuilt the rollups of 5 nodes", stdout.getvalue())
+        self.assertEqual(self.rollup(ids["root"])["descendant_count"], 4)
+        self.assertEqual(
+            self.rollup(ids["a"])["status_counts"],
+            {
+                str(self.doing.id): 1,
+                str(self.done.id): 1,
+                str(self.todo.id): 1,
+            },
+        )
@@ -0,0 +1,175 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+
+from api.ticket_search import SEARCH_TABLE, reindex_tickets
+from .test_base import *
+
+
+class TicketSearchCore(TeamRelatedCore):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("team-tickets-list", kwargs={TEAM_PK: self.team.id})
+        self.status = TicketStatus.objects.create(team=self.team, title="triage")
+        self.tag = Tag.objects.create(team=self.team, title="frontend")
+
+    def createTicket(self, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Ticket.objects.get(pk=response.data["id"])
+
+    def search(self, query):
+        response = self.client.get(self.url, {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [ticket["id"] for ticket in response.data["results"]]
+
+
+class TicketSearchTestCase(TicketSearchCore):
+    """
+    ?q= searches the ticket list through the full-text index, which is
+    rebuilt when the transaction changing a ticket, tag or status commits
+    """
+
+    def testRankedResults(self):
+        in_description = self.createTicket(
+            title="layout issue", description="the login button overflows"
+        )
+        in_title = self.createTicket(title="login button missing")
+        self.createTicket(title="unrelated", description="nothing to see")
+
+        self.assertEqual(self.search("login button"), [in_title.id, in_description.id])
+        self.assertEqual(self.search("missing login"), [in_title.id])
+        self.assertEqual(self.search("absent"), [])
+
+    def testTagsAndStatus(self):
+        ticket = self.createTicket(
+            title="a ticket", tag_list=[self.tag.id], status=self.status.id
+        )
+        self.assertEqual(self.search("frontend"), [ticket.id])
+        self.assertEqual(self.search("triage"), [ticket.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.title = "backend"
+            self.tag.save()
+            self.status.title = "review"
+            self.status.save()
+
+        self.assertEqual(self.search("frontend"), [])
+        self.assertEqual(self.search("backend review"), [ticket.id])
+
+    def testTagChanges(self):
+        ticket = self.createTicket(title="a ticket")
+        self.assertEqual(self.search("frontend"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse(
+                    "team-tickets-detail",
+                    kwargs={TEAM_PK: self.team.id, "pk": ticket.pk},
+                ),
+                {"tag_list": [self.tag.id]},
+                format="json",
+            )
+        self.assertEqual(self.search("frontend"), [ticket.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+        self.assertEqual(self.search("frontend"), [])
+
+    def testDeletedTicketsLeaveTheIndex(self):
+        ticket = self.createTicket(title="doomed")
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def testBulkCreateIsIndexed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("team-tickets-bulk", kwargs={TEAM_PK: self.team.id}),
+                [{"title": f"bulk {i}"} for i in range(3)],
+                format="json",
+            )
+        self.assertEqual(len(self.search("bulk")), 3)
+
+    def testOtherTeamsAreNotSearched(self):
+        other_team = generateArbitraryTeams(1)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(team=other_team, title="shared words")
+        ticket = self.createTicket(title="shared words")
+
+        self.assertEqual(self.search("shared"), [ticket.id])
+
+    def testQuerySyntaxIsEscaped(self):
+        ticket = self.createTicket(title="crash on save")
+        self.assertEqual(self.search('crash ("save'), [ticket.id])
+        self.assertEqual(self.search("*^"), [])
+
+    def testRebuild(self):
+        tickets = generateArbitraryTickets([self.team], 3)
+        self.assertEqual(self.search(tickets[0].title), [])
+
+        out = StringIO()
+        call_command("rebuild_search_index", stdout=out)
+        self.assertIn("reindexed 3 tickets", out.getvalue())
+        self.assertEqual(self.search(tickets[0].title), [tickets[0].id])
+
+        reindex_tickets([tickets[0].id])
+        self.assertEqual(self.search(tickets[0].title), [tickets[0].id])
+
+    def testCursorPaginationIsRejected(self):
+        self.createTicket(title="paged")
+        for params in [{"pagination": "cursor"}, {"cursor": "cD0x"}]:
+            response = self.client.get(self.url, {"q": "paged", **params})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("q", response.data)
+
+        response = self.client.get(self.url, {"q": "paged", "page": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@skipUnless(
+    connection.vendor == "postgresql",
+    "set SLUGGO_DB_ENGINE=postgresql to test the tsvector search",
+)
+class PostgresTicketSearchTestCase(TicketSearchCore):
+    """
+    the weighted tsvector documents of PostgreSQL, matched with
+    websearch_to_tsquery
+    """
+
+    def testWeightedDocuments(self):
+        ticket = self.createTicket(
+            title="login", description="form", tag_list=[self.tag.id]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT document::text FROM {SEARCH_TABLE} WHERE ticket_id = %s",
+                [ticket.id],
+            )
+            document = cursor.fetchone()[0]
+        # titles weigh A, tags and statuses B and descriptions C
+        self.assertIn("'login':1A", document)
+        self.assertRegex(document, r"'frontend':\d+B")
+        self.assertRegex(document, r"'form':\d+C")
+
+    def testStemmingAndWebSearchSyntax(self):
+        failing = self.createTicket(title="login fails", description="button")
+        self.createTicket(title="logout fails")
+
+        self.assertEqual(self.search("failing logins"), [failing.id])
+        self.assertEqual(self.search('"login fails" -button'), [])
+        self.assertEqual(len(self.search("login or logout")), 2)
+
+    def testIndexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexdef FROM pg_indexes WHERE tablename = %s",
+                [SEARCH_TABLE],
+            )
+            definitions = [row[0] for row in cursor.fetchall()]
+        self.assertTrue(any("USING gin (document)" in d for d in definitions))
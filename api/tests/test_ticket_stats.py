@@ -0,0 +1,140 @@
+import datetime
+
+from django.utils import timezone
+
+from api.ticket_search import reindex_tickets
+from api.ticket_stats import stats_cache, team_stats, ticket_stats
+from .test_base import *
+
+
+class TicketStatsTestCase(TeamRelatedCore):
+    """
+    the stats endpoint counts the tickets matching the list's filters with a
+    few grouped queries, reads them from the team counters without filters,
+    and serves repeated requests from its cache until the team changes
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("team-tickets-stats", kwargs={TEAM_PK: self.team.id})
+        self.member = Member.objects.get(team=self.team, owner=self.user)
+        self.todo, self.doing, self.done = TicketStatus.objects.filter(team=self.team)
+        self.bug, self.ui = (
+            Tag.objects.create(team=self.team, title=t) for t in ["bug", "ui"]
+        )
+
+        past = timezone.now() - datetime.timedelta(days=1)
+        future = timezone.now() + datetime.timedelta(days=1)
+        self.tickets = generateArbitraryTickets([self.team], 5)
+        for ticket, status_, assignee, due, tags in zip(
+            self.tickets,
+            [self.todo, self.todo, self.doing, None, self.doing],
+            [self.member, self.member, None, self.member, None],
+            [past, future, past, past, None],
+            [[self.bug, self.ui], [self.bug], [], [self.ui], []],
+        ):
+            ticket.status, ticket.assigned_user, ticket.due_date = (
+                status_,
+                assignee,
+                due,
+            )
+            ticket.save()
+            TicketTag.create_all(tags, ticket)
+
+        # closed, so no longer overdue
+        self.tickets[2].deactivated = timezone.now()
+        self.tickets[2].save()
+
+    def stats(self, params=None):
+        response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    @staticmethod
+    def counts(facet) -> dict:
+        return {row["id"]: (row["count"], row["overdue"]) for row in facet}
+
+    def testFacets(self):
+        stats = self.stats()
+        self.assertEqual((stats["total"], stats["open"], stats["overdue"]), (5, 4, 2))
+        self.assertEqual(
+            self.counts(stats["by_status"]),
+            {
+                self.todo.id: (2, 1),
+                self.doing.id: (2, 0),
+                self.done.id: (0, 0),
+                None: (1, 1),
+            },
+        )
+        self.assertEqual(stats["by_status"][0]["title"], "To do")
+        self.assertEqual(
+            self.counts(stats["by_assignee"]),
+            {self.member.id: (3, 2), None: (2, 0)},
+        )
+        (assignee,) = [r for r in stats["by_assignee"] if r["id"] == self.member.id]
+        self.assertEqual(assignee["username"], self.user.username)
+        self.assertEqual(
+            self.counts(stats["by_tag"]),
+            {self.bug.id: (2, 1), self.ui.id: (2, 2)},
+        )
+
+    def testFilters(self):
+        stats = self.stats({"status__id": self.todo.id})
+        self.assertEqual(stats["total"], 2)
+        self.assertEqual(self.counts(stats["by_tag"])[self.bug.id], (2, 1))
+
+        # a ticket with both tags is counted once
+        stats = self.stats({"tag_list__id": self.bug.id})
+        self.assertEqual(stats["total"], 2)
+        self.assertEqual(self.counts(stats["by_tag"])[self.ui.id], (1, 1))
+
+        # the search index is only rebuilt on commit otherwise
+        reindex_tickets(None)
+        stats = self.stats({"q": self.tickets[3].title})
+        self.assertEqual(stats["total"], 1)
+        self.assertEqual(self.counts(stats["by_status"])[None], (1, 1))
+
+    def testGroupedQueries(self):
+        with CaptureQueriesContext(connection) as context:
+            ticket_stats(self.team, Ticket.objects.filter(team=self.team))
+        self.assertEqual(len(context.captured_queries), 4)
+
+    def testCachedUntilTheTeamChanges(self):
+        self.stats()
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.stats()["total"], 5)
+        self.assertFalse(
+            [q for q in context.captured_queries if "api_ticket" in q["sql"]]
+        )
+        self.assertEqual(stats_cache.stats()["hits"], 1)
+
+        generateArbitraryTickets([self.team], 1)
+        self.assertEqual(self.stats()["total"], 6)
+
+        # filters are cached apart
+        self.assertEqual(self.stats({"status__id": self.todo.id})["total"], 2)
+
+    def testCountersMatchGroupedQueries(self):
+        self.assertEqual(
+            team_stats(self.team),
+            ticket_stats(self.team, Ticket.objects.filter(team=self.team)),
+        )
+        self.assertEqual(
+            [(row["count"], row["open"]) for row in self.stats()["by_status"]],
+            [(2, 2), (2, 1), (0, 0), (1, 1)],
+        )
+
+    def testCountersQueriesDoNotGrow(self):
+        def queries():
+            with CaptureQueriesContext(connection) as context:
+                team_stats(self.team)
+            return len(context.captured_queries)
+
+        before = queries()
+        generateArbitraryTickets([self.team], 20)
+        self.assertEqual(queries(), before)
+
+    def testOnlyMembers(self):
+        self.client.force_authenticate(User.objects.create(username="outsider"))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
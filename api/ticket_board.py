@@ -0,0 +1,139 @@
+from django.db import connections
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Team, TeamCounter, Ticket, TicketStatus
+
+"""
+the kanban board of a team: a column per status, and one for the tickets
+without a status, each holding its first tickets in id order and how many
+it has in all. The tickets of every column are picked by one query, which
+numbers the tickets of each status with ROW_NUMBER() and keeps the first
+of each; the next tickets of a column, after the last one shown, come from
+the same query limited to that column. Column totals are read from the
+team counters when the board is not filtered, and counted with COUNT()
+over the same window otherwise
+"""
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def ranked(tickets, counted: bool):
+    """
+    (id, status id, rank) of tickets, ranked in id order within their
+    status, followed by the size of their column when counted
+    """
+    window = dict(partition_by=[F("status_id")])
+    tickets = tickets.order_by().annotate(
+        board_rank=Window(RowNumber(), order_by=F("id").asc(), **window)
+    )
+    fields = ["pk", "status_id", "board_rank"]
+    if counted:
+        tickets = tickets.annotate(column_count=Window(Count("pk"), **window))
+        fields.append("column_count")
+    return tickets.values_list(*fields)
+
+
+def select_ranked(rows, condition: str, params) -> list:
+    # window functions cannot be filtered on in the query computing them
+    sql, inner_params = rows.query.sql_with_params()
+    with connections[rows.db].cursor() as cursor:
+        cursor.execute(
+            f"SELECT * FROM ({sql}) board WHERE {condition}", (*inner_params, *params)
+        )
+        return cursor.fetchall()
+
+
+class Column:
+    def __init__(self, status_id, title=None, color=None):
+        self.status_id = status_id
+        self.title = title
+        self.color = color
+        self.ticket_ids = []
+        self.count = 0
+        # whether tickets follow the last of ticket_ids
+        self.more = False
+
+    def fill(self, rows, limit: int, counted: bool):
+        """
+        Takes the ticket ids of the column from up to limit + 1 rows, the
+        one past the limit telling there are more, and the count of the
+        column from them when counted
+        """
+        self.ticket_ids = [row[0] for row in rows[:limit]]
+        self.more = len(rows) > limit
+        if counted and rows:
+            self.count = rows[0][3]
+
+
+def team_tickets(team: Team, tickets=None):
+    # filters across tags may repeat tickets, which the subquery removes
+    if tickets is None:
+        return Ticket.objects.filter(team=team)
+    return Ticket.objects.filter(team=team, pk__in=tickets.order_by().values("pk"))
+
+
+def status_counts(team: Team) -> dict:
+    counters = TeamCounter.read(team.id)[TeamCounter.STATUS]
+    return {status_id: count for status_id, (count, _) in counters.items()}
+
+
+def board(team: Team, tickets=None, limit: int = DEFAULT_LIMIT) -> list:
+    """
+    The Columns of team, with the first limit tickets of each, over the
+    tickets of the queryset tickets when given, which may carry any filter
+    of the ticket list, or over all the team's tickets
+    """
+    columns = [
+        Column(*status)
+        for status in TicketStatus.objects.filter(team=team)
+        .order_by("id")
+        .values_list("id", "title", "color")
+    ]
+    columns.append(Column(None))
+
+    counted = tickets is not None
+    rows = select_ranked(
+        ranked(team_tickets(team, tickets), counted),
+        "board_rank <= %s ORDER BY board.id",
+        [limit + 1],
+    )
+    by_status = {}
+    for row in rows:
+        by_status.setdefault(row[1], []).append(row)
+
+    counts = {} if counted else status_counts(team)
+    for column in columns:
+        column.count = counts.get(column.status_id, 0)
+        column.fill(by_status.get(column.status_id, []), limit, counted)
+    return columns
+
+
+def board_column(
+    team: Team, status=None, after=None, tickets=None, limit: int = DEFAULT_LIMIT
+) -> Column:
+    """
+    The Column of the TicketStatus status, or of the tickets without a
+    status for None, with its first limit tickets after the ticket id after
+    """
+    if status is None:
+        column = Column(None)
+    else:
+        column = Column(status.id, status.title, status.color)
+
+    counted = tickets is not None
+    column_tickets = team_tickets(team, tickets).filter(status=status)
+    rows = select_ranked(
+        ranked(column_tickets, counted),
+        "board.id > %s ORDER BY board.id LIMIT %s",
+        [after or 0, limit + 1],
+    )
+    column.fill(rows, limit, counted)
+
+    if not counted:
+        column.count = status_counts(team).get(column.status_id, 0)
+    elif not rows:
+        # the count comes with the rows past after, and none are left
+        column.count = column_tickets.count()
+    return column
@@ -0,0 +1,225 @@
+import csv
+import json
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Member, Tag, Team, Ticket, TicketStatus, TicketTag
+from .ticket_export import CSV, NDJSON
+
+"""
+bulk loads tickets in the format written by ticket_export, with statuses,
+assignees and tags given by title and username. Every imported ticket gets
+an object_uuid derived from the team, the name of the import and the row's
+id (or its row number), so running an interrupted import again skips the
+chunks that were already committed
+"""
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# columns of a row which are copied onto the ticket as they are
+TICKET_FIELDS = ["title", "description"]
+DATETIME_FIELDS = ["due_date", "deactivated"]
+
+
+def read_rows(path, format=None):
+    """
+    Yields (row number, row) for every row of an NDJSON or CSV file, row
+    being None for lines which cannot be parsed. The format defaults to
+    the file's extension
+    """
+    if format is None:
+        format = CSV if path.endswith(".csv") else NDJSON
+
+    with open(path, encoding="utf-8", newline="") as file:
+        if format == CSV:
+            for number, row in enumerate(csv.DictReader(file), 1):
+                yield number, from_csv(row)
+            return
+
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row if isinstance(row, dict) else None
+
+
+def is_valid(model, field: str, value) -> bool:
+    try:
+        model._meta.get_field(field).clean(value, None)
+    except ValidationError:
+        return False
+    return True
+
+
+def from_csv(row: dict):
+    row = {key: value if value != "" else None for key, value in row.items()}
+    try:
+        row["tags"] = json.loads(row["tags"]) if row.get("tags") else []
+    except ValueError:
+        return None
+    return row
+
+
+class TicketImporter:
+    def __init__(self, team: Team, source: str):
+        self.team = team
+        self.source = source
+        self.statuses = {}
+        self.tags = {}
+        self.members = {}
+        self.imported = self.skipped = self.invalid = 0
+        # (row number, message) of rows left out or imported only in part,
+        # for the caller to report and clear
+        self.errors = []
+
+    def resolve(self, rows):
+        """
+        Looks up the statuses, tags and assignees rows refer to, creating
+        the statuses and tags the team does not have yet
+        """
+        statuses, tags, usernames = set(), set(), set()
+        for _, row in rows:
+            if row is None:
+                continue
+            if isinstance(row.get("status"), str):
+                statuses.add(row["status"])
+            if isinstance(row.get("assigned_user"), str):
+                usernames.add(row["assigned_user"])
+            if isinstance(row.get("tags"), list):
+                tags.update(tag for tag in row["tags"] if isinstance(tag, str))
+
+        # titles the API would refuse are left out of the tickets instead
+        statuses = {
+            title for title in statuses if is_valid(TicketStatus, "title", title)
+        }
+        tags = {title for title in tags if is_valid(Tag, "title", title)}
+
+        self.statuses = {
+            status.title: status
+            for status in TicketStatus.objects.filter(
+                team=self.team, title__in=statuses
+            )
+        }
+        self.tags = {
+            tag.title: tag for tag in Tag.objects.filter(team=self.team, title__in=tags)
+        }
+        # created one by one, so that their signals are sent; there are few
+        with transaction.atomic():
+            for title in sorted(statuses.difference(self.statuses)):
+                self.statuses[title] = TicketStatus.objects.create(
+                    team=self.team, title=title
+                )
+            for title in sorted(tags.difference(self.tags)):
+                self.tags[title] = Tag.objects.create(team=self.team, title=title)
+
+        self.members = {
+            member.owner.username: member
+            for member in Member.objects.filter(
+                team=self.team, owner__username__in=usernames
+            ).select_related("owner")
+        }
+
+    def row_uuid(self, number, row) -> uuid.UUID:
+        # rows without an id, or with a blank one in a CSV file, are keyed by
+        # their place in the file
+        key = row.get("id")
+        if key is None:
+            key = number
+        return uuid.uuid5(
+            uuid.NAMESPACE_URL, f"sluggo-import:{self.team.id}:{self.source}:{key}"
+        )
+
+    def build(self, number, row):
+        """
+        Returns (ticket, tags) of a row, or None when it is invalid
+        """
+        if row is None:
+            return self.reject(number, "not a valid row")
+
+        ticket = Ticket(team=self.team, object_uuid=self.row_uuid(number, row))
+        for field in TICKET_FIELDS:
+            setattr(ticket, field, row.get(field))
+        for field in DATETIME_FIELDS:
+            value = row.get(field) or None
+            if value is not None:
+                try:
+                    value = parse_datetime(value)
+                except (TypeError, ValueError):
+                    value = None
+                if value is None:
+                    return self.reject(number, f"{field}: not a datetime")
+                if timezone.is_naive(value):
+                    value = timezone.make_aware(value)
+            setattr(ticket, field, value)
+
+        tags = row.get("tags") or []
+        if not isinstance(tags, list):
+            return self.reject(number, "tags: not a list")
+
+        try:
+            ticket.clean_fields(
+                exclude=["team", "ticket_number", "status", "assigned_user"]
+            )
+        except ValidationError as error:
+            return self.reject(number, "; ".join(error.messages))
+
+        # the ticket is imported without the references which cannot be resolved
+        ticket.status = self.lookup(number, "status", self.statuses, row.get("status"))
+        ticket.assigned_user = self.lookup(
+            number, "assigned_user", self.members, row.get("assigned_user")
+        )
+        tags = [self.lookup(number, "tags", self.tags, tag) for tag in tags]
+        return ticket, [tag for tag in tags if tag is not None]
+
+    def reject(self, number, message):
+        self.invalid += 1
+        self.errors.append((number, message))
+        return None
+
+    def lookup(self, number, field, resolved: dict, value):
+        if value is None:
+            return None
+        if isinstance(value, str) and value in resolved:
+            return resolved[value]
+        self.errors.append((number, f"{field}: {value!r} left out, not found"))
+        return None
+
+    def import_chunk(self, chunk: list) -> int:
+        """
+        Inserts a chunk of (row number, row) in one transaction, with one
+        reservation of ticket numbers, skipping rows imported before.
+        Returns the number of tickets inserted
+        """
+        invalid = self.invalid
+        built = {}
+        for number, row in chunk:
+            pair = self.build(number, row)
+            if pair is not None:
+                # a row repeated within the file is imported once
+                built.setdefault(pair[0].object_uuid, pair)
+
+        with transaction.atomic():
+            existing = Ticket.objects.filter(object_uuid__in=list(built)).values_list(
+                "object_uuid", flat=True
+            )
+            for object_uuid in existing:
+                del built[object_uuid]
+            built = list(built.values())
+            self.skipped += len(chunk) - (self.invalid - invalid) - len(built)
+
+            tickets = Ticket.bulk_create_numbered(
+                self.team, [ticket for ticket, _ in built]
+            )
+            TicketTag.bulk_create_all(
+                [(ticket, tags) for ticket, (_, tags) in zip(tickets, built)]
+            )
+
+        self.imported += len(tickets)
+        return len(tickets)
@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Team, Ticket, TicketNode, TicketStatus, tickets_bulk_saved
+from .models.ticket_node import Rollup
+
+"""
+keeps the subtree rollups of TicketNode current when tickets change. A save
+which changes the status, due date or deactivation of a ticket in a
+hierarchy moves its contribution within the rollups of its ancestors, one
+locked read and one bulk update of the ancestor path per ticket; moving and
+removing nodes is accounted for by TicketNode itself. rebuild_rollups
+recomputes every rollup from scratch, for repair
+"""
+
+# sqlite limits the number of parameters in a single statement
+REBUILD_BATCH_SIZE = 500
+
+
+def update_ancestors(tickets):
+    """
+    Applies the changes of the rollup fields of tickets since they were
+    loaded or last saved to the rollups of their ancestors
+    """
+    changed = {}
+    for ticket in tickets:
+        changes = ticket.saved_changes(Ticket.ROLLUP_FIELDS)
+        if changes is not None:
+            changed[ticket.pk] = tuple(Rollup.of_state(*state) for state in changes)
+
+    if not changed:
+        return
+
+    paths = TicketNode.objects.filter(ticket_id__in=list(changed)).values_list(
+        "ticket_id", "path"
+    )
+    for ticket_id, path in paths:
+        removed, added = changed[ticket_id]
+        TicketNode.update_rollups(
+            TicketNode.ancestor_paths(path), added=added, removed=removed
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created=False, raw=False, **kwargs):
+    # new tickets join a hierarchy through TicketNode.set_parent
+    if not created and not raw:
+        update_ancestors([instance])
+
+
+@receiver(tickets_bulk_saved)
+def tickets_saved(sender, tickets, created=False, **kwargs):
+    if not created:
+        update_ancestors(tickets)
+
+
+@receiver(post_delete, sender=TicketStatus)
+def status_deleted(sender, instance, **kwargs):
+    # the tickets of a deleted status lose it without being saved. The nodes
+    # are filtered here, as has_key takes numeric keys for array indexes on
+    # some backends. The nodes of a team being deleted go with it
+    if Team.is_deleting(instance.team_id):
+        return
+
+    key = str(instance.pk)
+    nodes = [
+        node
+        for node in TicketNode.objects.filter(
+            ticket__team_id=instance.team_id, numchild__gt=0
+        ).only("id", "status_counts")
+        if key in node.status_counts
+    ]
+    for node in nodes:
+        del node.status_counts[key]
+    TicketNode.objects.bulk_update(nodes, ["status_counts"])
+
+
+def rebuild_rollups(team_id=None) -> int:
+    """
+    Recomputes the rollups of every node, or of the nodes of a team, in one
+    read of the nodes and their tickets. Returns the number of nodes
+    """
+    nodes = TicketNode.objects.order_by("path")
+    if team_id is not None:
+        nodes = nodes.filter(ticket__team_id=team_id)
+
+    with transaction.atomic():
+        rows = list(
+            nodes.values_list(
+                "id",
+                "path",
+                "ticket__team_id",
+                *(f"ticket__{field}" for field in Ticket.ROLLUP_FIELDS),
+            )
+        )
+        rollups = {path: Rollup() for _, path, *_ in rows}
+        for _, path, _, *state in rows:
+            contribution = Rollup.of_state(*state)
+            for ancestor in TicketNode.ancestor_paths(path):
+                if ancestor in rollups:
+                    rollups[ancestor] += contribution
+
+        updated = []
+        for pk, path, *_ in rows:
+            node = TicketNode(pk=pk, path=path)
+            node.rollup = rollups[path]
+            updated.append(node)
+        TicketNode.objects.bulk_update(
+            updated, TicketNode.ROLLUP_FIELDS, batch_size=REBUILD_BATCH_SIZE
+        )
+        Team.bump_version(*{team_id for _, _, team_id, *_ in rows})
+    return len(rows)
@@ -0,0 +1,322 @@
+import logging
+import re
+import threading
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import (
+    Tag,
+    Ticket,
+    TicketStatus,
+    TicketTag,
+    ticket_tags_changed,
+    tickets_bulk_saved,
+)
+
+"""
+full-text search over tickets. Each ticket has a search document built from
+its title, tags, status and description, kept in a table maintained by the
+backend of the database in use: a tsvector column with a GIN index on
+PostgreSQL, an FTS5 table on SQLite. Other databases fall back to substring
+matching. Documents are rebuilt after the transaction that changed their
+ticket, tags or status commits
+"""
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = "api_ticket_search"
+
+# sqlite limits the number of parameters in a single statement
+REINDEX_CHUNK_SIZE = 500
+
+
+class FallbackTicketSearch:
+    """
+    Substring matching on the ticket itself, for databases without a
+    full-text backend here
+    """
+
+    def install(self, cursor):
+        pass
+
+    def uninstall(self, cursor):
+        pass
+
+    def reindex(self, cursor, ticket_ids=None):
+        pass
+
+    def search(self, queryset, query: str, team_id=None):
+        lookup = Q()
+        for term in tokenize(query):
+            lookup &= Q(title__icontains=term) | Q(description__icontains=term)
+        return queryset.filter(lookup).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    @staticmethod
+    def document_sql(aggregate: str) -> str:
+        """
+        Selects (ticket id, team id, title, tags, status, description) for
+        the tickets matching the statement's WHERE clause, {where}
+        """
+        return (
+            "SELECT t.id, t.team_id, t.title, "
+            f"{aggregate}, s.title, t.description "
+            f"FROM {Ticket._meta.db_table} t "
+            f"LEFT JOIN {TicketStatus._meta.db_table} s ON s.id = t.status_id "
+            f"LEFT JOIN {TicketTag._meta.db_table} tt ON tt.ticket_id = t.id "
+            f"LEFT JOIN {Tag._meta.db_table} g ON g.id = tt.tag_id "
+            "{where} "
+            "GROUP BY t.id, t.team_id, t.title, s.title, t.description"
+        )
+
+    def reindex_chunks(self, cursor, ticket_ids, delete_sql, insert_sql):
+        if ticket_ids is None:
+            cursor.execute(delete_sql.format(where=""))
+            cursor.execute(insert_sql.format(where=""))
+            return
+
+        ticket_ids = list(ticket_ids)
+        for start in range(0, len(ticket_ids), REINDEX_CHUNK_SIZE):
+            chunk = ticket_ids[start : start + REINDEX_CHUNK_SIZE]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(delete_sql.format(where=f"({placeholders})"), chunk)
+            cursor.execute(
+                insert_sql.format(where=f"WHERE t.id IN ({placeholders})"), chunk
+            )
+
+
+class PostgresTicketSearch(FallbackTicketSearch):
+    """
+    Weighted tsvector documents, title first, then tags and status, then
+    the description, matched with websearch_to_tsquery and ranked by
+    ts_rank_cd
+    """
+
+    config = "english"
+
+    def install(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE {SEARCH_TABLE} ("
+            f"ticket_id bigint PRIMARY KEY REFERENCES {Ticket._meta.db_table} (id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "team_id bigint NOT NULL, "
+            "document tsvector NOT NULL)"
+        )
+        cursor.execute(
+            f"CREATE INDEX {SEARCH_TABLE}_document ON {SEARCH_TABLE} "
+            "USING gin (document)"
+        )
+        cursor.execute(f"CREATE INDEX {SEARCH_TABLE}_team ON {SEARCH_TABLE} (team_id)")
+        self.reindex(cursor)
+
+    def uninstall(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+    def reindex(self, cursor, ticket_ids=None):
+        document = (
+            "SELECT id, team_id, "
+            f"setweight(to_tsvector('{self.config}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{self.config}', coalesce(tags, '')), 'B') || "
+            f"setweight(to_tsvector('{self.config}', coalesce(status, '')), 'B') || "
+            f"setweight(to_tsvector('{self.config}', coalesce(description, '')), 'C') "
+            "FROM ("
+            + self.document_sql("string_agg(g.title, ' ')")
+            + ") AS ticket (id, team_id, title, tags, status, description)"
+        )
+        self.reindex_chunks(
+            cursor,
+            ticket_ids,
+            f"DELETE FROM {SEARCH_TABLE} WHERE ticket_id IN {{where}}"
+            if ticket_ids is not None
+            else f"DELETE FROM {SEARCH_TABLE}",
+            f"INSERT INTO {SEARCH_TABLE} (ticket_id, team_id, document) " + document,
+        )
+
+    def search(self, queryset, query: str, team_id=None):
+        tsquery = f"websearch_to_tsquery('{self.config}', %s)"
+        team_filter, params = ("AND team_id = %s", [team_id]) if team_id else ("", [])
+        matches = RawSQL(
+            f"SELECT ticket_id FROM {SEARCH_TABLE} "
+            f"WHERE document @@ {tsquery} {team_filter}",
+            [query, *params],
+        )
+        rank = RawSQL(
+            f"SELECT ts_rank_cd(document, {tsquery}) FROM {SEARCH_TABLE} "
+            f"WHERE ticket_id = {Ticket._meta.db_table}.id",
+            [query],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matches).annotate(search_rank=rank)
+
+
+class SqliteTicketSearch(FallbackTicketSearch):
+    """
+    An FTS5 table keyed by ticket id, matched on all query terms and ranked
+    by bm25 with the title weighted highest
+    """
+
+    weights = "0.0, 10.0, 4.0, 4.0, 1.0"
+
+    def install(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            "team_id UNINDEXED, title, tags, status, description)"
+        )
+        self.reindex(cursor)
+
+    def uninstall(self, cursor):
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+    def reindex(self, cursor, ticket_ids=None):
+        self.reindex_chunks(
+            cursor,
+            ticket_ids,
+            f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN {{where}}"
+            if ticket_ids is not None
+            else f"DELETE FROM {SEARCH_TABLE}",
+            f"INSERT INTO {SEARCH_TABLE} "
+            "(rowid, team_id, title, tags, status, description) "
+            + self.document_sql("group_concat(g.title, ' ')"),
+        )
+
+    @staticmethod
+    def match_expression(query: str) -> str:
+        # quoted terms keep user input from being read as FTS5 syntax
+        return " ".join('"{}"'.format(term) for term in tokenize(query))
+
+    def search(self, queryset, query: str, team_id=None):
+        expression = self.match_expression(query)
+        if not expression:
+            return queryset.none().annotate(
+                search_rank=Value(0.0, output_field=FloatField())
+            )
+
+        team_filter, params = ("AND team_id = %s", [team_id]) if team_id else ("", [])
+        matches = RawSQL(
+            f"SELECT rowid FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s {team_filter}",
+            [expression, *params],
+        )
+        rank = RawSQL(
+            f"SELECT -bm25({SEARCH_TABLE}, {self.weights}) FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s "
+            f"AND rowid = {Ticket._meta.db_table}.id",
+            [expression],
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matches).annotate(search_rank=rank)
+
+
+BACKENDS = {
+    "postgresql": PostgresTicketSearch,
+    "sqlite": SqliteTicketSearch,
+}
+
+
+def tokenize(query: str) -> list:
+    return re.findall(r"\w+", query)
+
+
+def get_backend(connection) -> FallbackTicketSearch:
+    return BACKENDS.get(connection.vendor, FallbackTicketSearch)()
+
+
+def search_tickets(queryset, query: str, team_id=None):
+    """
+    Filters a ticket queryset down to the tickets matching query, annotated
+    with search_rank (higher is better) and ordered by it. Passing the team
+    the queryset is limited to narrows the match itself
+    """
+    backend = get_backend(connections[queryset.db])
+    return backend.search(queryset, query, team_id).order_by("-search_rank", "id")
+
+
+_pending = threading.local()
+
+
+def reindex_tickets(ticket_ids, using="default"):
+    """
+    Rebuilds the search documents of the given tickets, or of every ticket
+    when ticket_ids is None
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        get_backend(connection).reindex(cursor, ticket_ids)
+
+
+def schedule_reindex(ticket_ids, using="default"):
+    """
+    Rebuilds the search documents of the given tickets once the current
+    transaction commits. Tickets scheduled several times within one
+    transaction are reindexed once
+    """
+    ticket_ids = {pk for pk in ticket_ids if pk is not None}
+    if not ticket_ids:
+        return
+
+    pending = getattr(_pending, "ticket_ids", None)
+    if pending is None:
+        pending = _pending.ticket_ids = set()
+    pending.update(ticket_ids)
+
+    def reindex():
+        if not _pending.ticket_ids:
+            return
+
+        ticket_ids, _pending.ticket_ids = _pending.ticket_ids, set()
+        try:
+            reindex_tickets(ticket_ids, using)
+        except DatabaseError:
+            # the change itself is committed, rebuild_search_index repairs this
+            logger.exception("failed to reindex tickets %s", sorted(ticket_ids))
+
+    transaction.on_commit(reindex, using=using)
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_reindex([instance.pk])
+
+
+@receiver(tickets_bulk_saved)
+def tickets_saved(sender, tickets, **kwargs):
+    schedule_reindex(ticket.pk for ticket in tickets)
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    # reindexing a ticket that no longer exists removes its document
+    schedule_reindex([instance.pk])
+
+
+@receiver(ticket_tags_changed)
+def ticket_tags_updated(sender, ticket, **kwargs):
+    schedule_reindex([ticket.pk])
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=TicketStatus)
+def label_saved(sender, instance, created=False, raw=False, **kwargs):
+    # new tags and statuses are not on any ticket yet
+    if not created and not raw:
+        schedule_reindex(label_ticket_ids(instance))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=TicketStatus)
+def label_deleted(sender, instance, **kwargs):
+    schedule_reindex(label_ticket_ids(instance))
+
+
+def label_ticket_ids(instance) -> list:
+    if isinstance(instance, Tag):
+        tickets = TicketTag.objects.filter(tag=instance).values_list("ticket_id")
+    else:
+        tickets = Ticket.objects.filter(status=instance).values_list("id")
+    return [pk for (pk,) in tickets.order_by()]
@@ -0,0 +1,197 @@
+from collections import Counter
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Member, Tag, Team, TeamCounter, Ticket, TicketStatus, TicketTag
+from .versioned_cache import VersionedCache
+
+"""
+the facets of a team's dashboard: ticket totals, and ticket, open and
+overdue counts by status, by assignee and by tag. Over the tickets matching
+filters of the ticket list each facet is one GROUP BY query, while the
+stats of all of a team's tickets are read from its counters, only counting
+the overdue tickets. Results are kept in a per process cache keyed by the
+team's version, which every write to its tickets bumps, so a cached result
+is only served while it is current
+"""
+
+
+def overdue(now, prefix="") -> Q:
+    # open tickets past their due date
+    return Q(**{f"{prefix}deactivated": None, f"{prefix}due_date__lt": now})
+
+
+def row(key, name_field, name, count, open_count, overdue_count) -> dict:
+    return {
+        "id": key,
+        name_field: name,
+        "count": count,
+        "open": open_count,
+        "overdue": overdue_count,
+    }
+
+
+def by_key(rows) -> list:
+    # the row of the tickets without a status or assignee comes last
+    return sorted(rows, key=lambda row: (row["id"] is None, row["id"] or 0))
+
+
+def ticket_stats(team: Team, tickets) -> dict:
+    """
+    Counts the tickets of team in the queryset tickets, which may carry any
+    filter of the ticket list
+    """
+    # filters across tags may repeat tickets, which the subquery removes
+    ids = tickets.order_by().values("pk")
+    now = timezone.now()
+    matching = Ticket.objects.filter(team=team, pk__in=ids)
+
+    counts = dict(
+        count=Count("pk"),
+        open=Count("pk", filter=Q(deactivated=None)),
+        overdue=Count("pk", filter=overdue(now)),
+    )
+    totals = matching.aggregate(**counts)
+
+    statuses = (
+        TicketStatus.objects.filter(team=team)
+        .annotate(
+            count=Count("status_ticket", filter=Q(status_ticket__in=ids)),
+            open=Count(
+                "status_ticket",
+                filter=Q(status_ticket__in=ids, status_ticket__deactivated=None),
+            ),
+            overdue=Count(
+                "status_ticket",
+                filter=Q(status_ticket__in=ids) & overdue(now, "status_ticket__"),
+            ),
+        )
+        .order_by("id")
+        .values_list("id", "title", "count", "open", "overdue")
+    )
+    by_status = [row(key, "title", title, *values) for key, title, *values in statuses]
+    # tickets without a status, or whose status was deleted
+    by_status.append(
+        row(
+            None,
+            "title",
+            None,
+            *(
+                totals[field] - sum(status[field] for status in by_status)
+                for field in counts
+            ),
+        )
+    )
+
+    by_assignee = by_key(
+        row(key, "username", username, *values)
+        for key, username, *values in matching.values_list(
+            "assigned_user", "assigned_user__owner__username"
+        )
+        .annotate(**counts)
+        .order_by()
+    )
+
+    by_tag = [
+        row(key, "title", title, *values)
+        for key, title, *values in TicketTag.objects.filter(team=team, ticket__in=ids)
+        .values_list("tag", "tag__title")
+        .annotate(
+            count=Count("pk"),
+            open=Count("pk", filter=Q(ticket__deactivated=None)),
+            overdue=Count("pk", filter=overdue(now, "ticket__")),
+        )
+        .order_by("tag")
+    ]
+
+    return {
+        "total": totals["count"],
+        "open": totals["open"],
+        "overdue": totals["overdue"],
+        "by_status": by_status,
+        "by_assignee": by_assignee,
+        "by_tag": by_tag,
+    }
+
+
+def team_stats(team: Team) -> dict:
+    """
+    The stats of all the tickets of team, read from its counters rather than
+    counted. Only the overdue tickets, which become so as time passes, are
+    counted, over the index of open tickets by due date. The queries do not
+    grow with the number of tickets
+    """
+    now = timezone.now()
+    counters = TeamCounter.read(team.id)
+
+    late = Ticket.objects.filter(overdue(now), team=team).order_by()
+    overdue_counts = {kind: Counter() for kind, _ in TeamCounter.KINDS}
+    for status_id, assignee_id, count in late.values_list(
+        "status", "assigned_user"
+    ).annotate(Count("pk")):
+        overdue_counts[TeamCounter.STATUS][status_id] += count
+        overdue_counts[TeamCounter.ASSIGNEE][assignee_id] += count
+    overdue_counts[TeamCounter.TAG].update(
+        dict(
+            TicketTag.objects.filter(team=team, ticket__in=late.values("pk"))
+            .values_list("tag")
+            .annotate(Count("pk"))
+            .order_by()
+        )
+    )
+
+    def rows(kind, name_field, names) -> list:
+        return [
+            row(
+                key,
+                name_field,
+                name,
+                *counters[kind].get(key, (0, 0)),
+                overdue_counts[kind][key],
+            )
+            for key, name in names
+        ]
+
+    def counted(kind) -> list:
+        return [key for key, (count, _) in counters[kind].items() if key and count]
+
+    statuses = TicketStatus.objects.filter(team=team).order_by("id")
+    by_status = rows(
+        TeamCounter.STATUS,
+        "title",
+        [*statuses.values_list("id", "title"), (None, None)],
+    )
+
+    assignees = Member.objects.filter(pk__in=counted(TeamCounter.ASSIGNEE))
+    unassigned = counters[TeamCounter.ASSIGNEE].get(None, (0, 0))[0]
+    by_assignee = by_key(
+        rows(
+            TeamCounter.ASSIGNEE,
+            "username",
+            [
+                *assignees.values_list("id", "owner__username"),
+                *([(None, None)] if unassigned else []),
+            ],
+        )
+    )
+
+    tags = Tag.objects.filter(pk__in=counted(TeamCounter.TAG)).order_by("id")
+    by_tag = rows(TeamCounter.TAG, "title", tags.values_list("id", "title"))
+
+    return {
+        "total": sum(status["count"] for status in by_status),
+        "open": sum(status["open"] for status in by_status),
+        "overdue": sum(status["overdue"] for status in by_status),
+        "by_status": by_status,
+        "by_assignee": by_assignee,
+        "by_tag": by_tag,
+    }
+
+
+class StatsCache(VersionedCache):
+    # keyed by (team id, variant of the request)
+    SETTING = "TICKET_STATS_CACHE"
+
+
+stats_cache = StatsCache()
@@ -26,6 +26,11 @@ urlpatterns = [
     ),
     path(BASE_URL + "api/", include(buildTeamRouterUrls())),
     path(BASE_URL + "api/user/", include(buildUserRouterUrls())),
+    path(
+        BASE_URL + "api/cache-stats/",
+        views.CacheStatsView.as_view(),
+        name="cache-stats",
+    ),
     path(BASE_URL + "auth/", include("dj_rest_auth.urls")),
     path(BASE_URL + "auth/registration/", include("dj_rest_auth.registration.urls")),
     path(BASE_URL + "auth/slack/", views.SlackLogin.as_view(), name="slack_login"),
@@ -31,6 +31,10 @@ def buildTeamRouterUrls() -> list:
         r"invites", views.TeamInviteViewSet, basename="team-invites"
     )
 
+    team_related_router.register(
+        r"autocomplete", views.AutocompleteViewSet, basename="team-autocomplete"
+    )
+
     members_router = routers.NestedSimpleRouter(
         team_related_router, r"members", lookup="member"
     )
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+"""
+process wide caches of values read from a team's data, keyed by the team and
+a key of the cache's own. Each entry is stored with the version of the team
+it was read at, and only served while the team is still at that version, so
+an entry is stale on every process as soon as a write to the team commits.
+Entries also expire after TIMEOUT seconds, and the least recently used
+entries are evicted beyond MAX_ENTRIES. Both are read from the settings dict
+named by the cache's SETTING
+"""
+
+
+class VersionedCache:
+    SETTING = None
+    DEFAULT_TIMEOUT = 300
+    DEFAULT_MAX_ENTRIES = 1000
+
+    def __init__(self, timeout=None, max_entries=None):
+        self._timeout = timeout
+        self._max_entries = max_entries
+        # (team id, key) -> (team version, expires, value)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def timeout(self) -> float:
+        if self._timeout is not None:
+            return self._timeout
+        return getattr(settings, self.SETTING, {}).get("TIMEOUT", self.DEFAULT_TIMEOUT)
+
+    @property
+    def max_entries(self) -> int:
+        if self._max_entries is not None:
+            return self._max_entries
+        return getattr(settings, self.SETTING, {}).get(
+            "MAX_ENTRIES", self.DEFAULT_MAX_ENTRIES
+        )
+
+    def stored(self, value):
+        """
+        the form of value kept in the cache
+        """
+        return value
+
+    def served(self, value):
+        """
+        the form of a cached value handed to callers
+        """
+        return value
+
+    def get(self, team, key):
+        """
+        returns the value cached for the team's current version, or None on a
+        miss
+        """
+        key = (team.id, key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != team.version or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[2]
+
+        return self.served(value)
+
+    def set(self, team, key, value):
+        """
+        stores value, read after the team, and so its version, was read
+        """
+        if self.timeout <= 0 or self.max_entries <= 0:
+            return
+
+        value = self.stored(value)
+        key = (team.id, key)
+        with self._lock:
+            self._entries[key] = (team.version, time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, team_id, key):
+        with self._lock:
+            self._entries.pop((team_id, key), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -7,4 +7,6 @@ from api.views.team_related_views.member import *
 from api.views.team_related_views.pinned_ticket import *
 from api.views.team_related_views.team import *
 from api.views.team_related_views.team_invite import *
+from api.views.team_related_views.autocomplete import *
 from api.views.user_views.user_invite import *
+from api.views.cache_stats import CacheStatsView
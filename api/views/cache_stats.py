@@ -0,0 +1,28 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.docs import CACHE_STATS_SCHEMA
+from api.membership_cache import membership_cache
+from api.response_cache import response_cache
+from api.ticket_stats import stats_cache
+
+
+class CacheStatsView(APIView):
+    """
+    Hit rates and sizes of the caches of the process serving the request,
+    for monitoring. Staff only
+    """
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(**CACHE_STATS_SCHEMA)
+    def get(self, request, *args, **kwargs):
+        return Response(
+            {
+                "membership": membership_cache.stats(),
+                "responses": response_cache.stats(),
+                "ticket_stats": stats_cache.stats(),
+            }
+        )
@@ -0,0 +1,49 @@
+from .team_related_base import *
+from api.autocomplete import autocomplete_index, KINDS, MEMBERS, TAGS, TICKETS
+
+
+class AutocompleteViewSet(NewTeamRelatedBase):
+    """
+    Typo tolerant lookup of ticket titles, tag titles and member usernames
+    for as-you-type search, served from an in-memory trigram index
+    """
+
+    permission_classes = [IsAuthenticated, IsMemberUser]
+    record_events = False
+
+    default_limit = 10
+    max_limit = 50
+
+    def get_limit(self) -> int:
+        try:
+            limit = int(self.request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            return self.default_limit
+        return max(1, min(limit, self.max_limit))
+
+    def get_kinds(self) -> list:
+        kinds = self.request.query_params.get("kinds")
+        if not kinds:
+            return list(KINDS)
+        return [kind for kind in KINDS if kind in kinds.split(",")]
+
+    @extend_schema(**AUTOCOMPLETE_SCHEMA)
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "").strip()
+        kinds = self.get_kinds()
+        if not query:
+            return Response({kind: [] for kind in kinds})
+
+        matches = autocomplete_index.search(
+            self.get_team().id, query, kinds, self.get_limit()
+        )
+        text_field = {TICKETS: "title", TAGS: "title", MEMBERS: "username"}
+        return Response(
+            {
+                kind: [
+                    {"id": key, text_field[kind]: text, "score": score}
+                    for key, text, score in results
+                ]
+                for kind, results in matches.items()
+            }
+        )
@@ -15,3 +15,8 @@ class EventViewSet(
     permission_classes = [IsAuthenticated, IsAdminMemberOrReadOnly, IsMemberUser]
     queryset = Event.objects.all().select_related("team").prefetch_related("user")
     serializer_class = EventSerializer
+    pagination_class = TeamListPagination
+    cursor_ordering_fields = ["created", "id"]
+    cursor_ordering = "-created"
+    record_events = False
+    use_etags = False
@@ -14,6 +14,8 @@ class MemberViewSet(
 ):
     queryset = Member.objects.all().select_related("team", "owner")
     serializer_class = MemberSerializer
+    pagination_class = TeamListPagination
+    cursor_ordering_fields = ["created"]
     permission_classes = [
         IsMemberUserOrCreate,
         IsOwnerOrReadOnly | IsAdminMemberOrReadOnly,
@@ -27,7 +29,7 @@ class MemberViewSet(
         instance = self.get_object()
 
         # prevent the user updating roles if not admin
-        user_member = self.get_queryset(*args, **kwargs).get(owner=request.user)
+        user_member = self.get_request_member()
         if not user_member.is_admin():
             request_data.pop("role", None)
 
@@ -1,3 +1,5 @@
+from django.http import Http404
+
 from .team_related_base import *
 from api.serializers import *
 from api.permissions import *
@@ -17,24 +19,16 @@ class PinnedTicketViewSet(
 
     def get_member(self):
         member_id = self.kwargs.get(MEMBER_PK)
-        return get_object_or_404(Member, pk=member_id)
+        try:
+            return self.get_team_context().get_member(member_id)
+        except Member.DoesNotExist:
+            raise Http404
 
     def get_queryset(self, *args, **kwargs):
         member_instance = self.get_member()
         team_instance = self.get_team()
         return self.queryset.filter(team=team_instance, member=member_instance)
 
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-
-        # save the instance
-        team_instance = self.get_team()
-        member_instance = self.get_member()
-
-        serializer.save(team=team_instance, member=member_instance)
-
-        headers = self.get_success_headers(serializer.data)
-        return Response(
-            serializer.data, status=status.HTTP_201_CREATED, headers=headers
-        )
+    def perform_create(self, serializer):
+        serializer.save(team=self.get_team(), member=self.get_member())
+        self.record_event(Event.CREATE, serializer.instance)
@@ -8,6 +8,7 @@ class TagViewSet(TeamRelatedModelViewSet):
     queryset = Tag.objects.all().select_related("team")
     serializer_class = TagSerializer
     pagination_class = None
+    cache_list_responses = True
 
     def create(self, request, *args, **kwargs):
 
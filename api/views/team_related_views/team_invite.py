@@ -12,9 +12,11 @@ class TeamInviteViewSet(
     This class is simple enough that the defautls for listing, creating, and destroying are sufficient
     """
 
-    queryset = TeamInvite.objects.all().select_related("team")
+    queryset = TeamInvite.objects.all().select_related("team", "user")
     permission_classes = [IsAuthenticated, IsAdminMember]
     serializer_class = TeamInviteSerializer
+    record_events = False
+    use_etags = False
 
     @extend_schema(**TEAM_LIST_SCHEME)
     def create(self, request, *args, **kwargs):
@@ -1,11 +1,21 @@
+import time
+from hashlib import md5
+
 from rest_framework import status, viewsets, mixins
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
 
 from api.models import *
 from api.docs import *
 from api.permissions import *
+from api.pagination import TeamListPagination
+from api.event_writer import event_writer
+from api.response_cache import response_cache
+from api.serializers.sparse_fieldsets import prune_queryset, requested_fieldset
+from api.team_context import TeamContext
 
 """
 subclassing all the entire model viewset path in order to generate
@@ -13,36 +23,161 @@ documentation properly, and with minimal duplication
 """
 
 
+class NotModified(Exception):
+    """
+    raised once the permissions are checked, when the client already has
+    the current representation of a resource
+    """
+
+
 class NewTeamRelatedBase(viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated, IsMemberUser]
 
     search_fields = ["^name", "^description"]
     ordering_fields = ["created", "activated"]
 
+    # whether mutations through this viewset are recorded as team events
+    record_events = True
+
+    # whether reads answer with ETags derived from the team version, which
+    # only covers tickets, tags, statuses, members and pins
+    use_etags = True
+
     def check_permissions(self, request):
         super().check_permissions(request)
         super().check_object_permissions(request, self.get_team())
 
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        self.etag = None
+        if self.use_etags and request.method in ("GET", "HEAD"):
+            self.etag = self.get_etag(request)
+            if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+            if self.etag in if_none_match or "*" in if_none_match:
+                raise NotModified()
+
+    def get_etag(self, request) -> str:
+        """
+        The team version is read before anything else of the response, and
+        bumped in the same transaction as any change to it, so an ETag never
+        claims a newer version than the data it is sent with
+        """
+        team = self.get_team()
+        variant = md5(
+            "|".join(
+                [
+                    request.get_full_path(),
+                    f"{request.user.pk}",
+                    request.accepted_media_type or "",
+                ]
+            ).encode()
+        ).hexdigest()
+        return f'W/"{team.id}.{team.version}.{variant}"'
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": self.etag}
+            )
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "etag", None) and response.status_code == status.HTTP_200_OK:
+            response["ETag"] = self.etag
+        return response
+
+    def get_team_context(self):
+        return TeamContext.from_request(self.request)
+
     def get_team(self):
         team_id = self.kwargs.get(TEAM_PK)
-        return get_object_or_404(Team, pk=team_id)
+        return self.get_team_context().get_team(team_id)
+
+    def get_request_member(self):
+        # the member record belonging to the requesting user
+        return self.get_team_context().get_team_member(
+            self.get_team(), self.request.user
+        )
 
     def get_queryset(self, *args, **kwargs):
         team_instance = self.get_team()
         return self.queryset.filter(team=team_instance)
 
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        # ?fields=, ?omit= and ?expand= skip the joins and columns of what
+        # they leave out
+        if requested_fieldset(self.request) and self.serializer_class is not None:
+            queryset = prune_queryset(
+                queryset,
+                self.get_serializer(),
+                keep=getattr(self, "cursor_ordering_fields", ()),
+            )
+        return queryset
+
+    def record_event(self, event_type, instances):
+        if self.record_events:
+            event_writer.record(
+                event_type, instances, user=self.request.user, team=self.get_team()
+            )
+
+    def perform_create(self, serializer):
+        serializer.save(team=self.get_team())
+        self.record_event(Event.CREATE, serializer.instance)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.record_event(Event.UPDATE, serializer.instance)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self.record_event(Event.DELETE, instance)
+
 
 class TeamRelatedRetrieveMixin(NewTeamRelatedBase, mixins.RetrieveModelMixin):
-    @extend_schema(**TEAM_DETAIL_SCHEMA)
+    @extend_schema(**TEAM_RETRIEVE_SCHEMA)
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
 
 class TeamRelatedListMixin(NewTeamRelatedBase, mixins.ListModelMixin):
+    # whether rendered JSON lists are kept in the response cache, for small
+    # lists which rarely change. The model must be one of CACHED_MODELS
+    cache_list_responses = False
+
     @extend_schema(**TEAM_LIST_SCHEME)
     def list(self, request, *args, **kwargs):
+        self.cache_fill = None
+        if not self.cache_list_responses or request.accepted_renderer.format != "json":
+            return super().list(request, *args, **kwargs)
+
+        key = (
+            self.get_team(),
+            self.queryset.model._meta.model_name,
+            request.get_full_path(),
+        )
+        cached = response_cache.get(*key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        self.cache_fill = (key, time.monotonic())
         return super().list(request, *args, **kwargs)
 
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if getattr(self, "cache_fill", None) and response.status_code == 200:
+            (key, started), self.cache_fill = self.cache_fill, None
+            response.render()
+            response_cache.set(
+                *key, response.content, response["Content-Type"], started
+            )
+        return response
+
 
 class TeamRelatedCreateMixin(NewTeamRelatedBase, mixins.CreateModelMixin):
     @extend_schema(**TEAM_DETAIL_SCHEMA)
@@ -50,9 +185,7 @@ class TeamRelatedCreateMixin(NewTeamRelatedBase, mixins.CreateModelMixin):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        # save the instance
-        team_instance = self.get_team()
-        serializer.save(team=team_instance)
+        self.perform_create(serializer)
 
         headers = self.get_success_headers(serializer.data)
         return Response(
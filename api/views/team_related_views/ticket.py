@@ -1,9 +1,19 @@
-from django.db.models import Q
+from collections import Counter
+
+from django.db.models import F, Q
+from django.http import StreamingHttpResponse
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
 from .team_related_base import *
 from api.serializers import *
 from api.permissions import *
 from api.docs import *
+from api.ticket_search import search_tickets
+from api.ticket_stats import stats_cache, team_stats, ticket_stats
+from api.ticket_board import DEFAULT_LIMIT, MAX_LIMIT, board, board_column
+from api.ticket_export import FORMATS, NDJSON, export_lines
+from api.serializers.sparse_fieldsets import prune_queryset, requested_fieldset
 
 
 class TicketViewSet(TeamRelatedModelViewSet):
@@ -11,11 +21,13 @@ class TicketViewSet(TeamRelatedModelViewSet):
 
     queryset = (
         Ticket.objects.all()
-        .select_related("team", "assigned_user", "status")
+        .select_related("team", "assigned_user__owner", "status")
         .prefetch_related("tag_list")
     )
     serializer_class = TicketSerializer
     permission_classes = [IsAuthenticated, IsMemberUser]
+    pagination_class = TeamListPagination
+    cursor_ordering_fields = ["id", "created", "ticket_number"]
 
     search_fields = [
         "^team__name",
@@ -27,17 +39,402 @@ class TicketViewSet(TeamRelatedModelViewSet):
         "^tag_list__title",
     ]
 
+    # maximum number of tickets accepted by a single bulk request
+    bulk_limit = 1000
+
+    # full-text search of the ticket list, ranked by relevance
+    search_query_param = "q"
+
     ordering_fields = ["created", "activated"]
     filterset_fields = ["assigned_user__owner__username", "status__id", "tag_list__id"]
 
+    def get_queryset(self, *args, **kwargs):
+        queryset = super().get_queryset(*args, **kwargs)
+
+        query = self.request.query_params.get(self.search_query_param, "").strip()
+        if query and self.action in ("list", "stats", "board"):
+            queryset = search_tickets(queryset, query, self.get_team().id)
+        if self.action == "retrieve":
+            queryset = queryset.select_related("ticket_node")
+        return queryset
+
+    def get_serializer_class(self):
+        # the rollup of a ticket's subtree is only rendered one ticket at a time
+        if self.action == "retrieve":
+            return TicketDetailSerializer
+        return super().get_serializer_class()
+
+    @extend_schema(**TICKET_LIST_SCHEMA)
+    def list(self, request, *args, **kwargs):
+        # cursors are keyed on the ordering fields, which search results,
+        # ordered by rank, do not follow
+        query = request.query_params.get(self.search_query_param, "").strip()
+        if query and self.paginator.use_cursor(request):
+            message = "Search results cannot be cursor paginated."
+            raise ValidationError({self.search_query_param: [message]})
+        return super().list(request, *args, **kwargs)
+
+    def get_node(self):
+        """
+        The ticket of the request with its hierarchy node, None for tickets
+        outside any hierarchy
+        """
+        queryset = Ticket.objects.filter(team=self.get_team()).select_related(
+            "ticket_node"
+        )
+        ticket = get_object_or_404(queryset.only("id", "team"), pk=self.kwargs["pk"])
+        self.check_object_permissions(self.request, ticket)
+        return ticket, getattr(ticket, "ticket_node", None)
+
+    def hierarchy(self, **lookups) -> list:
+        """
+        The tickets of the team matching lookups on their node, in path
+        order, each with its node_path. A single query, as well as the
+        prefetches of the serializer
+        """
+        queryset = (
+            self.get_queryset()
+            .filter(**lookups)
+            .annotate(node_path=F("ticket_node__path"))
+            .order_by("node_path")
+        )
+        if requested_fieldset(self.request):
+            queryset = prune_queryset(queryset, self.get_serializer())
+        return list(queryset)
+
+    @extend_schema(**TICKET_SUBTREE_SCHEMA, responses=TicketSerializer)
+    @action(detail=True, methods=["get"])
+    def subtree(self, request, *args, **kwargs):
+        """
+        The ticket with its descendants, nested in children
+        """
+        ticket, node = self.get_node()
+        if node is None:
+            tickets = self.hierarchy(pk=ticket.pk)
+            return Response({**self.get_serializer(tickets[0]).data, "children": []})
+
+        lookups = {"ticket_node__path__startswith": node.path}
+        depth = request.query_params.get("depth")
+        if depth is not None:
+            try:
+                lookups["ticket_node__depth__lte"] = node.depth + int(depth)
+            except ValueError:
+                raise ValidationError({"depth": ["A valid integer is required."]})
+
+        tickets = self.hierarchy(**lookups)
+        data = self.get_serializer(tickets, many=True).data
+
+        # parents sort before their children, so one pass nests every ticket
+        by_path = {}
+        for ticket, item in zip(tickets, data):
+            item["children"] = []
+            by_path[ticket.node_path] = item
+            parent = by_path.get(TicketNode.parent_path(ticket.node_path))
+            if parent is not None:
+                parent["children"].append(item)
+        return Response(by_path[node.path])
+
+    @extend_schema(**TEAM_RETRIEVE_SCHEMA, responses=TicketSerializer(many=True))
+    @action(detail=True, methods=["get"])
+    def ancestors(self, request, *args, **kwargs):
+        """
+        The parent of the ticket, its parent and so on, the root first
+        """
+        ticket, node = self.get_node()
+        if node is None or node.depth == 1:
+            return Response([])
+
+        tickets = self.hierarchy(
+            ticket_node__path__in=TicketNode.ancestor_paths(node.path)
+        )
+        return Response(self.get_serializer(tickets, many=True).data)
+
+    @extend_schema(**TEAM_RETRIEVE_SCHEMA, responses=TicketSerializer(many=True))
+    @action(detail=True, methods=["get"])
+    def children(self, request, *args, **kwargs):
+        """
+        The tickets directly below the ticket
+        """
+        ticket, node = self.get_node()
+        if node is None or node.is_leaf():
+            return Response([])
+
+        tickets = self.hierarchy(
+            ticket_node__path__startswith=node.path,
+            ticket_node__depth=node.depth + 1,
+        )
+        return Response(self.get_serializer(tickets, many=True).data)
+
+    @extend_schema(**TICKET_MOVE_SCHEMA, request=TicketMoveSerializer(many=True))
+    @action(detail=False, methods=["post"], url_path="move", url_name="move")
+    def move(self, request, *args, **kwargs):
+        """
+        Moves a list of tickets, with the subtrees below them, under new
+        parents in one transaction: either every move is applied or none
+        """
+        serializer = TicketMoveSerializer(
+            data=request.data, many=True, max_length=self.bulk_limit
+        )
+        if not serializer.is_valid():
+            if not isinstance(serializer.errors, list):
+                raise ValidationError(serializer.errors)
+            errors = [
+                {"index": index, "errors": item_errors}
+                for index, item_errors in enumerate(serializer.errors)
+                if item_errors
+            ]
+            return Response(
+                {"results": [], "errors": errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        moves = serializer.validated_data
+        tickets = self.get_queryset().in_bulk(
+            {move["id"] for move in moves}
+            | {move["parent_id"] for move in moves if move["parent_id"] is not None}
+        )
+
+        errors = []
+        for index, move in enumerate(moves):
+            missing = {
+                field: ["Ticket not found."]
+                for field in ["id", "parent_id"]
+                if move[field] is not None and move[field] not in tickets
+            }
+            if missing:
+                errors.append({"index": index, "errors": missing})
+
+        if not errors:
+            try:
+                TicketNode.set_parents(
+                    [
+                        (tickets[move["id"]], tickets.get(move["parent_id"]))
+                        for move in moves
+                    ]
+                )
+            except InvalidMove as error:
+                errors.append(
+                    {"index": error.index, "errors": {"parent_id": [str(error)]}}
+                )
+        if errors:
+            return Response(
+                {"results": [], "errors": errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        moved = list({move["id"]: tickets[move["id"]] for move in moves}.values())
+        self.record_event(Event.UPDATE, moved)
+        return Response(
+            {"results": self.get_serializer(moved, many=True).data, "errors": []}
+        )
+
+    @extend_schema(**TICKET_STATS_SCHEMA)
+    @action(detail=False, methods=["get"], url_path="stats", url_name="stats")
+    def stats(self, request, *args, **kwargs):
+        """
+        Dashboard counts over the tickets matching the list's filters, read
+        from the team counters when there are none, and served from the
+        stats cache while the team is unchanged
+        """
+        team = self.get_team()
+        variant = request.get_full_path()
+        stats = stats_cache.get(team, variant)
+        if stats is None:
+            if self.is_filtered():
+                tickets = self.filter_queryset(self.get_queryset())
+                stats = ticket_stats(team, tickets)
+            else:
+                stats = team_stats(team)
+            stats_cache.set(team, variant, stats)
+        return Response(stats)
+
+    @extend_schema(**TICKET_BOARD_SCHEMA)
+    @action(detail=False, methods=["get"], url_path="board", url_name="board")
+    def board(self, request, *args, **kwargs):
+        """
+        The tickets of the team by status column, the first of each column
+        picked by a single windowed query. ?status= and ?after= page
+        through one column, as linked by the next of each column
+        """
+        team = self.get_team()
+        limit = self.query_int("limit", DEFAULT_LIMIT, minimum=1, maximum=MAX_LIMIT)
+        tickets = self.filter_queryset(self.get_queryset())
+        counted = tickets if self.is_filtered() else None
+
+        column = request.query_params.get("status")
+        if column is None:
+            columns = board(team, counted, limit)
+        else:
+            status_ = None
+            if column != "none":
+                try:
+                    status_ = TicketStatus.objects.get(team=team, pk=int(column))
+                except (ValueError, TicketStatus.DoesNotExist):
+                    raise ValidationError({"status": ["Unknown status."]})
+            after = self.query_int("after", 0, minimum=0)
+            columns = [board_column(team, status_, after, counted, limit)]
+
+        ids = [pk for column in columns for pk in column.ticket_ids]
+        loaded = tickets.in_bulk(ids)
+        data = self.get_serializer([loaded[pk] for pk in ids], many=True).data
+
+        results, start = [], 0
+        for column in columns:
+            end = start + len(column.ticket_ids)
+            results.append(
+                {
+                    "id": column.status_id,
+                    "title": column.title,
+                    "color": column.color,
+                    "count": column.count,
+                    "results": data[start:end],
+                    "next": self.column_link(column) if column.more else None,
+                }
+            )
+            start = end
+        return Response({"columns": results})
+
+    def query_int(self, name, default, minimum, maximum=None) -> int:
+        value = self.request.query_params.get(name)
+        if value is None:
+            return default
+        try:
+            value = int(value)
+        except ValueError:
+            value = None
+        if value is None or value < minimum or (maximum and value > maximum):
+            bound = f" and {maximum}" if maximum else ""
+            raise ValidationError(
+                {name: [f"Expected an integer of at least {minimum}{bound}."]}
+            )
+        return value
+
+    def column_link(self, column) -> str:
+        # the filters, fields and limit of the board carry over
+        url = self.request.build_absolute_uri()
+        status_ = "none" if column.status_id is None else column.status_id
+        url = replace_query_param(url, "status", status_)
+        return replace_query_param(url, "after", column.ticket_ids[-1])
+
+    def is_filtered(self) -> bool:
+        params = [self.search_query_param, *self.filterset_fields]
+        return any(self.request.query_params.get(param) for param in params)
+
+    @extend_schema(**TICKET_EXPORT_SCHEMA)
+    @action(detail=False, methods=["get"], url_path="export", url_name="export")
+    def export(self, request, *args, **kwargs):
+        """
+        Streams every ticket of the team as NDJSON or CSV, unpaginated
+        """
+        output = request.query_params.get("output", NDJSON)
+        if output not in FORMATS:
+            raise ValidationError(
+                {"output": [f"Expected one of {', '.join(FORMATS)}."]}
+            )
+
+        team_id = self.get_team().id
+        response = StreamingHttpResponse(
+            export_lines(team_id, output), content_type=FORMATS[output]
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="team-{team_id}-tickets.{output}"'
+        return response
+
     @extend_schema(**TEAM_DETAIL_SCHEMA)
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        serializer.save(team=self.get_team())
+        self.perform_create(serializer)
 
         headers = self.get_success_headers(serializer.data)
         return Response(
             serializer.data, status=status.HTTP_201_CREATED, headers=headers
         )
+
+    @extend_schema(**TEAM_DETAIL_SCHEMA, request=TicketSerializer(many=True))
+    @action(detail=False, methods=["post"], url_path="bulk", url_name="bulk")
+    def bulk_create(self, request, *args, **kwargs):
+        """
+        Creates a list of tickets at once. Invalid tickets are reported by
+        their index in the list without preventing the valid ones from
+        being created
+        """
+        serializer = self.get_serializer(
+            data=request.data, many=True, max_length=self.bulk_limit
+        )
+        valid, errors = serializer.validate_items(request.data)
+
+        team_instance = self.get_team()
+        tickets = serializer.create(
+            [{**attrs, "team": team_instance} for _, attrs in valid]
+        )
+        self.record_event(Event.CREATE, tickets)
+
+        return Response(
+            {
+                "results": self.get_serializer(tickets, many=True).data,
+                "errors": errors,
+            },
+            status=status.HTTP_400_BAD_REQUEST
+            if errors and not tickets
+            else status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(**TEAM_DETAIL_SCHEMA, request=TicketSerializer(many=True))
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        """
+        Partially updates a list of tickets, each identified by its id.
+        Invalid items are reported by their index in the list without
+        preventing the valid ones from being updated. Items sharing an id
+        are all invalid, as neither is known to be the intended update
+        """
+        serializer = self.get_serializer(
+            data=request.data, many=True, partial=True, max_length=self.bulk_limit
+        )
+        valid, errors = serializer.validate_items(request.data)
+
+        ids = {index: request.data[index].get("id") for index, _ in valid}
+        instances = self.get_queryset().in_bulk(
+            [pk for pk in ids.values() if isinstance(pk, int)]
+        )
+        listed = Counter(
+            item.get("id") for item in request.data if isinstance(item, dict)
+        )
+
+        to_update, validated_data, indexes = [], [], []
+        for index, attrs in valid:
+            instance = instances.get(ids[index])
+            if instance is None:
+                errors.append({"index": index, "errors": {"id": ["Ticket not found."]}})
+                continue
+            if listed[ids[index]] > 1:
+                errors.append(
+                    {
+                        "index": index,
+                        "errors": {"id": ["Ticket listed more than once."]},
+                    }
+                )
+                continue
+
+            to_update.append(instance)
+            validated_data.append(attrs)
+            indexes.append(index)
+
+        tickets = serializer.update(to_update, validated_data)
+        errors += [
+            {"index": indexes[position], "errors": item_errors}
+            for position, item_errors in serializer.move_errors.items()
+        ]
+        self.record_event(Event.UPDATE, tickets)
+        errors.sort(key=lambda error: error["index"])
+
+        return Response(
+            {
+                "results": self.get_serializer(tickets, many=True).data,
+                "errors": errors,
+            },
+            status=status.HTTP_400_BAD_REQUEST
+            if errors and not tickets
+            else status.HTTP_200_OK,
+        )
@@ -8,6 +8,7 @@ class StatusViewSet(TeamRelatedModelViewSet):
     queryset = TicketStatus.objects.all().select_related("team")
     serializer_class = TicketStatusSerializer
     pagination_class = None
+    cache_list_responses = True
 
     @extend_schema(**TEAM_LIST_SCHEME)
     def create(self, request, *args, **kwargs):
@@ -6,7 +6,11 @@ from api.models import Ticket
 
 
 class UserAssignedTickets(GenericViewSet, ListAPIView):
-    queryset = Ticket.objects.all().prefetch_related("assigned_user")
+    queryset = (
+        Ticket.objects.all()
+        .select_related("team", "assigned_user__owner", "status")
+        .prefetch_related("tag_list")
+    )
     serializer_class = TicketSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = None
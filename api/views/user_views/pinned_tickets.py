@@ -6,7 +6,7 @@ from api.models import Ticket
 
 
 class UserPinnedTickets(GenericViewSet, ListModelMixin):
-    queryset = Ticket.objects.prefetch_related("members_pins")
+    queryset = Ticket.objects.select_related("team").prefetch_related("members_pins")
     serializer_class = TicketSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = None
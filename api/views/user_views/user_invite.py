@@ -1,6 +1,8 @@
 from api.serializers import *
 from api.permissions import IsAuthenticated
-from api.models import TeamInvite, Member
+from api.models import TeamInvite, Member, Event
+from api.membership_cache import membership_cache
+from api.event_writer import event_writer
 from rest_framework import serializers
 from rest_framework.response import Response
 from django.db import transaction
@@ -30,7 +32,15 @@ class UserInviteViewSet(
             raise serializers.ValidationError({"team": "this member already exists!"})
 
         with transaction.atomic():
-            Member.objects.create(owner=user_instance, team=team_instance).save()
+            member = Member.objects.create(owner=user_instance, team=team_instance)
             invite_instance.delete()
+            event_writer.record(
+                Event.CREATE, member, user=request.user, team=team_instance
+            )
+
+            # drop the cached "not a member" answer for the new member
+            transaction.on_commit(
+                lambda: membership_cache.invalidate(team_instance.id, user_instance.id)
+            )
 
         return Response({"msg": "success"})